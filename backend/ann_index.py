@@ -0,0 +1,345 @@
+"""
+Ann_index.py file for Semantic-functions. This file contains the approximate nearest neighbour (IVF-flat) index for large documents.
+
+Run it directly to compare the recall and latency of the index with exact search on synthetic vectors:
+
+    python ann_index.py --vectors 20000 100000 300000
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for the serialized form of an index
+import io
+
+# Required for vector handling
+import numpy as np
+from typing import List, Optional, Tuple
+
+# Required for selecting the best scores
+from utils import top_k_indices
+
+
+# ------------- [Settings] -------------
+
+# Number of k-means iterations when training the clusters
+TRAIN_ITERATIONS = 10
+
+# Maximum number of sampled vectors per cluster when training the clusters
+TRAIN_VECTORS_PER_LIST = 64
+
+# Maximum number of vectors assigned to clusters at once, which bounds the temporary memory of add
+ASSIGN_BLOCK_ROWS = 16384
+
+
+# ------------- [Functions] -------------
+
+# Scale vectors to unit length
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    This function returns the vectors scaled to unit length. Zero vectors stay zero.
+    """
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+# Cluster vectors by direction with spherical k-means
+def train_centroids(vectors: np.ndarray, nlist: int, iterations: int = TRAIN_ITERATIONS, seed: int = 0) -> np.ndarray:
+    """
+    This function clusters a sample of the vectors by direction (spherical k-means),
+    so that vectors with a high dot product with each other share a cluster.
+
+    Args:
+        vectors (numpy.ndarray): The 2D matrix of vectors to cluster.
+        nlist (int): The number of clusters.
+        iterations (int): The number of k-means iterations.
+        seed (int): The seed of the sample and of the initial centroids.
+
+    Returns:
+        numpy.ndarray: The unit length centroid of each cluster, as a (nlist, dimension) float32 matrix.
+    """
+
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), nlist * TRAIN_VECTORS_PER_LIST)
+    sample = normalize_rows(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]).astype(np.float32)
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = assign_lists(sample, centroids)
+
+        # Sum the vectors of each cluster, in cluster order
+        order = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=nlist)
+        filled = np.flatnonzero(counts)
+        sums = np.add.reduceat(sample[order], np.concatenate([[0], np.cumsum(counts)[:-1]])[filled], axis=0)
+
+        # A cluster left empty starts again from a random vector of the sample
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        centroids[filled] = normalize_rows(sums)
+
+    return centroids
+
+# Find the cluster of each vector
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """
+    This function returns the index of the centroid with the highest dot product for
+    each vector, scoring at most ASSIGN_BLOCK_ROWS vectors at a time.
+    """
+
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for offset in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+        assignments[offset:offset + ASSIGN_BLOCK_ROWS] = np.argmax(vectors[offset:offset + ASSIGN_BLOCK_ROWS] @ centroids.T, axis=1)
+    return assignments
+
+
+# ------------- [Classes] -------------
+
+class IVFFlatIndex:
+    """
+    An inverted file index with uncompressed (flat) vectors, for dot product search.
+    The vectors are clustered by direction, and a query only scores the vectors of
+    the nprobe clusters closest to it, instead of every vector. More clusters probed
+    is slower but finds more of the exact top_k; probing every cluster is exact.
+
+    The index is built incrementally with add. Until it holds min_vectors vectors it
+    is not trained and searches exactly. Once it is, it trains its clusters on the
+    vectors it holds and assigns every later vector to its closest cluster. The
+    clusters are not retrained afterwards, so the first min_vectors vectors should
+    be representative of the rest.
+
+    The vectors are kept in one float32 matrix sorted by cluster, so the vectors of a
+    cluster are contiguous rows scored in place. The index holds a copy of every
+    vector, and can be serialized with to_bytes.
+    """
+
+    def __init__(self, dimension: int, min_vectors: int, nlist: Optional[int] = None, seed: int = 0):
+        self.dimension = dimension
+        self.min_vectors = max(1, min_vectors)
+        self.nlist = nlist
+        self.seed = seed
+        self.centroids = None
+        self.count = 0
+
+        # Parts added since the last flush, merged into the matrix sorted by cluster by flush
+        self._pending_vectors: List[np.ndarray] = []
+        self._pending_ids: List[np.ndarray] = []
+
+        # After training: the vectors and ids sorted by cluster, cluster i being rows _bounds[i] to _bounds[i + 1]
+        self._vectors = np.zeros((0, dimension), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._bounds = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def nbytes(self) -> int:
+        parts = self._pending_vectors + self._pending_ids + [self._vectors, self._ids]
+        return sum(part.nbytes for part in parts) + (self.centroids.nbytes if self.is_trained else 0)
+
+    def add(self, vectors: np.ndarray) -> None:
+        """
+        This function adds vectors to the index, with ids following the ids of the
+        vectors already added (the first vector has id 0). Trains the clusters once
+        the index holds min_vectors vectors.
+
+        Args:
+            vectors (numpy.ndarray): The 2D matrix of vectors to add.
+        """
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        self._pending_vectors.append(vectors)
+        self._pending_ids.append(np.arange(self.count, self.count + len(vectors), dtype=np.int64))
+        self.count += len(vectors)
+
+        if not self.is_trained and self.count >= self.min_vectors:
+            self._train()
+
+    def _train(self) -> None:
+        # Cluster the vectors held so far, which are assigned to their clusters by the next flush
+        vectors = self._pending_vectors[0] if len(self._pending_vectors) == 1 else np.concatenate(self._pending_vectors)
+        nlist = self.nlist or int(round(np.sqrt(len(vectors))))
+        self.centroids = train_centroids(vectors, max(1, min(nlist, len(vectors))), seed=self.seed)
+        self.nlist = len(self.centroids)
+        self._bounds = np.zeros(self.nlist + 1, dtype=np.int64)
+
+    def flush(self) -> None:
+        """
+        This function assigns the vectors added since the last flush to their clusters.
+        Search does it when needed, so calling it only moves that work out of the first search.
+        """
+
+        if not self.is_trained or not self._pending_vectors:
+            return
+
+        assignments = np.concatenate([assign_lists(vectors, self.centroids) for vectors in self._pending_vectors])
+        old_sizes = np.diff(self._bounds)
+        new_sizes = np.bincount(assignments, minlength=self.nlist)
+        bounds = np.concatenate([[0], np.cumsum(old_sizes + new_sizes)])
+
+        # Copy the clusters already held, then write every new row once, straight to its place
+        vectors = np.empty((bounds[-1], self.dimension), dtype=np.float32)
+        ids = np.empty(bounds[-1], dtype=np.int64)
+        for list_id in np.flatnonzero(old_sizes):
+            vectors[bounds[list_id]:bounds[list_id] + old_sizes[list_id]] = self._vectors[self._bounds[list_id]:self._bounds[list_id + 1]]
+            ids[bounds[list_id]:bounds[list_id] + old_sizes[list_id]] = self._ids[self._bounds[list_id]:self._bounds[list_id + 1]]
+
+        order = np.argsort(assignments, kind='stable')
+        new_starts = np.concatenate([[0], np.cumsum(new_sizes)[:-1]])
+        destinations = np.empty(len(assignments), dtype=np.int64)
+        destinations[order] = np.arange(len(assignments)) + np.repeat(bounds[:-1] + old_sizes - new_starts, new_sizes)
+
+        offset = 0
+        for part_vectors, part_ids in zip(self._pending_vectors, self._pending_ids):
+            vectors[destinations[offset:offset + len(part_vectors)]] = part_vectors
+            ids[destinations[offset:offset + len(part_vectors)]] = part_ids
+            offset += len(part_vectors)
+
+        self._vectors, self._ids, self._bounds = vectors, ids, bounds
+        self._pending_vectors, self._pending_ids = [], []
+
+    def search(self, query: np.ndarray, top_k: Optional[int] = None, min_score: Optional[float] = None, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        This function selects the top_k vectors with the highest dot product with the
+        query that are at least min_score, among the vectors of the nprobe clusters
+        closest to the query. The search is exact when the index is not trained, when
+        top_k is None, or when nprobe is None or at least the number of clusters.
+
+        Args:
+            query (numpy.ndarray): The query vector.
+            top_k (int): The maximum number of results. Returns all results if None.
+            min_score (float): The minimum score of a result. Applies no threshold if None.
+            nprobe (int): The number of clusters to search.
+
+        Returns:
+            tuple: The ids of the results sorted by decreasing score, and their scores.
+        """
+
+        query = np.asarray(query, dtype=np.float32).reshape(self.dimension)
+
+        if not self.is_trained:
+            vectors = np.concatenate(self._pending_vectors) if self._pending_vectors else np.zeros((0, self.dimension), dtype=np.float32)
+            ids = np.arange(len(vectors), dtype=np.int64)
+            scores = vectors @ query
+        else:
+            self.flush()
+            if top_k is None or nprobe is None or nprobe >= self.nlist:
+                probed = np.arange(self.nlist)
+            else:
+                probed = top_k_indices(self.centroids @ query, max(1, nprobe))
+
+            # Score the rows of each probed cluster in place
+            ids = np.concatenate([self._ids[self._bounds[list_id]:self._bounds[list_id + 1]] for list_id in probed])
+            scores = np.concatenate([self._vectors[self._bounds[list_id]:self._bounds[list_id + 1]] @ query for list_id in probed])
+
+        selected = top_k_indices(scores, top_k, min_score)
+        return ids[selected], scores[selected]
+
+    def to_bytes(self) -> bytes:
+        """
+        This function serializes the index, with its vectors, into the bytes of an uncompressed .npz file.
+        """
+
+        self.flush()
+        arrays = {"settings": np.array([self.dimension, self.min_vectors, self.nlist or 0, self.seed, self.count], dtype=np.int64)}
+        if self.is_trained:
+            arrays["centroids"] = self.centroids
+            arrays["bounds"] = self._bounds
+            arrays["vectors"] = self._vectors
+            arrays["ids"] = self._ids
+        else:
+            arrays["vectors"] = np.concatenate(self._pending_vectors) if self._pending_vectors else np.zeros((0, self.dimension), dtype=np.float32)
+
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "IVFFlatIndex":
+        """
+        This function loads an index serialized with to_bytes.
+        """
+
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            dimension, min_vectors, nlist, seed, count = (int(value) for value in arrays["settings"])
+            index = cls(dimension, min_vectors, nlist or None, seed)
+            index.count = count
+            vectors = arrays["vectors"]
+            if "centroids" not in arrays:
+                index._pending_vectors = [vectors] if len(vectors) else []
+                index._pending_ids = [np.arange(len(vectors), dtype=np.int64)] if len(vectors) else []
+                return index
+
+            index.centroids = arrays["centroids"]
+            index._bounds = arrays["bounds"]
+            index._vectors = vectors
+            index._ids = arrays["ids"]
+        return index
+
+
+# ------------- [Benchmark] -------------
+
+# Build synthetic unit length vectors around topic directions, like sentence embeddings of a long document
+def make_synthetic_vectors(count: int, dimension: int = 768, topics: int = 2000, spread: float = 0.9, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = normalize_rows(rng.standard_normal((topics, dimension), dtype=np.float32))
+    vectors = centers[rng.integers(0, topics, count)]
+    vectors += spread * normalize_rows(rng.standard_normal((count, dimension), dtype=np.float32))
+    return normalize_rows(vectors).astype(np.float32)
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Compare the recall and latency of the IVF-flat index with exact search.")
+    parser.add_argument("--vectors", type=int, nargs="+", default=[20000, 100000, 300000], help="Numbers of vectors to index.")
+    parser.add_argument("--dimension", type=int, default=768, help="Dimension of the vectors.")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64], help="Numbers of clusters to search.")
+    parser.add_argument("--top-k", type=int, default=10, help="Number of results per query (the k of recall@k).")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries.")
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'vectors':>8} {'nlist':>6} {'build s':>8} {'mode':>10} {'recall@k':>9} {'ms/query':>9} {'speedup':>8}")
+    for count in args.vectors:
+        data = make_synthetic_vectors(count + args.queries, args.dimension)
+        vectors, queries = data[:count], data[count:]
+
+        # Exact search, as done for documents without an index
+        start = time.perf_counter()
+        exact = [top_k_indices(vectors @ query, args.top_k) for query in queries]
+        exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        # Built incrementally, in batches of pages
+        start = time.perf_counter()
+        index = IVFFlatIndex(args.dimension, min_vectors=min(count, 50000))
+        for offset in range(0, count, 2000):
+            index.add(vectors[offset:offset + 2000])
+        index.search(queries[0], args.top_k, nprobe=1)
+        build_seconds = time.perf_counter() - start
+
+        # The serialized index gives the same results
+        loaded = IVFFlatIndex.from_bytes(index.to_bytes())
+        assert np.array_equal(loaded.search(queries[0], args.top_k, nprobe=8)[0], index.search(queries[0], args.top_k, nprobe=8)[0])
+
+        result = {"nlist": index.nlist, "build_seconds": build_seconds, "exact_ms": exact_ms, "nprobe": {}}
+        print(f"{count:>8} {index.nlist:>6} {build_seconds:>8.2f} {'exact':>10} {1:>9.3f} {exact_ms:>9.2f} {1:>7.1f}x")
+        for nprobe in args.nprobe:
+            start = time.perf_counter()
+            found = [index.search(query, args.top_k, nprobe=nprobe)[0] for query in queries]
+            ms = (time.perf_counter() - start) * 1000 / len(queries)
+            recall = np.mean([len(np.intersect1d(a, b)) / len(b) for a, b in zip(found, exact)])
+            result["nprobe"][nprobe] = {"recall": float(recall), "ms": ms}
+            print(f"{count:>8} {index.nlist:>6} {build_seconds:>8.2f} {f'nprobe {nprobe}':>10} {recall:>9.3f} {ms:>9.2f} {exact_ms / ms:>7.1f}x")
+        results[count] = result
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
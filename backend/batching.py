@@ -0,0 +1,246 @@
+"""
+Batching.py file for Semantic-functions. This file contains the micro-batching scheduler for model.encode.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for scheduling and timing
+import asyncio
+import contextvars
+import time
+from collections import deque
+
+# Required for vector handling
+import numpy as np
+from typing import Callable, List
+
+
+# ------------- [Settings] -------------
+
+# Jobs of at most this many sentences (search queries, short texts) go in the priority lane, like jobs sent with priority set
+SHORT_JOB_SENTENCES = 8
+
+
+# ------------- [Classes] -------------
+
+class EncodeJob:
+    """
+    One call to EncodeBatcher.encode. Its sentences are split into slices of at
+    most max_batch_size, which may run in different batches, and its vectors are
+    put back together in order when the last slice returns.
+    """
+
+    def __init__(self, sentences: List[str], future: asyncio.Future, slice_size: int):
+        self.future = future
+        self.enqueued = time.perf_counter()
+        self.slices = [(start, sentences[start:start + slice_size]) for start in range(0, len(sentences), slice_size)] or [(0, [])]
+        self._parts = {}
+
+    def deliver(self, start: int, vectors: np.ndarray) -> None:
+        # Keep the vectors of one slice, and resolve the job once all slices are in
+        if self.future.done():
+            return
+        self._parts[start] = vectors
+        if len(self._parts) == len(self.slices):
+            parts = [self._parts[start] for start, _ in self.slices]
+            self.future.set_result(parts[0] if len(parts) == 1 else np.concatenate(parts))
+
+    def fail(self, error: Exception) -> None:
+        if not self.future.done():
+            self.future.set_exception(error)
+
+
+class EncodeBatcher:
+    """
+    Collects encode jobs from concurrent requests and runs them as combined calls
+    to encode_fn. Each job is split into slices of at most max_batch_size
+    sentences. A batch is started by the first waiting slice and closes after
+    window_ms, or as soon as the next slice would not fit in max_batch_size
+    sentences. The vectors of each batch are then scattered back to the jobs.
+
+    Jobs sent with priority set, or of at most SHORT_JOB_SENTENCES sentences, wait
+    in a priority lane that is always batched first, so a search query does not
+    wait behind the slices of a large document. Batches are not awaited one by
+    one: up to max_concurrent_batches bulk batches run at once (priority batches
+    are not limited), and the next batch is collected while they run. If an
+    executor is given, encode_fn runs on it instead of on the event loop, in its
+    priority lane for priority batches.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray], window_ms: float, max_batch_size: int, executor=None, max_concurrent_batches: int = 1):
+        self.encode_fn = encode_fn
+        self.executor = executor
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+
+        # The lanes, wake-up event, and worker task belong to one event loop, and are created on first use
+        self._loop = None
+        self._priority = None
+        self._bulk = None
+        self._wake = None
+        self._task = None
+        self._bulk_running = 0
+        self._running = set()
+
+        self.batches = 0
+        self.jobs = 0
+        self.slices = 0
+        self.sentences = 0
+        self.largest_batch = 0
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+
+    def _start(self) -> None:
+        # Create the lanes and worker task for the running event loop
+        self._loop = asyncio.get_running_loop()
+        self._priority = deque()
+        self._bulk = deque()
+        self._wake = asyncio.Event()
+        self._bulk_running = 0
+        self._running = set()
+        # The worker serves every request, so it runs in an empty context instead of that of the request starting it
+        self._task = contextvars.Context().run(self._loop.create_task, self._run())
+
+    async def encode(self, sentences: List[str], priority: bool = False) -> np.ndarray:
+        """
+        This function queues sentences for the next batches and waits for their vectors.
+
+        Args:
+            sentences (list): The sentences to embed.
+            priority (bool): Whether to queue them in the priority lane, for search queries.
+
+        Returns:
+            numpy.ndarray: A 2D array containing one vector per sentence.
+        """
+
+        if self._loop is not asyncio.get_running_loop() or self._task.done():
+            self._start()
+
+        job = EncodeJob(sentences, self._loop.create_future(), self.max_batch_size)
+        lane = self._priority if priority or len(sentences) <= SHORT_JOB_SENTENCES else self._bulk
+        lane.extend((job, start, job_slice) for start, job_slice in job.slices)
+        self.jobs += 1
+        self._wake.set()
+        return await job.future
+
+    def _next_lane(self):
+        # The lane whose next slice can start a batch now, or None. Slices of jobs that were cancelled are dropped
+        for lane in (self._priority, self._bulk):
+            while lane and lane[0][0].future.done():
+                lane.popleft()
+        if self._priority:
+            return self._priority
+        if self._bulk and self._bulk_running < self.max_concurrent_batches:
+            return self._bulk
+        return None
+
+    async def _wait(self, timeout=None) -> bool:
+        # Wait until a job is added or a batch finishes, and return False if the timeout passed first
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _collect(self):
+        # Wait for a slice that can run, then keep collecting slices of its lane until the window closes or the batch is full
+        lane = self._next_lane()
+        while lane is None:
+            await self._wait()
+            lane = self._next_lane()
+
+        batch = [lane.popleft()]
+        size = len(batch[0][2])
+        deadline = self._loop.time() + self.window
+
+        while size < self.max_batch_size:
+            while lane and lane[0][0].future.done():
+                lane.popleft()
+            if lane:
+                if size + len(lane[0][2]) > self.max_batch_size:
+                    break
+                batch.append(lane.popleft())
+                size += len(batch[-1][2])
+                continue
+
+            # A bulk batch is not held open while a priority slice waits behind it
+            if lane is self._bulk and self._priority:
+                break
+            remaining = deadline - self._loop.time()
+            if remaining <= 0 or not await self._wait(remaining):
+                break
+
+        return batch, lane is self._priority
+
+    async def _run(self) -> None:
+        # Start batches until the event loop stops, without waiting for the previous ones to finish
+        while True:
+            batch, priority = await self._collect()
+            if not priority:
+                self._bulk_running += 1
+            task = self._loop.create_task(self._run_batch(batch, priority))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch: list, priority: bool) -> None:
+        # Encode one batch and scatter its rows back to the jobs of its slices
+        started = time.perf_counter()
+        sentences = [sentence for _, _, job_slice in batch for sentence in job_slice]
+
+        try:
+            if self.executor is None:
+                vectors = np.asarray(self.encode_fn(sentences))
+            else:
+                run = self.executor.run_priority if priority else self.executor.run
+                vectors = np.asarray(await run(self.encode_fn, sentences))
+        except Exception as e:
+            for job, _, _ in batch:
+                job.fail(e)
+            return
+        finally:
+            if not priority:
+                self._bulk_running -= 1
+            self._wake.set()
+
+        offset = 0
+        for job, start, job_slice in batch:
+            job.deliver(start, vectors[offset:offset + len(job_slice)])
+            offset += len(job_slice)
+
+            wait = started - job.enqueued
+            self.total_queue_wait += wait
+            self.max_queue_wait = max(self.max_queue_wait, wait)
+
+        self.batches += 1
+        self.slices += len(batch)
+        self.sentences += len(sentences)
+        self.largest_batch = max(self.largest_batch, len(sentences))
+
+    def stats(self) -> dict:
+        """
+        This function returns the batch size and queue wait metrics.
+        """
+        lanes = (self._priority or (), self._bulk or ())
+        return {
+            "batches": self.batches,
+            "jobs": self.jobs,
+            "slices": self.slices,
+            "sentences": self.sentences,
+            "mean_batch_size": self.sentences / self.batches if self.batches else 0,
+            "largest_batch": self.largest_batch,
+            "mean_queue_wait_ms": 1000 * self.total_queue_wait / self.slices if self.slices else 0,
+            "max_queue_wait_ms": 1000 * self.max_queue_wait,
+            "queued_jobs": len({id(job) for lane in lanes for job, _, _ in lane}),
+            "queued_slices": sum(len(lane) for lane in lanes),
+            "running_batches": len(self._running),
+            "window_ms": 1000 * self.window,
+            "max_batch_size": self.max_batch_size,
+            "max_concurrent_batches": self.max_concurrent_batches,
+        }
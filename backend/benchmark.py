@@ -0,0 +1,409 @@
+"""
+Benchmark.py file for Semantic-functions. This file benchmarks the endpoints on synthetic documents, without network access.
+
+Run it from the backend folder after download_semantic_model.py, with the
+development requirements installed (they add httpx, the client of the benchmark):
+
+    pip install -r requirements-dev.txt
+    python benchmark.py --json before.json
+    python benchmark.py --json after.json --compare before.json
+
+Every endpoint is called with synthetic PDF, DOCX and TXT documents of several
+sizes, through the ASGI app in this process (inprocess) and through a real
+uvicorn server started on localhost (uvicorn). Each run reports the latency
+percentiles, the throughput, and the peak RSS of the process serving the
+requests. With --encoder stub, the model is replaced by a stub that keeps its
+tokenizer but skips the forward pass, so the rest of the cost of a request
+(JSON, tokenization, rate limiting, logging) is measured on its own. With
+--compression gzip or zstd, the JSON request bodies are compressed and compressed
+responses are accepted, and the bytes on the wire of each request and response
+are reported, to compare with a run without compression.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for arguments, timing, and output
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# Required for the stub encoder
+import threading
+import zlib
+
+# Required for the synthetic documents
+import io
+import fitz
+from docx import Document
+from chunking import make_synthetic_pages, normalize_text, sentence_spans
+
+# Required for sending requests and computing the results
+import httpx
+import zstandard
+import numpy as np
+from typing import Dict, List, Optional
+
+
+# ------------- [Settings] -------------
+
+# Number of pages of the synthetic documents of each size
+SIZES = {"small": 1, "medium": 10, "large": 50}
+
+# Endpoints that can be benchmarked
+ENDPOINTS = ("pdf-to-text", "docx-to-text", "txt-to-text", "text-split-and-embed", "text-embed", "semantic-search")
+
+# Ways of serving the app
+TARGETS = ("inprocess", "uvicorn")
+
+# Encodings of the request and response bodies (none sends and accepts them uncompressed)
+COMPRESSIONS = ("none", "gzip", "zstd")
+
+# Query of the semantic-search runs
+QUERY = "Why did revenue grow in the last quarter?"
+
+# API key and rate limits of the benchmarked app, unless already set in the environment
+os.environ.setdefault("SEMFUN_API_KEY", "benchmark-api-key-0123456789")
+os.environ.setdefault("SEMFUN_HOURLY_RATE_LIMIT", "100000000")
+os.environ.setdefault("SEMFUN_DAILY_RATE_LIMIT", "100000000")
+
+
+# ------------- [Classes] -------------
+
+class StubEncoder:
+    """
+    Stands in for the model: it has the tokenizer and the vector dimension of the
+    saved model, and tokenizes every batch like the model does, but returns vectors
+    derived from a hash of each sentence instead of running the model.
+    """
+
+    def __init__(self, model_path: str):
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        with open(os.path.join(model_path, "config.json")) as f:
+            self.dimension = json.load(f)["hidden_size"]
+        with open(os.path.join(model_path, "sentence_bert_config.json")) as f:
+            self.max_seq_length = json.load(f).get("max_seq_length") or self.tokenizer.model_max_length
+
+        # The tokenizer is used by several executor threads
+        self._lock = threading.Lock()
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, sentences: List[str], **kwargs) -> np.ndarray:
+        with self._lock:
+            self.tokenizer(list(sentences), padding=True, truncation=True, max_length=self.max_seq_length)
+        vectors = np.empty((len(sentences), self.dimension), dtype=np.float32)
+        for i, sentence in enumerate(sentences):
+            vectors[i] = np.random.default_rng(zlib.crc32(sentence.encode())).standard_normal(self.dimension, dtype=np.float32)
+        return vectors
+
+
+# ------------- [Inputs] -------------
+
+# Build a PDF with one synthetic page of text per page
+def make_pdf(pages: List[str]) -> bytes:
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_textbox(fitz.Rect(40, 40, 570, 800), text, fontsize=8)
+    contents = doc.tobytes()
+    doc.close()
+    return contents
+
+# Build a DOCX with one paragraph per line of the synthetic pages
+def make_docx(pages: List[str]) -> bytes:
+    document = Document()
+    for text in pages:
+        for line in text.split("\n"):
+            document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+# Build every input of one size
+def make_inputs(page_count: int) -> dict:
+    """
+    This function builds the synthetic documents of one size, from the same pages of
+    text: a PDF, a DOCX, a TXT, the text, and its sentences.
+    """
+
+    pages = make_synthetic_pages(page_count)
+    text = "\n".join(pages)
+    normalized = normalize_text(text)
+    return {
+        "pdf": make_pdf(pages),
+        "docx": make_docx(pages),
+        "txt": text.encode(),
+        "text": text,
+        "sentences": [normalized[start:end] for start, end in sentence_spans(normalized)],
+    }
+
+
+# ------------- [App] -------------
+
+# Import the app with the benchmark settings
+def load_app(encoder: str, caches: bool):
+    """
+    This function imports main, after replacing the model with the StubEncoder if
+    encoder is "stub", and switching the embedding and query caches off unless caches
+    is set (so repeated requests are not answered from the cache).
+
+    Returns:
+        object: The FastAPI app.
+    """
+
+    import settings
+    if not caches:
+        settings.USE_EMBEDDING_CACHE = False
+        settings.USE_QUERY_CACHE = False
+
+    if encoder == "stub":
+        import inference_backends
+        inference_backends.load_model = lambda model_path, backend: StubEncoder(model_path)
+
+    import main
+    return main.app
+
+# App factory for the uvicorn server started by the benchmark
+def create_app():
+    return load_app(os.getenv("BENCHMARK_ENCODER", "model"), os.getenv("BENCHMARK_CACHES") == "1")
+
+# Start a uvicorn server on localhost, and wait until it answers
+def start_server(port: int, encoder: str, caches: bool, timeout: float = 600) -> subprocess.Popen:
+    env = dict(os.environ, BENCHMARK_ENCODER=encoder, BENCHMARK_CACHES="1" if caches else "0")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)), env.get("PYTHONPATH")]))
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "benchmark:create_app", "--factory", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"], env=env)
+
+    start = time.time()
+    while time.time() - start < timeout:
+        if server.poll() is not None:
+            raise RuntimeError(f"The uvicorn server exited with code {server.returncode}.")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/openapi.json", timeout=5)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("The uvicorn server did not start in time.")
+
+
+# ------------- [Measurement] -------------
+
+# Reset the peak RSS of a process (Linux only), so the next reading covers one run
+def reset_peak_rss(pid: int) -> None:
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+# Read the peak RSS of a process in MB (Linux only)
+def read_peak_rss(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+# Compress the JSON body of a request
+def compress_json(request: dict, compression: str) -> dict:
+    """
+    This function replaces the json argument of a request by its body compressed with
+    gzip or zstd, with the matching Content-Encoding header.
+    """
+
+    if compression == "none" or "json" not in request:
+        return request
+    body = json.dumps(request.pop("json")).encode()
+    body = zlib.compress(body, 1, wbits=16 + zlib.MAX_WBITS) if compression == "gzip" else zstandard.ZstdCompressor(level=1).compress(body)
+    return dict(request, content=body, headers={"Content-Type": "application/json", "Content-Encoding": compression})
+
+# Build the request of one endpoint
+def make_request(endpoint: str, inputs: dict, vectors: Optional[list], compression: str = "none") -> dict:
+    """
+    This function returns the arguments of client.post for one endpoint and one input size.
+    """
+
+    files = {
+        "pdf-to-text": ("document.pdf", inputs["pdf"], "application/pdf"),
+        "docx-to-text": ("document.docx", inputs["docx"], "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+        "txt-to-text": ("document.txt", inputs["txt"], "text/plain"),
+    }
+    if endpoint in files:
+        return {"url": f"/api/v1/{endpoint}/", "files": {"file": files[endpoint]}}
+    if endpoint == "text-split-and-embed":
+        return compress_json({"url": "/api/v1/text-split-and-embed", "params": {"filter": "true"}, "json": {"text": inputs["text"]}}, compression)
+    if endpoint == "text-embed":
+        return compress_json({"url": "/api/v1/text-embed", "json": inputs["sentences"]}, compression)
+    return compress_json({"url": "/api/v1/semantic-search", "params": {"query": QUERY, "top_k": 10}, "json": {"sentences": inputs["sentences"], "vectors": vectors}}, compression)
+
+# Send the requests of one run, and measure them
+async def run_requests(client: httpx.AsyncClient, request: dict, requests: int, concurrency: int, warmup: int, pid: int) -> dict:
+    """
+    This function sends warmup unmeasured requests, then the same request requests
+    times from concurrency concurrent clients, and measures every request.
+
+    Returns:
+        dict: The latency percentiles in milliseconds, the throughput, the errors, the request and response sizes, and the peak RSS.
+    """
+
+    # Size of the request on the wire: the URL path and query, and the body
+    prepared = client.build_request("POST", **request)
+    request_bytes = len(prepared.url.raw_path) + len(prepared.read())
+
+    for _ in range(warmup):
+        await client.post(**request)
+
+    latencies, errors = [], []
+    response_bytes = None
+    remaining = iter(range(requests))
+
+    async def send():
+        nonlocal response_bytes
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.post(**request)
+            latencies.append((time.perf_counter() - start) * 1000)
+            # Size of the response body on the wire, before it is decompressed
+            response_bytes = response.num_bytes_downloaded
+            if response.status_code >= 400:
+                errors.append(f"{response.status_code}: {response.text[:200]}")
+
+    reset_peak_rss(pid)
+    start = time.perf_counter()
+    await asyncio.gather(*[send() for _ in range(concurrency)])
+    seconds = time.perf_counter() - start
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "request_bytes": request_bytes,
+        "response_bytes": response_bytes,
+        "seconds": seconds,
+        "throughput_rps": requests / seconds,
+        "latency_ms": {
+            "p50": float(np.percentile(latencies, 50)),
+            "p95": float(np.percentile(latencies, 95)),
+            "p99": float(np.percentile(latencies, 99)),
+            "mean": float(np.mean(latencies)),
+            "max": float(np.max(latencies)),
+        },
+        "peak_rss_mb": read_peak_rss(pid),
+    }
+
+# Run every endpoint and size against one target
+async def run_target(target: str, args, inputs: Dict[str, dict]) -> List[dict]:
+    server = None
+    if target == "inprocess":
+        transport = httpx.ASGITransport(app=load_app(args.encoder, args.caches))
+        client = httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None)
+        pid = os.getpid()
+    else:
+        server = start_server(args.port, args.encoder, args.caches)
+        client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=None)
+        pid = server.pid
+
+    client.headers["Authorization"] = f"Bearer {os.environ['SEMFUN_API_KEY']}"
+    client.headers["Accept-Encoding"] = "identity" if args.compression == "none" else args.compression
+    results = []
+    try:
+        for size in args.sizes:
+            # The vectors searched by semantic-search come from the same app
+            vectors = None
+            if "semantic-search" in args.endpoints:
+                response = await client.post("/api/v1/text-embed", json=inputs[size]["sentences"])
+                vectors = response.json()["vectors"]
+
+            for endpoint in args.endpoints:
+                request = make_request(endpoint, inputs[size], vectors, args.compression)
+                run = {"target": target, "encoder": args.encoder, "compression": args.compression, "endpoint": endpoint, "size": size, "pages": SIZES[size]}
+                run.update(await run_requests(client, request, args.requests, args.concurrency, args.warmup, pid))
+                results.append(run)
+                print_result(run)
+    finally:
+        await client.aclose()
+        if server is not None:
+            server.terminate()
+            server.wait()
+    return results
+
+# Print one result as a row of the results table
+def print_result(result: dict) -> None:
+    latency = result["latency_ms"]
+    rss = f"{result['peak_rss_mb']:.0f}" if result["peak_rss_mb"] is not None else "-"
+    print(f"{result['target']:<10} {result['endpoint']:<21} {result['size']:<7} {latency['p50']:>9.1f} {latency['p95']:>9.1f} {latency['p99']:>9.1f} "
+          f"{result['throughput_rps']:>8.2f} {rss:>8} {result['request_bytes'] / 1024:>8.1f} {result['response_bytes'] / 1024:>8.1f} {result['errors']:>6}")
+    if result["first_error"]:
+        print(f"    first error: {result['first_error']}")
+
+# Compare results with the results of a previous run
+def print_comparison(results: List[dict], previous: List[dict]) -> None:
+    key = lambda result: (result["target"], result["encoder"], result["endpoint"], result["size"])
+    before = {key(result): result for result in previous}
+
+    # Ratios of the bytes on the wire, after / before (runs of older versions did not record the response size)
+    ratio = lambda after, before: f"{after / before:>6.2f}x" if after is not None and before else f"{'-':>7}"
+
+    print(f"\n{'target':<10} {'endpoint':<21} {'size':<7} {'p50 before':>11} {'p50 after':>10} {'p50':>7} {'rps':>7} {'req B':>7} {'resp B':>7}")
+    for result in results:
+        old = before.get(key(result))
+        if old is None or "skipped" in old:
+            continue
+        p50, old_p50 = result["latency_ms"]["p50"], old["latency_ms"]["p50"]
+        print(f"{result['target']:<10} {result['endpoint']:<21} {result['size']:<7} {old_p50:>11.1f} {p50:>10.1f} "
+              f"{p50 / old_p50:>6.2f}x {result['throughput_rps'] / old['throughput_rps']:>6.2f}x "
+              f"{ratio(result['request_bytes'], old['request_bytes'])} {ratio(result['response_bytes'], old.get('response_bytes'))}")
+
+
+# ------------- [Main] -------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the endpoints on synthetic documents, in-process and over uvicorn.")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS), help="Ways of serving the app.")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS), help="Endpoints to benchmark.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"], help="Sizes of the synthetic documents.")
+    parser.add_argument("--encoder", choices=("model", "stub"), default="model", help="Run the saved model, or the stub encoder to measure everything else.")
+    parser.add_argument("--caches", action="store_true", help="Keep the embedding and query caches on (repeated requests then hit the cache).")
+    parser.add_argument("--compression", choices=COMPRESSIONS, default="none", help="Compress the JSON request bodies, and accept compressed responses, with this encoding.")
+    parser.add_argument("--requests", type=int, default=20, help="Measured requests per endpoint and size.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent clients.")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests per endpoint and size.")
+    parser.add_argument("--port", type=int, default=8790, help="Port of the uvicorn server.")
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare with.")
+    args = parser.parse_args()
+
+    inputs = {size: make_inputs(SIZES[size]) for size in args.sizes}
+
+    print(f"{'target':<10} {'endpoint':<21} {'size':<7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'peak MB':>8} {'req KB':>8} {'resp KB':>8} {'errors':>6}")
+    results = []
+
+    # The uvicorn server runs first, before this process imports the app and the model
+    for target in sorted(args.targets, key=lambda target: target != "uvicorn"):
+        results += asyncio.run(run_target(target, args, inputs))
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f)["results"])
+
+    if args.json:
+        config = {key: value for key, value in vars(args).items() if key not in ("json", "compare")}
+        environment = {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+        with open(args.json, "w") as f:
+            json.dump({"config": config, "environment": environment, "results": results}, f, indent=2)
@@ -0,0 +1,334 @@
+"""
+Chunking.py file for Semantic-functions. This file contains the chunkers that split text into the pieces that are embedded.
+
+Run it directly to compare the chunkers on synthetic pages with the saved model:
+
+    python chunking.py --model-path semantic_model
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for the tokenizer of the chunker, which is shared between threads
+import copy
+import threading
+from typing import List, Optional, Tuple
+
+# Required for mapping offsets of the normalized text back to the original text
+import re
+from bisect import bisect_left
+from functools import lru_cache
+
+
+# ------------- [Settings] -------------
+
+# Supported chunkers
+CHUNKERS = ("tokens", "merge", "sentence")
+
+# Number of tokens the model adds to every input ([CLS] and [SEP])
+SPECIAL_TOKENS = 2
+
+
+# ------------- [Classes] -------------
+
+class Chunk:
+    """
+    A piece of text to embed, with its provenance: the page it came from and its
+    character offsets (start included, end excluded) in the text of that page.
+    """
+
+    def __init__(self, text: str, start: int, end: int, page=None, tokens: Optional[int] = None):
+        self.text = text
+        self.start = start
+        self.end = end
+        self.page = page
+        self.tokens = tokens
+
+
+class SentenceChunker:
+    """
+    One chunk per sentence.
+    """
+
+    def chunk(self, text: str, spans: List[Tuple[int, int]], page=None) -> List[Chunk]:
+        return [Chunk(text[start:end], start, end, page) for start, end in spans]
+
+
+class MergeChunker:
+    """
+    A sentence shorter than min_chars characters is merged with the next sentence,
+    which was the only chunking rule before the token budget chunker.
+    """
+
+    def __init__(self, min_chars: int = 75):
+        self.min_chars = min_chars
+
+    def chunk(self, text: str, spans: List[Tuple[int, int]], page=None) -> List[Chunk]:
+        chunks = []
+        i = 0
+        while i < len(spans):
+            start, end = spans[i]
+            if end - start < self.min_chars and i + 1 < len(spans):
+                end = spans[i + 1][1]
+                i += 1
+            chunks.append(Chunk(text[start:end], start, end, page))
+            i += 1
+        return chunks
+
+
+class TokenBudgetChunker:
+    """
+    Packs consecutive sentences into chunks of at most max_tokens model tokens, so
+    the model runs on fewer, fuller inputs instead of many short ones padded to the
+    length of the longest input of the batch. A sentence longer than the model's
+    max_seq_length is split into several chunks at token boundaries, instead of
+    being silently truncated by the model. With overlap_sentences, the last
+    sentences of a chunk are repeated at the start of the next one.
+    """
+
+    def __init__(self, tokenizer, max_tokens: int, max_seq_length: int, overlap_sentences: int = 0):
+        # A private copy, since a tokenizer must not be used by two threads at once, and the model's own tokenizer is used by model.encode
+        self.tokenizer = copy.deepcopy(tokenizer)
+
+        # Only counts tokens, so sentences longer than the model input are expected (and split) rather than warned about
+        self.tokenizer.model_max_length = 10 ** 9
+        self.max_input_tokens = max_seq_length - SPECIAL_TOKENS
+        self.max_tokens = max(1, min(max_tokens, self.max_input_tokens))
+        self.overlap_sentences = overlap_sentences
+        self._lock = threading.Lock()
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        """
+        This function returns the number of model tokens of each text, without the special tokens.
+        """
+
+        if not texts:
+            return []
+        with self._lock:
+            return [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+    def _split_long(self, text: str, start: int, end: int) -> List[Tuple[int, int, int]]:
+        # Split a sentence longer than the model input into pieces of at most max_input_tokens tokens
+        with self._lock:
+            offsets = self.tokenizer(text[start:end], add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        pieces = []
+        for i in range(0, len(offsets), self.max_input_tokens):
+            window = offsets[i:i + self.max_input_tokens]
+            pieces.append((start + window[0][0], start + window[-1][1], len(window)))
+        return pieces
+
+    def chunk(self, text: str, spans: List[Tuple[int, int]], page=None) -> List[Chunk]:
+        # Every piece is a (start, end, tokens) span of at most max_input_tokens tokens
+        pieces = []
+        for (start, end), tokens in zip(spans, self.count_tokens([text[start:end] for start, end in spans])):
+            if tokens > self.max_input_tokens:
+                pieces.extend(self._split_long(text, start, end))
+            else:
+                pieces.append((start, end, tokens))
+
+        chunks = []
+        current = []
+
+        def close():
+            start, end = current[0][0], current[-1][1]
+            chunks.append(Chunk(text[start:end], start, end, page, sum(piece[2] for piece in current)))
+
+        for piece in pieces:
+            if current and sum(p[2] for p in current) + piece[2] > self.max_tokens:
+                close()
+                # Carry the overlap over, as far as it leaves room for the new piece
+                current = current[-self.overlap_sentences:] if self.overlap_sentences else []
+                while current and sum(p[2] for p in current) + piece[2] > self.max_tokens:
+                    current.pop(0)
+            current.append(piece)
+
+        if current:
+            close()
+
+        return chunks
+
+
+# ------------- [Functions] -------------
+
+# Replace line breaks with spaces, remembering where the text got shorter
+def normalize_text(text: str) -> Tuple[str, List[int]]:
+    """
+    This function replaces line breaks and literal "\\n" sequences with single
+    spaces, exactly like the text was always normalized before splitting (a "\\r"
+    is kept).
+
+    Returns:
+        tuple: The normalized text, and the offsets in it of the spaces that replaced
+        a two character "\\n" (see original_offset).
+    """
+
+    text = text.replace('\n', ' ')
+    shortened = [match.start() - i for i, match in enumerate(re.finditer(r'\\n', text))]
+    return text.replace('\\n', ' '), shortened
+
+# Map an offset of the normalized text back to the original text
+def original_offset(shortened: List[int], offset: int) -> int:
+    """
+    This function returns the offset in the original text of an offset in the text
+    returned by normalize_text, given the offsets it returned with it.
+    """
+
+    # Every replaced "\\n" before the offset moved it one character to the left
+    return offset + bisect_left(shortened, offset)
+
+# Load the sentence tokenizer that sent_tokenize uses
+@lru_cache(maxsize=1)
+def punkt_tokenizer():
+    # Imported here, since importing NLTK takes more than a second (main.py warms it up after the server has started)
+    try:
+        # NLTK 3.8.2 and later load the punkt_tab tables
+        from nltk.tokenize import _get_punkt_tokenizer
+        return _get_punkt_tokenizer("english")
+    except ImportError:
+        import nltk.data
+        return nltk.data.load("tokenizers/punkt/english.pickle")
+
+# Find the sentences of a text
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    This function splits a normalized text into the same sentences as sent_tokenize,
+    with the span_tokenize method of its Punkt tokenizer, so no sentence is lost
+    looking for it in the text.
+
+    Returns:
+        list: The (start, end) character offsets of each sentence in the text.
+    """
+
+    return list(punkt_tokenizer().span_tokenize(text))
+
+# Check whether a sentence carries meaning worth embedding
+def is_semantic_sentence(sentence: str) -> bool:
+    """
+    This function returns False for non-semantic sentences: sentences shorter than 5
+    characters, sentences that are primarily numbers, and sentences of less than 3 words.
+    """
+
+    if len(sentence) < 5:
+        return False
+    if sum(c.isdigit() for c in sentence) > (len(sentence) / 2):
+        return False
+    return len(sentence.split()) >= 3
+
+# Create the selected chunker
+def make_chunker(name: str, model=None, max_tokens: int = 64, overlap_sentences: int = 0):
+    """
+    This function creates one of the CHUNKERS. The "tokens" chunker counts tokens
+    with the tokenizer of the model, and never exceeds its max_seq_length.
+
+    Args:
+        name (str): One of CHUNKERS.
+        model (object): The loaded model, with a tokenizer and max_seq_length.
+        max_tokens (int): The token budget of one chunk, for the "tokens" chunker.
+        overlap_sentences (int): The number of sentences repeated in the next chunk, for the "tokens" chunker.
+
+    Returns:
+        object: A chunker with chunk(text, spans, page).
+    """
+
+    if name not in CHUNKERS:
+        raise ValueError(f"Unknown chunker: {name}. Use one of: {', '.join(CHUNKERS)}.")
+
+    if name == "sentence":
+        return SentenceChunker()
+    if name == "merge":
+        return MergeChunker()
+
+    max_seq_length = getattr(model, "max_seq_length", None) or model.tokenizer.model_max_length
+    return TokenBudgetChunker(model.tokenizer, max_tokens, max_seq_length, overlap_sentences)
+
+
+# ------------- [Benchmark] -------------
+
+# Build synthetic pages with a realistic mix of headings, numbers, short and long sentences
+def make_synthetic_pages(page_count: int, seed: int = 0) -> List[str]:
+    import random
+
+    rnd = random.Random(seed)
+    words = ("the model reads every page of the report and finds sentences that match the meaning of a query "
+             "while ignoring exact wording across documents revenue grew because costs fell in the last quarter").split()
+
+    def sentence(low, high):
+        return " ".join(rnd.choice(words) for _ in range(rnd.randint(low, high))).capitalize() + "."
+
+    pages = []
+    for page_num in range(page_count):
+        parts = [f"Section {page_num + 1}", sentence(3, 6)]
+        for _ in range(rnd.randint(15, 30)):
+            kind = rnd.random()
+            if kind < 0.5:
+                parts.append(sentence(4, 10))
+            elif kind < 0.92:
+                parts.append(sentence(12, 30))
+            elif kind < 0.99:
+                parts.append(f"{rnd.randint(1, 999)}.{rnd.randint(0, 99)} {rnd.randint(1000, 99999)} {rnd.randint(1, 99)}%.")
+            else:
+                parts.append(sentence(150, 300))
+        pages.append("\n".join(parts))
+    return pages
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    from inference_backends import load_model
+
+    parser = argparse.ArgumentParser(description="Compare the chunkers on synthetic pages.")
+    parser.add_argument("--model-path", default="semantic_model", help="Path of the saved model.")
+    parser.add_argument("--pages", type=int, default=20, help="Number of synthetic pages.")
+    parser.add_argument("--max-tokens", type=int, nargs="+", default=[64, 128], help="Token budgets to compare for the tokens chunker.")
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    model = load_model(args.model_path, "torch")
+    pages = [normalize_text(page)[0] for page in make_synthetic_pages(args.pages)]
+    counter = make_chunker("tokens", model, 10 ** 6)
+    max_input_tokens = counter.max_input_tokens
+
+    chunkers = {"sentence": make_chunker("sentence"), "merge": make_chunker("merge")}
+    for max_tokens in args.max_tokens:
+        chunkers[f"tokens-{max_tokens}"] = make_chunker("tokens", model, max_tokens)
+
+    results = {}
+    for name, chunker in chunkers.items():
+        chunks = []
+        for page_num, page in enumerate(pages):
+            spans = [span for span in sentence_spans(page) if is_semantic_sentence(page[span[0]:span[1]])]
+            chunks.extend(chunker.chunk(page, spans, page_num + 1))
+        texts = [chunk.text for chunk in chunks]
+        tokens = counter.count_tokens(texts)
+
+        model.encode(texts[:32])
+        start = time.perf_counter()
+        model.encode(texts)
+        seconds = time.perf_counter() - start
+
+        # Tokens the model actually reads: the rest of a longer input is truncated
+        encoded_tokens = sum(min(count, max_input_tokens) for count in tokens)
+        results[name] = {
+            "chunks": len(chunks),
+            "chunks_per_page": len(chunks) / len(pages),
+            "mean_tokens": encoded_tokens / len(chunks),
+            "truncated_chunks": sum(count > max_input_tokens for count in tokens),
+            "truncated_tokens": sum(tokens) - encoded_tokens,
+            "encode_seconds": seconds,
+            "tokens_per_second": encoded_tokens / seconds,
+        }
+
+    print(f"{'chunker':<12} {'chunks':>7} {'per page':>9} {'tokens':>7} {'truncated':>10} {'seconds':>8} {'tokens/s':>9}")
+    for name, result in results.items():
+        print(f"{name:<12} {result['chunks']:>7} {result['chunks_per_page']:>9.1f} {result['mean_tokens']:>7.1f} "
+              f"{result['truncated_chunks']:>4} ({result['truncated_tokens']:>4}) {result['encode_seconds']:>7.2f} {result['tokens_per_second']:>9.0f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
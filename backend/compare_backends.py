@@ -0,0 +1,158 @@
+"""
+Compare_backends.py file for Semantic-functions. This file compares the accuracy and throughput of the inference backends.
+
+Run it from the backend folder after download_semantic_model.py:
+
+    python compare_backends.py
+
+Every backend is compared against the fp32 "torch" backend on a fixed corpus:
+the cosine similarity of each sentence vector to its fp32 vector, and the overlap
+of the top-k search results for a fixed set of queries.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for arguments, timing, and output
+import argparse
+import json
+import time
+
+# Required for vector handling
+import numpy as np
+
+# Required for loading the backends
+from inference_backends import INFERENCE_BACKENDS, load_model
+
+
+# ------------- [Corpus] -------------
+
+# Fixed corpus, so that results are comparable between runs and machines
+CORPUS = [
+    "The quarterly report shows revenue grew by twelve percent compared to last year.",
+    "Operating costs rose mainly because of higher energy prices.",
+    "The board approved a dividend of forty cents per share.",
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "Chlorophyll absorbs mostly blue and red light and reflects green light.",
+    "Mitochondria produce most of the chemical energy needed by the cell.",
+    "The treaty was signed in 1648 and ended the Thirty Years' War.",
+    "Trade routes across the Mediterranean shaped the economy of the ancient world.",
+    "The printing press made books far cheaper and spread literacy across Europe.",
+    "Gradient descent updates the parameters in the direction that reduces the loss.",
+    "A transformer encoder uses self-attention to relate every token to every other token.",
+    "Overfitting happens when a model memorizes the training data instead of generalizing.",
+    "The patient was prescribed antibiotics for a bacterial infection of the lungs.",
+    "Regular exercise lowers blood pressure and improves heart health.",
+    "Vaccines train the immune system to recognize a specific pathogen.",
+    "The tenant must give thirty days written notice before ending the lease.",
+    "Either party may terminate the agreement if the other party breaches it.",
+    "The warranty does not cover damage caused by misuse or accidents.",
+    "Preheat the oven to two hundred degrees and grease the baking tray.",
+    "Whisk the eggs with sugar until the mixture is pale and fluffy.",
+    "The striker scored twice in the second half to win the match.",
+    "The marathon route passes through the old town and along the river.",
+    "Glaciers are retreating quickly because of rising global temperatures.",
+    "Coral reefs are damaged when ocean water becomes too warm or too acidic.",
+    "The train to the airport leaves every fifteen minutes from platform four.",
+    "Please reset your password using the link sent to your email address.",
+    "The server returned an error because the request body was too large.",
+    "Der Vertrag kann mit einer Frist von drei Monaten gekündigt werden.",
+    "El sistema inmunológico protege al cuerpo contra las infecciones.",
+    "La croissance économique a ralenti au cours du dernier trimestre.",
+    "Il museo è aperto tutti i giorni tranne il lunedì.",
+    "A short sentence.",
+]
+
+# Fixed queries for the top-k overlap
+QUERIES = [
+    "How did the company's income change?",
+    "How do plants make energy from sunlight?",
+    "When did the war end?",
+    "How are neural network weights trained?",
+    "What helps keep the heart healthy?",
+    "How can the contract be cancelled?",
+    "How do I bake a cake?",
+    "Effects of climate change on nature",
+    "I forgot my login",
+    "Wie kündige ich den Vertrag?",
+]
+
+
+# ------------- [Functions] -------------
+
+# Normalize the rows of a matrix to unit length
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+# Measure the throughput of a backend in sentences per second
+def measure_throughput(model, sentences: list, seconds: float) -> float:
+    """
+    This function encodes the sentences repeatedly for at least the given number
+    of seconds, after one warm-up pass, and returns the sentences per second.
+    """
+
+    model.encode(sentences)
+    encoded = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        model.encode(sentences)
+        encoded += len(sentences)
+    return encoded / (time.perf_counter() - start)
+
+# Compare a backend against the fp32 reference
+def compare(model, reference_corpus: np.ndarray, reference_queries: np.ndarray, k: int) -> dict:
+    """
+    This function returns the cosine agreement with the fp32 vectors, and the
+    average fraction of the fp32 top-k results that the backend also returns.
+    """
+
+    corpus = np.asarray(model.encode(CORPUS), dtype=np.float32)
+    queries = np.asarray(model.encode(QUERIES), dtype=np.float32)
+
+    cosines = np.sum(normalize(corpus) * normalize(reference_corpus), axis=1)
+
+    # Same scoring as /api/v1/semantic-search: dot product of query and sentence vectors
+    reference_top = np.argsort(-(reference_queries @ reference_corpus.T), axis=1)[:, :k]
+    top = np.argsort(-(queries @ corpus.T), axis=1)[:, :k]
+    overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(top, reference_top)])
+
+    return {"mean_cosine": float(np.mean(cosines)), "min_cosine": float(np.min(cosines)), f"top{k}_overlap": float(overlap)}
+
+
+# ------------- [Main] -------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the accuracy and throughput of the inference backends.")
+    parser.add_argument("--model-path", default="semantic_model", help="Path of the saved model.")
+    parser.add_argument("--k", type=int, default=5, help="Number of search results compared per query.")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Seconds to measure the throughput of each backend.")
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    reference = load_model(args.model_path, "torch")
+    reference_corpus = np.asarray(reference.encode(CORPUS), dtype=np.float32)
+    reference_queries = np.asarray(reference.encode(QUERIES), dtype=np.float32)
+
+    results = {}
+    for backend in INFERENCE_BACKENDS:
+        try:
+            model = reference if backend == "torch" else load_model(args.model_path, backend)
+        except Exception as e:
+            print(f"Skipping {backend}: {e}")
+            continue
+
+        results[backend] = compare(model, reference_corpus, reference_queries, args.k)
+        results[backend]["sentences_per_second"] = measure_throughput(model, CORPUS, args.seconds)
+
+    print(f"{'backend':<12} {'mean cos':>9} {'min cos':>9} {f'top-{args.k}':>7} {'sent/s':>9} {'speedup':>8}")
+    for backend, result in results.items():
+        speedup = result["sentences_per_second"] / results["torch"]["sentences_per_second"]
+        print(f"{backend:<12} {result['mean_cosine']:>9.4f} {result['min_cosine']:>9.4f} {result[f'top{args.k}_overlap']:>7.2f} {result['sentences_per_second']:>9.1f} {speedup:>7.2f}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
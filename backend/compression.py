@@ -0,0 +1,276 @@
+"""
+Compression.py file for Semantic-functions. This file contains the decompression of gzip and zstd request bodies, and the compression of large responses.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for compressing and decompressing bodies
+import zlib
+import zstandard
+
+# Required for rejecting bodies that cannot be decompressed, and for editing response headers
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from typing import Optional
+
+# Required for timing and counting the compression of each request
+from metrics import stage, count, request_decompressed_bytes, response_uncompressed_bytes
+
+
+# ------------- [Settings] -------------
+
+# Content encodings of request and response bodies, in order of preference for responses (zstd compresses several times faster than gzip)
+ENCODINGS = ("zstd", "gzip")
+
+# zlib window bits of the gzip format
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+# Largest piece of output decompressed at once, so a small body decompressing to a huge one is stopped early
+DECOMPRESS_CHUNK_BYTES = 256 * 1024
+
+# Responses at least this large are compressed on the CPU executor, instead of on the event loop
+OFFLOAD_MIN_BYTES = 256 * 1024
+
+
+# ------------- [Functions] -------------
+
+# Choose the encoding of a response from the Accept-Encoding header of its request
+def negotiate_encoding(accept_encoding: Optional[bytes]) -> Optional[str]:
+    """
+    This function returns the encoding of ENCODINGS with the highest quality in the
+    Accept-Encoding header (zstd first when they are equal), or None if the client
+    accepts neither.
+
+    Args:
+        accept_encoding (bytes): The value of the Accept-Encoding header, or None.
+
+    Returns:
+        str: zstd, gzip, or None.
+    """
+
+    if not accept_encoding:
+        return None
+
+    qualities = {}
+    for item in accept_encoding.decode("latin-1").split(","):
+        name, _, parameters = item.partition(";")
+        quality = 1.0
+        parameters = parameters.strip()
+        if parameters.startswith("q="):
+            try:
+                quality = float(parameters[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+# Compress a response body
+def compress_body(body: bytes, encoding: str, gzip_level: int, zstd_level: int) -> bytes:
+    """
+    This function compresses a response body with zstd or gzip.
+
+    Args:
+        body (bytes): The body.
+        encoding (str): zstd or gzip.
+        gzip_level (int): The zlib level of gzip, from 1 (fastest) to 9.
+        zstd_level (int): The level of zstd, from 1 (fastest) to 22.
+
+    Returns:
+        bytes: The compressed body.
+    """
+
+    with stage("compress"):
+        if encoding == "zstd":
+            return zstandard.ZstdCompressor(level=zstd_level).compress(body)
+        compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, GZIP_WBITS)
+        return compressor.compress(body) + compressor.flush()
+
+
+# ------------- [Classes] -------------
+
+class BodyDecoder:
+    """
+    Decompresses a gzip or zstd request body as it is received. The output is
+    produced in pieces of at most DECOMPRESS_CHUNK_BYTES, and decompression stops
+    with status code 413 as soon as it passes max_bytes, so a small body that
+    decompresses to gigabytes is never held in memory.
+    """
+
+    def __init__(self, encoding: str, max_bytes: Optional[int] = None):
+        self.encoding = encoding
+        self.max_bytes = max_bytes
+        self.received = 0
+        self.decoded = 0
+        self._output = []
+        if encoding == "zstd":
+            # The writer passes each decompressed piece to self.write
+            self._zstd = zstandard.ZstdDecompressor().stream_writer(self, write_size=DECOMPRESS_CHUNK_BYTES)
+        else:
+            self._zlib = zlib.decompressobj(GZIP_WBITS)
+
+    def write(self, data) -> int:
+        # Keep a decompressed piece, unless the body is now too large
+        self.decoded += len(data)
+        if self.max_bytes is not None and self.decoded > self.max_bytes:
+            raise HTTPException(status_code=413, detail=f"Request body too large. The maximum decompressed size is {self.max_bytes // (1024 * 1024)} MB.")
+        self._output.append(bytes(data))
+        return len(data)
+
+    def decode(self, data: bytes) -> bytes:
+        """
+        This function decompresses the next part of the body.
+        """
+
+        self.received += len(data)
+        try:
+            if self.encoding == "zstd":
+                self._zstd.write(data)
+            else:
+                while data:
+                    self.write(self._zlib.decompress(data, DECOMPRESS_CHUNK_BYTES))
+                    data = self._zlib.unconsumed_tail
+                    if self._zlib.eof and self._zlib.unused_data:
+                        # A gzip body can be several gzip members one after the other
+                        data = self._zlib.unused_data
+                        self._zlib = zlib.decompressobj(GZIP_WBITS)
+        except (zlib.error, zstandard.ZstdError):
+            raise HTTPException(status_code=400, detail=f"Request body is not valid {self.encoding} data.")
+
+        output, self._output = b"".join(self._output), []
+        return output
+
+    def finish(self) -> bytes:
+        """
+        This function returns the end of the body, once all of it has been received,
+        and checks that a gzip body was complete (a truncated zstd body is caught when
+        the route parses it).
+        """
+
+        if self.encoding == "gzip" and self.received:
+            self.write(self._zlib.flush())
+            if not self._zlib.eof:
+                raise HTTPException(status_code=400, detail="Request body is not valid gzip data (it ends early).")
+
+        output, self._output = b"".join(self._output), []
+        return output
+
+
+class RequestDecompressionMiddleware:
+    """
+    Decompresses the bodies of requests sent with Content-Encoding gzip or zstd, as
+    they are received, so the routes read them as if they were sent uncompressed.
+    Other encodings are rejected with status code 415, bodies that are not valid
+    compressed data with 400, and bodies decompressing to more than max_bytes with 413.
+    """
+
+    def __init__(self, app, max_bytes: Optional[int] = None):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        encoding = dict(scope["headers"]).get(b"content-encoding", b"identity").strip().lower().decode("latin-1")
+
+        async def counted_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                count(request_decompressed_bytes, len(message.get("body", b"")))
+            return message
+
+        if encoding == "identity":
+            return await self.app(scope, counted_receive, send)
+        if encoding not in ENCODINGS:
+            response = JSONResponse(status_code=415, content={"detail": f"Unsupported Content-Encoding. Use one of: {', '.join(ENCODINGS)}."})
+            return await response(scope, receive, send)
+
+        decoder = BodyDecoder(encoding, self.max_bytes)
+
+        async def decoding_receive():
+            # Skip the parts of the body that do not produce any output yet
+            while True:
+                message = await receive()
+                if message["type"] != "http.request":
+                    return message
+                more_body = message.get("more_body", False)
+                with stage("decompress"):
+                    body = decoder.decode(message.get("body", b""))
+                    if not more_body:
+                        body += decoder.finish()
+                if body or not more_body:
+                    count(request_decompressed_bytes, len(body))
+                    return {"type": "http.request", "body": body, "more_body": more_body}
+
+        # The body the routes read is no longer encoded, and its length is no longer known
+        headers = [(name, value) for name, value in scope["headers"] if name not in (b"content-encoding", b"content-length")]
+        await self.app(dict(scope, headers=headers), decoding_receive, send)
+
+
+class ResponseCompressionMiddleware:
+    """
+    Compresses the responses of at least minimum_size bytes with zstd or gzip, when
+    the client accepts it. Streamed responses (like the pages of /api/v1/ingest) are
+    sent uncompressed, so each part still reaches the client as soon as it is ready.
+    Large responses are compressed on the CPU executor, so the event loop keeps
+    serving other requests.
+    """
+
+    def __init__(self, app, minimum_size: int, gzip_level: int, zstd_level: int, executor=None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self.executor = executor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        encoding = negotiate_encoding(dict(scope["headers"]).get(b"accept-encoding"))
+        start_message = None
+
+        async def compressing_send(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Hold the headers until the first part of the body shows whether to compress it
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                return await send(message)
+
+            body = message.get("body", b"")
+            count(response_uncompressed_bytes, len(body))
+            if start_message is None:
+                return await send(message)
+            start, start_message = start_message, None
+
+            headers = MutableHeaders(raw=list(start.get("headers", [])))
+            if encoding is None or message.get("more_body", False) or len(body) < self.minimum_size or "content-encoding" in headers:
+                await send(start)
+                return await send(message)
+
+            if self.executor is not None and len(body) >= OFFLOAD_MIN_BYTES:
+                body = await self.executor.run(compress_body, body, encoding, self.gzip_level, self.zstd_level)
+            else:
+                body = compress_body(body, encoding, self.gzip_level, self.zstd_level)
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(dict(start, headers=headers.raw))
+            await send({"type": "http.response.body", "body": body, "more_body": False})
+
+        await self.app(scope, receive, compressing_send)
@@ -0,0 +1,200 @@
+"""
+Document_store.py file for Semantic-functions. This file contains the ephemeral in-memory store for document handles.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for handles, expiry, and thread safety
+import os
+import secrets
+import threading
+import time
+
+# Required for the insertion ordered store
+from collections import OrderedDict
+
+# Required for vector handling
+import numpy as np
+from typing import List, Optional
+
+# Required for the approximate search index of large documents
+from ann_index import IVFFlatIndex
+
+# Required for lexical search of kept documents
+from lexical_index import BM25Index
+
+
+# ------------- [Classes] -------------
+
+class StoredDocument:
+    """
+    The sentences of a document with their vectors as one contiguous float32
+    matrix, optionally the page number of each sentence, and for a large document
+    an approximate search index of its vectors. A BM25 index of the sentences is
+    added by the first lexical search.
+    """
+
+    def __init__(self, sentences: List[str], vectors: np.ndarray, pages: Optional[list], expires_at: float, index: Optional[IVFFlatIndex] = None):
+        self.sentences = sentences
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.pages = pages
+        self.expires_at = expires_at
+        self.index = index
+        self.nbytes = self.vectors.nbytes + sum(len(sentence) for sentence in sentences) + (index.nbytes if index is not None else 0)
+
+        # The BM25 index of the sentences, built on the first lexical search
+        self.lexical_index = None
+        self.lexical_lock = threading.Lock()
+
+
+class DocumentStore:
+    """
+    Short-lived, memory-only store of embedded documents. Every document expires
+    ttl_seconds after it was stored and is never written to disk. When the total
+    size would exceed max_bytes, the documents closest to expiry are dropped first.
+
+    A document of at least index_min_vectors vectors also gets an IVF-flat index
+    with index_nlist clusters, for approximate search. Its size counts towards max_bytes.
+
+    The store lives in the memory of one worker process. A handle starts with the
+    pid of the process that stored it ("<pid>.<token>"), so a handle sent to
+    another worker is told apart from one that has expired (see is_foreign).
+    """
+
+    def __init__(self, ttl_seconds: int, max_bytes: int, index_min_vectors: Optional[int] = None, index_nlist: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.index_min_vectors = index_min_vectors
+        self.index_nlist = index_nlist
+
+        # Documents are kept in order of expiry, since every document has the same TTL
+        self._documents = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _drop(self, handle: str) -> None:
+        # Remove a document and release its size from the total
+        document = self._documents.pop(handle)
+        self._bytes -= document.nbytes
+
+    def _purge_expired(self) -> None:
+        # Remove every expired document, which are always at the front of the store
+        now = time.time()
+        while self._documents:
+            handle, document = next(iter(self._documents.items()))
+            if document.expires_at > now:
+                break
+            self._drop(handle)
+
+    def new_index(self, dimension: int) -> Optional[IVFFlatIndex]:
+        """
+        This function returns an empty index for a document that is built incrementally,
+        to pass to put, or None if documents are never indexed.
+        """
+
+        if self.index_min_vectors is None:
+            return None
+        return IVFFlatIndex(dimension, self.index_min_vectors, self.index_nlist)
+
+    def put(self, sentences: List[str], vectors: np.ndarray, pages: Optional[list] = None, index: Optional[IVFFlatIndex] = None) -> Optional[str]:
+        """
+        This function stores a document and returns its handle. A document of at least
+        index_min_vectors vectors is indexed, which takes seconds for hundreds of
+        thousands of vectors, so call it outside the event loop.
+
+        Args:
+            sentences (list): The sentences of the document.
+            vectors (numpy.ndarray): The 2D matrix of sentence vectors.
+            pages (list): The page number of each sentence, if known.
+            index (IVFFlatIndex): The index of the vectors, if already built with new_index.
+
+        Returns:
+            str: The handle of the document, or None if the document alone exceeds the memory cap.
+        """
+
+        if index is None and self.index_min_vectors is not None and len(vectors) >= self.index_min_vectors:
+            index = self.new_index(vectors.shape[1])
+            index.add(vectors)
+
+        # An index too small to be trained would only search exactly, like the document itself
+        if index is not None and not index.is_trained:
+            index = None
+        if index is not None:
+            index.flush()
+
+        document = StoredDocument(sentences, vectors, pages, time.time() + self.ttl_seconds, index)
+        if document.nbytes > self.max_bytes:
+            return None
+
+        handle = f"{os.getpid()}.{secrets.token_urlsafe(16)}"
+        with self._lock:
+            self._purge_expired()
+            while self._bytes + document.nbytes > self.max_bytes:
+                self._drop(next(iter(self._documents)))
+            self._documents[handle] = document
+            self._bytes += document.nbytes
+        return handle
+
+    def get_lexical_index(self, handle: str, document: StoredDocument) -> BM25Index:
+        """
+        This function returns the BM25 index of the sentences of a kept document, and
+        builds it on first use. From then on its size counts towards max_bytes.
+
+        Args:
+            handle (str): The handle of the document.
+            document (StoredDocument): The document, as returned by get.
+
+        Returns:
+            BM25Index: The index of the sentences of the document.
+        """
+
+        # Only one request builds the index of a document, the others wait for it
+        with document.lexical_lock:
+            if document.lexical_index is None:
+                lexical_index = BM25Index(document.sentences)
+                with self._lock:
+                    document.lexical_index = lexical_index
+                    document.nbytes += lexical_index.nbytes
+                    if self._documents.get(handle) is document:
+                        self._bytes += lexical_index.nbytes
+        return document.lexical_index
+
+    def get(self, handle: str) -> Optional[StoredDocument]:
+        """
+        This function returns the document of a handle, or None if it does not exist or has expired.
+        """
+        with self._lock:
+            self._purge_expired()
+            return self._documents.get(handle)
+
+    def is_foreign(self, handle: str) -> bool:
+        """
+        This function returns True if the handle was stored by another worker process,
+        whose memory this process cannot read.
+        """
+        owner, separator, _ = handle.partition(".")
+        return bool(separator) and owner.isdigit() and int(owner) != os.getpid()
+
+    def delete(self, handle: str) -> bool:
+        """
+        This function deletes the document of a handle. Returns False if it did not exist.
+        """
+        with self._lock:
+            self._purge_expired()
+            if handle not in self._documents:
+                return False
+            self._drop(handle)
+            return True
+
+    def stats(self) -> dict:
+        """
+        This function returns the number and total size of the stored documents.
+        """
+        with self._lock:
+            self._purge_expired()
+            return {"documents": len(self._documents), "bytes": self._bytes, "max_bytes": self.max_bytes, "ttl_seconds": self.ttl_seconds}
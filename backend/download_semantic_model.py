@@ -16,6 +16,9 @@ import os
 from sentence_transformers import SentenceTransformer, util
 import pickle
 
+# Required for exporting the ONNX inference backend
+from inference_backends import export_onnx
+
 # ------------- [Download Model] -------------
 
 # Path to store model
@@ -25,3 +28,8 @@ model_path = 'semantic_model'
 if not os.path.exists(model_path):
     model = SentenceTransformer('SeyedAli/Multilingual-Text-Semantic-Search-Siamese-BERT-V1')
     model.save(model_path)
+
+# Check if the ONNX graph for the "onnx" inference backend is exported, if not, export it.
+# The "torch-int8" backend needs no artifact, since it quantizes the model when loading.
+if not os.path.exists(f'{model_path}_onnx'):
+    export_onnx(model_path)
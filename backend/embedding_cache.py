@@ -0,0 +1,193 @@
+"""
+Embedding_cache.py file for Semantic-functions. This file contains the content-hash embedding cache.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for hashing and normalizing sentences
+import hashlib
+import unicodedata
+
+# Required for the LRU ordering and thread safety
+from collections import OrderedDict
+import threading
+
+# Required for the optional on-disk tier
+import sqlite3
+
+# Required for storing vectors
+import numpy as np
+from typing import List, Optional
+
+
+# ------------- [Helper Functions] -------------
+
+# Normalize a sentence before hashing, so trivially different copies share an entry
+def normalize_sentence(sentence: str) -> str:
+    """
+    This function normalizes a sentence for use as a cache key. Unicode is
+    normalized to NFC and runs of whitespace are collapsed to a single space.
+
+    Args:
+        sentence (str): The sentence to normalize.
+
+    Returns:
+        str: The normalized sentence.
+    """
+
+    return ' '.join(unicodedata.normalize('NFC', sentence).split())
+
+
+# ------------- [Classes] -------------
+
+class EmbeddingCache:
+    """
+    In-process LRU cache of sentence embeddings, keyed by a hash of the model id
+    and the normalized sentence. The memory tier is bounded by max_bytes of vector
+    data. If disk_path is set, evicted and new entries are also kept in an SQLite
+    file so that the cache survives restarts.
+    """
+
+    def __init__(self, model_id: str, max_bytes: int, disk_path: Optional[str] = None):
+        self.model_id = model_id
+        self.max_bytes = max_bytes
+        self.disk_path = disk_path
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+        if self.disk_path:
+            with sqlite3.connect(self.disk_path) as conn:
+                c = conn.cursor()
+                c.execute('''CREATE TABLE IF NOT EXISTS embedding_cache
+                                (cache_key text PRIMARY KEY, dtype text, vector blob)''')
+                conn.commit()
+
+    def key(self, sentence: str) -> str:
+        """
+        This function returns the cache key of a sentence for this model.
+        """
+        return hashlib.sha256(f'{self.model_id}\0{normalize_sentence(sentence)}'.encode('utf-8')).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        # Insert or refresh an entry in the memory tier, evicting the least recently used entries if over budget
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        self._entries[key] = vector
+        self._bytes += vector.nbytes
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def _load_from_disk(self, keys: List[str]) -> dict:
+        # Look up a list of keys in the on-disk tier, in chunks to stay under the SQLite variable limit
+        found = {}
+        with sqlite3.connect(self.disk_path) as conn:
+            c = conn.cursor()
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i+500]
+                c.execute(f"SELECT cache_key, dtype, vector FROM embedding_cache WHERE cache_key IN ({','.join('?' * len(chunk))})", chunk)
+                for key, dtype, blob in c.fetchall():
+                    found[key] = np.frombuffer(blob, dtype=dtype)
+        return found
+
+    def _store_to_disk(self, items: dict) -> None:
+        # Write new entries to the on-disk tier
+        with sqlite3.connect(self.disk_path) as conn:
+            c = conn.cursor()
+            c.executemany("INSERT OR REPLACE INTO embedding_cache VALUES (?, ?, ?)",
+                          [(key, vector.dtype.str, vector.tobytes()) for key, vector in items.items()])
+            conn.commit()
+
+    def lookup(self, sentences: List[str]) -> tuple:
+        """
+        This function looks up the sentences in the memory tier and the on-disk tier.
+
+        Args:
+            sentences (list): The sentences to look up.
+
+        Returns:
+            tuple: The key of each sentence, a dictionary of the vectors found by key,
+            and a dictionary of the unique sentences that still need to be encoded by key.
+        """
+
+        keys = [self.key(sentence) for sentence in sentences]
+        vectors = {}
+        missing = []
+
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    vectors[key] = self._entries[key]
+                    self.hits += 1
+                else:
+                    missing.append(key)
+
+        # Check the on-disk tier before falling back to the encoder
+        if missing and self.disk_path:
+            found = self._load_from_disk(missing)
+            with self._lock:
+                for key, vector in found.items():
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                    self.hits += 1
+            vectors.update(found)
+
+        # Collect the remaining misses, once per unique sentence
+        to_encode = {}
+        for key, sentence in zip(keys, sentences):
+            if key not in vectors and key not in to_encode:
+                to_encode[key] = sentence
+
+        return keys, vectors, to_encode
+
+    def insert(self, keys: List[str], encoded: np.ndarray) -> dict:
+        """
+        This function adds newly encoded vectors to the cache.
+
+        Args:
+            keys (list): The keys of the encoded sentences.
+            encoded (numpy.ndarray): The 2D matrix of encoded vectors, one row per key.
+
+        Returns:
+            dict: The new vectors by key.
+        """
+
+        # Copy each row, so a cached vector does not keep the whole batch array alive
+        new_vectors = {key: vector.copy() for key, vector in zip(keys, np.asarray(encoded))}
+        with self._lock:
+            self.misses += len(new_vectors)
+            for key, vector in new_vectors.items():
+                self._remember(key, vector)
+        if self.disk_path:
+            self._store_to_disk(new_vectors)
+        return new_vectors
+
+    def stats(self) -> dict:
+        """
+        This function returns the hit and miss counters and the size of the cache.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -1,3 +1,3 @@
 #!/bin/sh
 
-gunicorn -w 4 -k uvicorn.workers.UvicornWorker main:app -b 0.0.0.0:8000
\ No newline at end of file
+gunicorn -c gunicorn.conf.py main:app
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""
+Executor.py file for Semantic-functions. This file contains the bounded executor for CPU-heavy work.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for running blocking work off the event loop
+import asyncio
+import contextvars
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+# Required for profiling the functions of profiled requests
+from profiling import current_profile
+
+
+# ------------- [Classes] -------------
+
+class CPUExecutor:
+    """
+    Runs CPU-heavy functions (model.encode, sentence splitting, PDF extraction) on a
+    fixed number of threads, so they never block the event loop. model.encode and
+    numpy release the GIL while they compute, so threads run them in parallel.
+    PyMuPDF is not thread-safe, so its calls are made one at a time (see FITZ_LOCK
+    in pdf_extraction.py), and large PDFs are extracted on processes instead.
+
+    Work has two lanes. run() is the bulk lane (ingestion, extraction, splitting),
+    and may only occupy max_workers - reserved_workers threads. run_priority() is
+    for short, latency-sensitive work (search queries and scoring): it is taken
+    before any queued bulk work, and the reserved threads only run it, so a search
+    never waits behind a whole queue of ingestion. Work beyond the free threads
+    waits in a queue, whose depth is tracked for monitoring.
+    """
+
+    def __init__(self, max_workers: int, reserved_workers: int = 0):
+        self.max_workers = max_workers
+        self.reserved_workers = min(reserved_workers, max_workers - 1)
+        self._condition = threading.Condition()
+        self._priority = deque()
+        self._bulk = deque()
+        self._bulk_running = 0
+        # Threads are started on first use, in the process that uses them, so a gunicorn master can import this module before forking
+        self._threads = []
+        self._pid = None
+
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+
+    def _start_threads(self) -> None:
+        # Called with the condition held. Threads do not survive a fork, so a forked worker starts its own
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._threads = [threading.Thread(target=self._work, name=f'semfun-cpu_{i}', daemon=True) for i in range(self.max_workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def _next_task(self):
+        # Called with the condition held. Priority work first, then bulk work if a non-reserved thread is free
+        if self._priority:
+            return self._priority.popleft(), False
+        if self._bulk and self._bulk_running < self.max_workers - self.reserved_workers:
+            self._bulk_running += 1
+            return self._bulk.popleft(), True
+        return None, False
+
+    def _work(self) -> None:
+        # Run tasks until the process exits, moving each from the queued to the running gauge
+        while True:
+            with self._condition:
+                task, bulk = self._next_task()
+                while task is None:
+                    self._condition.wait()
+                    task, bulk = self._next_task()
+                self.queued -= 1
+
+            future, fn, args, kwargs = task
+            # A task cancelled while it was queued is skipped
+            if future.set_running_or_notify_cancel():
+                with self._condition:
+                    self.running += 1
+                result, error = None, None
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as e:
+                    error = e
+                # The gauges are updated before the caller sees the result
+                with self._condition:
+                    self.running -= 1
+                    self.completed += 1
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+                # Do not hold the last result (a large array) while waiting for the next task
+                del result, error
+
+            if bulk:
+                with self._condition:
+                    self._bulk_running -= 1
+                    # The freed slot may let a waiting thread take the next bulk task
+                    self._condition.notify()
+
+    def submit(self, fn, *args, priority: bool = False, **kwargs) -> Future:
+        """
+        This function queues fn(*args, **kwargs) on the executor, in the priority
+        lane if priority is set, and returns its concurrent.futures.Future.
+        """
+        # Profile fn on its thread too, when the request running it is profiled
+        profile = current_profile.get()
+        if profile is not None:
+            fn, args = profile.run, (fn,) + args
+
+        # Run in a copy of the caller's context, so the metrics of fn are labelled with the request that called it
+        future = Future()
+        task = (future, contextvars.copy_context().run, (fn,) + args, kwargs)
+        with self._condition:
+            self._start_threads()
+            (self._priority if priority else self._bulk).append(task)
+            self.queued += 1
+            self._condition.notify()
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        This function runs fn(*args, **kwargs) in the bulk lane of the executor and waits for the result.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    async def run_priority(self, fn, *args, **kwargs):
+        """
+        This function runs fn(*args, **kwargs) in the priority lane of the executor and waits for the result.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, priority=True, **kwargs))
+
+    def stats(self) -> dict:
+        """
+        This function returns the concurrency limit and the queue depth.
+        """
+        with self._condition:
+            return {"max_workers": self.max_workers, "reserved_workers": self.reserved_workers, "running": self.running, "queued": self.queued, "priority_queued": len(self._priority), "completed": self.completed}
@@ -0,0 +1,65 @@
+"""
+Gunicorn.conf.py file for Semantic-functions. This file contains the gunicorn settings for the API.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for environment variables
+import os
+import sys
+
+# Required for freezing the preloaded objects before fork
+import gc
+
+
+# ------------- [Settings] -------------
+
+# Number of worker processes
+workers = int(os.getenv("SEMFUN_WORKERS", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = os.getenv("SEMFUN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+
+"""
+With preload_app, main.py is imported once in the master process, which then
+loads the model (see when_ready), and the workers are forked from it. The model
+weights are then shared copy-on-write between all workers instead of being
+loaded once per worker, and a deploy only pays for one model load (with
+INFERENCE_BACKEND "torch" only, see preload_model in main.py). Each worker
+still warms the model up after forking, and answers /readyz once it has. Set
+SEMFUN_PRELOAD=false to load the model in every worker instead, after its port
+is bound.
+"""
+preload_app = os.getenv("SEMFUN_PRELOAD", "true").lower() != "false"
+
+# Loading the model can take a while on a cold start
+timeout = 120
+
+
+# ------------- [Hooks] -------------
+
+def when_ready(server):
+    # main.py does not load the model when it is imported, so load it here, before the workers are forked.
+    # It is not run here, since thread pools must not be started before fork. Only the torch backend is
+    # loaded (onnx and torch-int8 start thread pools while loading), the others are loaded by each worker
+    if preload_app:
+        server.app.wsgi().state.preload_model(before_fork=True)
+
+def pre_fork(server, worker):
+    # Move every object loaded so far into the permanent generation, so that the
+    # garbage collector of a worker never writes to (and so never copies) their pages
+    gc.collect()
+    gc.freeze()
+
+def post_fork(server, worker):
+    # Tell the app how many workers share the port, since kept documents (keep=true) only work with one
+    os.environ["SEMFUN_WORKER_PROCESSES"] = str(server.cfg.workers)
+
+    # Split the CPU cores between the workers, instead of every worker starting one torch thread per core
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
@@ -0,0 +1,209 @@
+"""
+Inference_backends.py file for Semantic-functions. This file contains the selectable CPU inference backends for the semantic model.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for reading the exported model settings
+import os
+import json
+
+# Required for sharing one tokenizer between the threads calling encode
+import threading
+
+# Required for vector handling
+import numpy as np
+from typing import List
+
+
+# ------------- [Settings] -------------
+
+# Supported inference backends
+INFERENCE_BACKENDS = ("torch", "torch-int8", "onnx")
+
+# Name of the ONNX graph and its settings inside the exported model folder
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_CONFIG_FILE = "onnx_config.json"
+
+
+# ------------- [Classes] -------------
+
+class OnnxSentenceEncoder:
+    """
+    Sentence encoder running an exported ONNX graph with ONNX Runtime. The graph
+    contains the whole SentenceTransformer forward pass (transformer, pooling, and
+    normalization), so encode returns the same vectors as the torch model.
+    """
+
+    def __init__(self, onnx_path: str):
+        # Imported here, since onnxruntime is only needed by this backend
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(onnx_path, ONNX_CONFIG_FILE)) as f:
+            config = json.load(f)
+        self.max_seq_length = config["max_seq_length"]
+        self.dimension = config["dimension"]
+
+        self.tokenizer = AutoTokenizer.from_pretrained(onnx_path)
+        self.session = onnxruntime.InferenceSession(os.path.join(onnx_path, ONNX_MODEL_FILE), providers=["CPUExecutionProvider"])
+        self.input_names = [graph_input.name for graph_input in self.session.get_inputs()]
+        self._tokenizer_lock = threading.Lock()
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, sentences: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        This function embeds a list of sentences into a 2D float32 array.
+
+        Args:
+            sentences (list): The sentences to embed.
+            batch_size (int): The number of sentences per forward pass.
+
+        Returns:
+            numpy.ndarray: A 2D array containing one vector per sentence.
+        """
+
+        # Sort by length like SentenceTransformer does, so each batch needs little padding
+        order = sorted(range(len(sentences)), key=lambda i: -len(sentences[i]))
+        vectors = np.zeros((len(sentences), self.dimension), dtype=np.float32)
+
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            # A fast tokenizer must not be used by two threads at once (the session itself is thread-safe)
+            with self._tokenizer_lock:
+                features = self.tokenizer([sentences[i] for i in batch], padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np")
+            inputs = {name: features[name].astype(np.int64) for name in self.input_names}
+            vectors[batch] = self.session.run(None, inputs)[0]
+
+        return vectors
+
+
+# ------------- [Functions] -------------
+
+# Make the tokenization of a SentenceTransformer safe to call from several threads at once
+def serialize_tokenize(model):
+    """
+    This function wraps the tokenization of model.encode with a lock. encode runs
+    on several executor threads at once (the priority and bulk lanes, and
+    concurrent batches), and each call sets the truncation and padding of the
+    model's fast tokenizer, which raises "RuntimeError: Already borrowed" when two
+    threads use it at once. Only the tokenization is serialized, the forward
+    passes still run in parallel.
+
+    Args:
+        model (SentenceTransformer): The loaded model.
+
+    Returns:
+        SentenceTransformer: The same model.
+    """
+
+    # encode calls tokenize (sentence-transformers 2), or preprocess (later versions, which may call tokenize itself)
+    lock = threading.RLock()
+
+    def locked(method):
+        def locked_method(*args, **kwargs):
+            with lock:
+                return method(*args, **kwargs)
+        return locked_method
+
+    for name in ("tokenize", "preprocess"):
+        if hasattr(model, name):
+            setattr(model, name, locked(getattr(model, name)))
+    return model
+
+# Load the semantic model with the selected inference backend
+def load_model(model_path: str, backend: str):
+    """
+    This function loads the semantic model for inference with the selected backend.
+
+    - torch: the saved SentenceTransformer in fp32.
+    - torch-int8: the saved SentenceTransformer with its Linear layers dynamically quantized to int8.
+    - onnx: the ONNX graph exported by download_semantic_model.py to {model_path}_onnx.
+
+    Args:
+        model_path (str): The path of the saved SentenceTransformer model.
+        backend (str): One of INFERENCE_BACKENDS.
+
+    Returns:
+        object: A model with encode(sentences) and get_sentence_embedding_dimension().
+    """
+
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}. Use one of: {', '.join(INFERENCE_BACKENDS)}.")
+
+    if backend == "onnx":
+        return OnnxSentenceEncoder(f"{model_path}_onnx")
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_path, device="cpu")
+
+    # Inference only: switch off training behaviour and gradients, so nothing writes to the weights once workers share them
+    model.eval()
+    model.requires_grad_(False)
+
+    if backend == "torch-int8":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    # After quantizing, since quantize_dynamic returns a copy of the model
+    return serialize_tokenize(model)
+
+# Export the semantic model to an ONNX graph
+def export_onnx(model_path: str) -> str:
+    """
+    This function exports the saved SentenceTransformer to {model_path}_onnx, with
+    the tokenizer and the settings needed by OnnxSentenceEncoder.
+
+    Args:
+        model_path (str): The path of the saved SentenceTransformer model.
+
+    Returns:
+        str: The path of the exported model folder.
+    """
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_path, device="cpu")
+    model.eval()
+    onnx_path = f"{model_path}_onnx"
+    os.makedirs(onnx_path, exist_ok=True)
+
+    # Not every tokenizer returns token_type_ids, so the graph takes whichever inputs the tokenizer produces
+    example = model.tokenizer(["An example sentence.", "Another one."], padding=True, return_tensors="pt")
+    names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in example]
+    args = tuple(example[name] for name in names)
+
+    class SentenceEmbedding(torch.nn.Module):
+        # Wraps the full SentenceTransformer forward pass, so pooling and normalization are part of the graph
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(dict(zip(names, inputs)))["sentence_embedding"]
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in names}
+    dynamic_axes["sentence_embedding"] = {0: "batch"}
+    export_kwargs = dict(input_names=names, output_names=["sentence_embedding"], dynamic_axes=dynamic_axes, opset_version=14)
+
+    with torch.no_grad():
+        try:
+            torch.onnx.export(SentenceEmbedding(model), args, os.path.join(onnx_path, ONNX_MODEL_FILE), dynamo=False, **export_kwargs)
+        except TypeError:
+            # Older torch versions have no dynamo exporter, and no dynamo argument
+            torch.onnx.export(SentenceEmbedding(model), args, os.path.join(onnx_path, ONNX_MODEL_FILE), **export_kwargs)
+
+    model.tokenizer.save_pretrained(onnx_path)
+    with open(os.path.join(onnx_path, ONNX_CONFIG_FILE), "w") as f:
+        json.dump({"max_seq_length": model.max_seq_length, "dimension": model.get_sentence_embedding_dimension()}, f)
+
+    return onnx_path
@@ -0,0 +1,125 @@
+"""
+Json_codec.py file for Semantic-functions. This file contains the JSON serialization of responses, which writes numpy arrays directly.
+
+Run it directly to compare its time and peak memory with the standard library on a large embedding response:
+
+    python json_codec.py --sentences 20000
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for serializing JSON and numpy arrays
+import orjson
+import numpy as np
+
+# Required for JSON responses, and for timing their rendering
+from fastapi.responses import JSONResponse
+from metrics import stage
+
+
+# ------------- [Settings] -------------
+
+# numpy arrays and scalars are written directly, and dictionary keys that are not strings (like page numbers) are written as strings
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+# ------------- [Functions] -------------
+
+# Convert what orjson does not serialize natively
+def default(obj):
+    """
+    This function converts the numpy arrays that orjson does not write directly
+    (arrays that are not C contiguous, or of other dtypes, like float16) for orjson.
+    """
+
+    if isinstance(obj, np.ndarray):
+        if obj.dtype in (np.float32, np.float64, np.int32, np.int64):
+            return np.ascontiguousarray(obj)
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+# Serialize content to JSON
+def dumps(content) -> bytes:
+    """
+    This function serializes content to JSON with orjson. numpy arrays are written
+    from their buffer, without creating a Python float for every value, and float32
+    values are written with the shortest text that reads back as the same float32.
+
+    Args:
+        content: The content, made of dictionaries, lists, strings, numbers, and numpy arrays and scalars.
+
+    Returns:
+        bytes: The JSON text, in UTF-8.
+    """
+
+    return orjson.dumps(content, default=default, option=ORJSON_OPTIONS)
+
+
+# ------------- [Classes] -------------
+
+class NumpyJSONResponse(JSONResponse):
+    """
+    A JSONResponse serialized with dumps, so its content can hold numpy arrays. The
+    rendering is timed as the render stage of the current request.
+    """
+
+    def render(self, content) -> bytes:
+        with stage("render"):
+            return dumps(content)
+
+
+# ------------- [Benchmark] -------------
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+    import tracemalloc
+
+    from vector_codec import encode_vectors
+
+    parser = argparse.ArgumentParser(description="Compare the serialization of an embedding response with the standard library and with orjson.")
+    parser.add_argument("--sentences", type=int, default=20000, help="Number of vectors in the response.")
+    parser.add_argument("--dimension", type=int, default=768, help="Dimension of the vectors.")
+    parser.add_argument("--decimals", type=int, nargs="*", default=[4], help="Float precisions to measure, besides full precision.")
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    vectors = np.random.default_rng(0).standard_normal((args.sentences, args.dimension), dtype=np.float32)
+    sentences = [f"Sentence number {i} of the document." for i in range(args.sentences)]
+
+    def stdlib():
+        # What every endpoint did before: a Python float per value, then the json module
+        return json.dumps({"sentences": sentences, "vectors": vectors.tolist()}).encode()
+
+    methods = {"stdlib json + tolist": stdlib, "orjson": lambda: dumps({"sentences": sentences, "vectors": encode_vectors(vectors, "json")})}
+    for decimals in args.decimals:
+        methods[f"orjson, {decimals} decimals"] = lambda decimals=decimals: dumps({"sentences": sentences, "vectors": encode_vectors(vectors, "json", decimals)})
+
+    results = {}
+    print(f"{'method':<24} {'seconds':>8} {'peak MB':>8} {'output MB':>10}")
+    for name, method in methods.items():
+        # Timed without tracemalloc, which slows down every allocation
+        start = time.perf_counter()
+        output = method()
+        seconds = time.perf_counter() - start
+        del output
+
+        tracemalloc.start()
+        output = method()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results[name] = {"seconds": seconds, "peak_mb": peak / 1024 / 1024, "output_mb": len(output) / 1024 / 1024}
+        print(f"{name:<24} {seconds:>8.2f} {peak / 1024 / 1024:>8.1f} {len(output) / 1024 / 1024:>10.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,196 @@
+"""
+Lexical_index.py file for Semantic-functions. This file contains the BM25 inverted index used for lexical and hybrid search.
+
+Run it directly to compare the latency of lexical, rerank, and dense search on synthetic sentences:
+
+    python lexical_index.py --sentences 20000 100000 300000
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for tokenizing
+import re
+from array import array
+
+# Required for the postings and scores
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+# Required for selecting the best scores
+from utils import top_k_indices
+
+
+# ------------- [Settings] -------------
+
+# Search modes of /api/v1/semantic-search: vectors only, BM25 only, both fused, or the BM25 top results rescored with vectors
+SEARCH_MODES = ("dense", "lexical", "hybrid", "rerank")
+
+# BM25 term frequency saturation
+BM25_K1 = 1.5
+
+# BM25 document length normalization (0 ignores the length, 1 fully normalizes it)
+BM25_B = 0.75
+
+# Words, and identifiers that join words with . - _ / (like "ISO-9001" or "v2.1.3")
+TOKEN_PATTERN = re.compile(r"\w+(?:[.\-_/]\w+)*")
+
+
+# ------------- [Functions] -------------
+
+# Split a text into lowercase terms
+def tokenize(text: str) -> List[str]:
+    """
+    This function splits a text into lowercase terms. An identifier made of several
+    words (like "ISO-9001") is kept as one term, followed by each of its words, so a
+    query matches it both exactly and by its parts.
+    """
+
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(part for part in re.split(r"[.\-_/]", token) if part)
+    return terms
+
+
+# ------------- [Classes] -------------
+
+class BM25Index:
+    """
+    An inverted index of sentences, scored with BM25. For every term it keeps the
+    sentences containing it and the number of times it occurs in each, in numpy
+    arrays. A query only reads the postings of its own terms, so its cost grows with
+    how often those terms occur, not with the number of sentences.
+    """
+
+    def __init__(self, sentences: List[str], k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.count = len(sentences)
+
+        # Collect one (term, sentence, frequency) posting per distinct term of each sentence
+        self.vocabulary: Dict[str, int] = {}
+        term_ids, sentence_ids, frequencies = array("q"), array("q"), array("f")
+        lengths = np.zeros(self.count, dtype=np.float32)
+        for sentence_id, sentence in enumerate(sentences):
+            terms = tokenize(sentence)
+            lengths[sentence_id] = len(terms)
+            counts = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, frequency in counts.items():
+                term_ids.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                sentence_ids.append(sentence_id)
+                frequencies.append(frequency)
+
+        # Sort the postings by term, so the postings of term t are rows offsets[t] to offsets[t + 1]
+        term_ids = np.frombuffer(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind='stable')
+        self.sentence_ids = np.frombuffer(sentence_ids, dtype=np.int64)[order]
+        self.frequencies = np.frombuffer(frequencies, dtype=np.float32)[order]
+        document_frequencies = np.bincount(term_ids, minlength=len(self.vocabulary))
+        self.offsets = np.concatenate([[0], np.cumsum(document_frequencies)])
+
+        self.idf = np.log(1 + (self.count - document_frequencies + 0.5) / (document_frequencies + 0.5)).astype(np.float32)
+        average_length = lengths.mean() if self.count else 0
+        self.length_norms = (self.k1 * (1 - self.b + self.b * lengths / max(average_length, 1e-12))).astype(np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.sentence_ids, self.frequencies, self.offsets, self.idf, self.length_norms)
+        return sum(values.nbytes for values in arrays) + sum(len(term) + 64 for term in self.vocabulary)
+
+    def search(self, query: str, top_k: Optional[int] = None, min_score: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        This function scores the sentences containing at least one term of the query
+        with BM25, and selects the top_k that score at least min_score.
+
+        Args:
+            query (str): The query.
+            top_k (int): The maximum number of results. Returns all matching sentences if None.
+            min_score (float): The minimum score of a result. Applies no threshold if None.
+
+        Returns:
+            tuple: The sentence indices sorted by decreasing score, and their scores.
+        """
+
+        term_ids = sorted({self.vocabulary[term] for term in tokenize(query) if term in self.vocabulary})
+        if not term_ids:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        # Score every posting of the query terms, then sum the postings of each sentence
+        sentence_ids = np.concatenate([self.sentence_ids[self.offsets[t]:self.offsets[t + 1]] for t in term_ids])
+        frequencies = np.concatenate([self.frequencies[self.offsets[t]:self.offsets[t + 1]] for t in term_ids])
+        idf = np.repeat(self.idf[term_ids], np.diff(self.offsets)[term_ids])
+        contributions = idf * frequencies * (self.k1 + 1) / (frequencies + self.length_norms[sentence_ids])
+
+        candidates, inverse = np.unique(sentence_ids, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions, minlength=len(candidates)).astype(np.float32)
+        selected = top_k_indices(scores, top_k, min_score)
+        return candidates[selected], scores[selected]
+
+
+# ------------- [Benchmark] -------------
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import random
+    import time
+
+    parser = argparse.ArgumentParser(description="Compare the latency of lexical, rerank, and dense search on synthetic sentences.")
+    parser.add_argument("--sentences", type=int, nargs="+", default=[20000, 100000, 300000], help="Numbers of sentences to index.")
+    parser.add_argument("--dimension", type=int, default=768, help="Dimension of the synthetic vectors.")
+    parser.add_argument("--top-n", type=int, default=200, help="Number of lexical results rescored with vectors in rerank mode.")
+    parser.add_argument("--queries", type=int, default=100, help="Number of queries.")
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    rng = np.random.default_rng(0)
+
+    # A Zipf-like vocabulary, with a rare identifier in some sentences
+    words = [f"word{i}" for i in range(20000)]
+    weights = [1 / (i + 1) for i in range(len(words))]
+
+    results = {}
+    print(f"{'sentences':>9} {'build s':>8} {'mode':>8} {'ms/query':>9}")
+    for count in args.sentences:
+        sentences = [" ".join(rnd.choices(words, weights, k=rnd.randint(8, 30))) + (f" ID-{rnd.randint(0, 99999)}" if rnd.random() < 0.1 else "") for _ in range(count)]
+        vectors = rng.standard_normal((count, args.dimension), dtype=np.float32)
+        queries = [" ".join(rnd.choices(words[:2000], k=3)) + f" ID-{rnd.randint(0, 99999)}" for _ in range(args.queries)]
+        query_vectors = rng.standard_normal((args.queries, args.dimension), dtype=np.float32)
+
+        start = time.perf_counter()
+        index = BM25Index(sentences)
+        build_seconds = time.perf_counter() - start
+
+        timings = {}
+        start = time.perf_counter()
+        for query_vector in query_vectors:
+            top_k_indices(vectors @ query_vector, 10)
+        timings["dense"] = (time.perf_counter() - start) * 1000 / args.queries
+
+        start = time.perf_counter()
+        for query in queries:
+            index.search(query, 10)
+        timings["lexical"] = (time.perf_counter() - start) * 1000 / args.queries
+
+        start = time.perf_counter()
+        for query, query_vector in zip(queries, query_vectors):
+            candidates, _ = index.search(query, args.top_n)
+            candidates[top_k_indices(vectors[candidates] @ query_vector, 10)]
+        timings["rerank"] = (time.perf_counter() - start) * 1000 / args.queries
+
+        for mode, ms in timings.items():
+            print(f"{count:>9} {build_seconds:>8.2f} {mode:>8} {ms:>9.2f}")
+        results[count] = {"build_seconds": build_seconds, "index_mb": index.nbytes / 1024 / 1024, "ms": timings}
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
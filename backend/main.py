@@ -10,44 +10,69 @@ License: MIT
 # ------------- [Import Libraries] -------------
 
 # Required libraries from FastAPI for API functionality
-from fastapi import FastAPI, HTTPException, Depends, Security, File, UploadFile
+from fastapi import FastAPI, HTTPException, Depends, Security, File, UploadFile, Request
 from fastapi.security.api_key import APIKeyHeader, APIKey
 from fastapi.security import HTTPBearer
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse, FileResponse
+from fastapi.concurrency import run_in_threadpool
 
 # Required libraries from Pydantic for API functionality
 from pydantic import BaseModel
-from typing import List
+from typing import List, Dict, Optional, Union
 
 # Required for environment variables
 import os
 
+# Required for loading the model in the background
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+
+# Required for serializing responses, with their numpy arrays
+from json_codec import NumpyJSONResponse, dumps
+
 # Required for inspecting code
 import inspect
 
-# Required for NLTK functionality to split sentences
-import nltk
-from nltk.tokenize import sent_tokenize
+# Required for splitting sentences (NLTK is imported on first use)
+from chunking import Chunk, make_chunker, normalize_text, original_offset, sentence_spans, is_semantic_sentence
 
 # Required for embedding functionality
-from sentence_transformers import SentenceTransformer, util
+from inference_backends import load_model
 import pickle
-
-# Required for PDF text extraction
-import fitz
+import numpy as np
+from embedding_cache import EmbeddingCache
+from document_store import DocumentStore
+from lexical_index import SEARCH_MODES, BM25Index
+from batching import EncodeBatcher
+from executor import CPUExecutor
+from vector_codec import VECTOR_FORMATS, NPY_MEDIA_TYPE, EncodedVectors, encode_vectors, decode_vectors, vectors_to_npy, round_floats
+
+# Required for PDF text extraction (PyMuPDF is imported on first use)
 import io
+from pdf_extraction import FITZ_LOCK, ParallelPDFExtractor
+from uploads import UploadSizeLimitMiddleware, spool_upload
+
+# Required for compressed request and response bodies
+from compression import RequestDecompressionMiddleware, ResponseCompressionMiddleware
+from pipeline import BatchStage, run_pipeline
 
 # Required for rate limiting with database and timestamps
 import sqlite3
 import time
+import atexit
+from rate_limiter import SlidingWindowRateLimiter
+
+# Required for per-stage latency and throughput metrics
+import metrics
+from metrics import MetricsMiddleware, CallbackMetric, stage, count
+
+# Required for profiling single requests
+from profiling import ProfileRing, ProfilingMiddleware, profile_report
 
 # Required for printing styled log messages 
 from utils import *
 
-# Required for docx text extraction
-from docx import Document
-import io
-
 # For usage data
 from datetime import datetime
 from collections import defaultdict
@@ -74,11 +99,50 @@ app = FastAPI(
 
 # Path to store model
 model_path = 'semantic_model'
-model = SentenceTransformer(model_path)
+
+# The model, the chunker splitting filtered text into the pieces that are embedded, and the encode batcher.
+# They are loaded by load_model_once after the server has started, so the port is bound without waiting for the model
+model = None
+text_chunker = None
+encode_batcher = None
+model_lock = threading.Lock()
+
+# Loading and warm-up of the model, started by start_model_loading
+model_loading = None
+model_loading_lock = threading.Lock()
+
+# Text split, filtered, and embedded once when warming up the model
+WARM_UP_TEXT = "This sentence warms up the model before the first request. It is split, filtered, and embedded once."
+
+# Cache of sentence embeddings, keyed by model and sentence content
+embedding_cache = EmbeddingCache(f"{model_path}:{INFERENCE_BACKEND}", EMBEDDING_CACHE_MAX_MB * 1024 * 1024, EMBEDDING_CACHE_DISK_PATH) if USE_EMBEDDING_CACHE else None
+
+# Cache of search query embeddings, kept separate so queries do not evict document sentences
+query_cache = EmbeddingCache(f"{model_path}:{INFERENCE_BACKEND}", QUERY_CACHE_MAX_MB * 1024 * 1024) if USE_QUERY_CACHE else None
+
+# Bounded thread pool for CPU-heavy work, so it does not block the event loop
+cpu_executor = CPUExecutor(CPU_EXECUTOR_WORKERS, CPU_EXECUTOR_RESERVED_WORKERS)
+
+# Short-lived, memory-only store of documents kept for search by handle
+document_store = DocumentStore(DOCUMENT_HANDLE_TTL_SECONDS, DOCUMENT_STORE_MAX_MB * 1024 * 1024, ANN_MIN_VECTORS, ANN_NLIST)
+
+# Process pool extracting the pages of large PDFs in parallel
+pdf_extractor = ParallelPDFExtractor(PDF_EXTRACTION_PROCESSES) if PDF_PARALLEL_MIN_PAGES is not None and PDF_EXTRACTION_PROCESSES > 1 else None
 
 # Path to database, in db folder
 db_path = 'db/semfun.db'
 
+# Path to the per-minute API call counters shared by all workers, in db folder
+rate_limit_bucket_path = 'db/ratelimit.buckets'
+
+# Reject uploads larger than MAX_UPLOAD_MB, before they are read (added before CORS, so the 413 response still carries CORS headers)
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=MAX_UPLOAD_MB * 1024 * 1024 if MAX_UPLOAD_MB is not None else None)
+
+# Compress large responses for clients that accept it, and decompress gzip and zstd request bodies (added before CORS too, so the upload limit applies to the decompressed upload)
+if USE_RESPONSE_COMPRESSION:
+    app.add_middleware(ResponseCompressionMiddleware, minimum_size=COMPRESSION_MIN_BYTES, gzip_level=GZIP_LEVEL, zstd_level=ZSTD_LEVEL, executor=cpu_executor)
+app.add_middleware(RequestDecompressionMiddleware, max_bytes=MAX_DECOMPRESSED_MB * 1024 * 1024 if MAX_DECOMPRESSED_MB is not None else None)
+
 # CORS allow
 from fastapi.middleware.cors import CORSMiddleware
 app.add_middleware(
@@ -89,6 +153,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Profile the requests that ask for it, and a sample of the others (only added when enabled, so other requests pay nothing)
+profile_ring = ProfileRing(PROFILE_DIR, PROFILE_MAX_FILES) if USE_PROFILING else None
+if USE_PROFILING:
+    app.add_middleware(ProfilingMiddleware, ring=profile_ring, api_key=os.getenv("SEMFUN_API_KEY"), sample_rate=PROFILE_SAMPLE_RATE)
+
+# Time and count every request by route (added last, so it also measures the responses of the other middleware)
+metrics.registry.enabled = USE_METRICS
+app.add_middleware(MetricsMiddleware, routes=app.router.routes)
+
+# Report the stats of the caches, queues, and document store with the metrics, read when they are scraped
+metrics.registry.register(CallbackMetric("semfun_executor_tasks", "Tasks of the CPU executor, by state.", "gauge", ("state",),
+    lambda: {(state,): value for state, value in cpu_executor.stats().items() if state in ("running", "queued")}))
+metrics.registry.register(CallbackMetric("semfun_executor_completed_total", "Tasks completed by the CPU executor.", "counter", (),
+    lambda: {(): cpu_executor.stats()["completed"]}))
+metrics.registry.register(CallbackMetric("semfun_encode_queue_jobs", "Encode calls waiting for the next batch.", "gauge", (),
+    lambda: {(): encode_batcher.stats()["queued_jobs"]} if encode_batcher is not None else {}))
+metrics.registry.register(CallbackMetric("semfun_encode_batches_total", "Batches run by the encode batcher.", "counter", (),
+    lambda: {(): encode_batcher.stats()["batches"]} if encode_batcher is not None else {}))
+metrics.registry.register(CallbackMetric("semfun_cache_requests_total", "Lookups of the embedding and query caches, by result.", "counter", ("cache", "result"),
+    lambda: {(name, result): cache.stats()[key] for name, cache in (("embedding", embedding_cache), ("query", query_cache)) if cache is not None
+             for result, key in (("hit", "hits"), ("disk_hit", "disk_hits"), ("miss", "misses"))}))
+metrics.registry.register(CallbackMetric("semfun_cache_bytes", "Memory used by the embedding and query caches.", "gauge", ("cache",),
+    lambda: {(name,): cache.stats()["bytes"] for name, cache in (("embedding", embedding_cache), ("query", query_cache)) if cache is not None}))
+metrics.registry.register(CallbackMetric("semfun_document_store_documents", "Documents kept for search by handle.", "gauge", (),
+    lambda: {(): document_store.stats()["documents"]}))
+metrics.registry.register(CallbackMetric("semfun_document_store_bytes", "Memory used by the kept documents.", "gauge", (),
+    lambda: {(): document_store.stats()["bytes"]}))
+
 # ------------- [Initialization: Env] -------------
 
 # Set OpenAI API key securely from environment variable
@@ -150,45 +242,200 @@ if USE_HOURLY_RATE_LIMIT or USE_DAILY_RATE_LIMIT:
     # Create a table for API usage if it does not exist
     conn = sqlite3.connect(db_path)
     c = conn.cursor()
+    # WAL mode lets the batched writes run without blocking readers
+    c.execute("PRAGMA journal_mode=WAL")
     c.execute('''CREATE TABLE IF NOT EXISTS api_usage
                     (api_timestamp integer)''')
+    c.execute("CREATE INDEX IF NOT EXISTS api_usage_timestamp ON api_usage (api_timestamp)")
+    # Hourly totals of API usage, updated with every batch of API calls
+    c.execute('''CREATE TABLE IF NOT EXISTS api_usage_hourly
+                    (hour integer PRIMARY KEY, count integer)''')
     conn.commit()
+
+    # Fill the hourly totals from existing API calls once, in a transaction so only one worker does it
+    conn.isolation_level = None
+    c.execute("BEGIN IMMEDIATE")
+    if c.execute("SELECT COUNT(*) FROM api_usage_hourly").fetchone()[0] == 0:
+        c.execute("INSERT INTO api_usage_hourly SELECT api_timestamp / 3600, COUNT(*) FROM api_usage GROUP BY 1")
+    c.execute("COMMIT")
     conn.close()
 
+    # Count API calls in memory, and write them to the database in batches
+    rate_limiter = SlidingWindowRateLimiter(rate_limit_bucket_path, db_path, RATE_LIMIT_FLUSH_SECONDS, RATE_LIMIT_FLUSH_SIZE, API_USAGE_RETENTION_DAYS)
+    atexit.register(rate_limiter.flush)
+
 
 # ------------- [Helper Functions] -------------
 
+# Load the model, its chunker, and the encode batcher, once per process
+def load_model_once() -> None:
+    """
+    This function loads the model, the text chunker, and the encode batcher, unless
+    they are already loaded. It is safe to call from several threads: the others
+    wait until the first one is done.
+    """
+    global model, text_chunker, encode_batcher
+
+    with model_lock:
+        if model is not None:
+            return
+        loaded = load_model(model_path, INFERENCE_BACKEND)
+        text_chunker = make_chunker(CHUNKER, loaded, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_SENTENCES)
+        # Scheduler combining the encode calls of concurrent requests into batches, with as many bulk batches at once as the executor runs bulk work
+        encode_batcher = EncodeBatcher(loaded.encode, ENCODE_BATCH_WINDOW_MS, ENCODE_MAX_BATCH_SIZE, cpu_executor, cpu_executor.max_workers - cpu_executor.reserved_workers) if USE_ENCODE_BATCHING else None
+        model = loaded
+
+# Load the model and the libraries imported on first use, without running anything
+def preload_model(before_fork: bool = False) -> None:
+    """
+    This function loads the model, imports NLTK (and loads punkt), PyMuPDF, and
+    python-docx. Gunicorn runs it in its master process with preload_app and
+    before_fork set, so the workers share all of them (see gunicorn.conf.py).
+
+    Only the torch backend is loaded before forking. It is not run, so its thread
+    pools are only started by the workers. ONNX Runtime creates the thread pools
+    of a session as soon as it is loaded, and a forked worker could deadlock on
+    their locks, and torch-int8 runs torch operations while quantizing. With
+    those backends, each worker loads its own model when it warms up.
+
+    Args:
+        before_fork (bool): Whether it runs in the gunicorn master, before the workers are forked.
+    """
+
+    if not before_fork or INFERENCE_BACKEND == "torch":
+        load_model_once()
+    sentence_spans(WARM_UP_TEXT)
+    import fitz
+    import docx
+
+app.state.preload_model = preload_model
+
+# Load the model and run it once, so the first request does not pay for the lazy imports and first-call setup
+def warm_up_model() -> None:
+    """
+    This function preloads the model if needed, then splits, filters, chunks, and
+    embeds a short text, which runs the tokenizer and the first forward pass of the model.
+    """
+
+    # Label the stages of the warm-up in the metrics
+    metrics.current_endpoint.set("startup")
+    preload_model()
+    chunks = chunk_text(WARM_UP_TEXT, True)
+    model.encode([chunk.text for chunk in chunks])
+
+# Start loading and warming up the model in the background
+def start_model_loading():
+    """
+    This function starts warm_up_model on a background thread, unless it has already
+    been started, and returns its future. It is called by the startup event, and by
+    the first request that needs the model if the startup event did not run.
+    """
+    global model_loading
+
+    with model_loading_lock:
+        if model_loading is None:
+            loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix='semfun-startup')
+            model_loading = loader.submit(warm_up_model)
+            loader.shutdown(wait=False)
+        return model_loading
+
+# Wait until the model is loaded and warmed up
+async def wait_for_model() -> None:
+    """
+    This function waits, without blocking the event loop, until the model is loaded
+    and warmed up. It raises the error of the loading if it failed.
+    """
+
+    loading = start_model_loading()
+    if not loading.done():
+        # Shielded, so a cancelled request does not cancel the loading shared by all requests
+        await asyncio.shield(asyncio.wrap_future(loading))
+    loading.result()
+
 # Make function for adding API usage
 def log_api_usage() -> None:
     """
-    This function logs an instance of API usage to the SQLite database.
+    This function logs an instance of API usage to the rate limiter, which
+    writes it to the SQLite database in batches.
     It only logs the instance if the rate limit is enabled.
     """
     if USE_HOURLY_RATE_LIMIT or USE_DAILY_RATE_LIMIT:
-        with sqlite3.connect(db_path) as conn:
-            c = conn.cursor()
-            c.execute("INSERT INTO api_usage VALUES (?)", (int(time.time()),))
-            conn.commit()
+        with stage("log_usage"):
+            rate_limiter.record()
 
 # Make function for getting API usage (hourly)
 def get_api_usage_from_last_hour() -> int:
     """
     This function returns the number of API calls in the last hour.
     """
-    with sqlite3.connect(db_path) as conn:
-        c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM api_usage WHERE api_timestamp > ?", (int(time.time())-3600,))
-        return c.fetchone()[0]
+    return rate_limiter.count(3600)
 
 # Make function for getting API usage (daily)
 def get_api_usage_from_last_day() -> int:
     """
     This function returns the number of API calls in the last day.
     """
+    return rate_limiter.count(86400)
+
+# Make function for getting API usage (hourly totals)
+def get_hourly_api_usage(since: Optional[int] = None, until: Optional[int] = None) -> Dict[int, int]:
+    """
+    This function returns the number of API calls per hour, keyed by the hour
+    number (unix timestamp // 3600), optionally only between since and until.
+    """
+    # Write the pending API calls of this worker first
+    rate_limiter.flush()
     with sqlite3.connect(db_path) as conn:
         c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM api_usage WHERE api_timestamp > ?", (int(time.time())-86400,))
-        return c.fetchone()[0]
+        c.execute("SELECT hour, count FROM api_usage_hourly WHERE hour >= ? AND hour <= ? ORDER BY hour",
+                  (since // 3600 if since is not None else 0, until // 3600 if until is not None else 2**62))
+        return dict(c.fetchall())
+
+# Write the pending API calls to the database every RATE_LIMIT_FLUSH_SECONDS
+async def flush_api_usage_periodically() -> None:
+    """
+    This function flushes the rate limiter every RATE_LIMIT_FLUSH_SECONDS until it is
+    cancelled, so the API calls of an idle worker are written too, instead of waiting
+    for its next call. It runs on the event loop of each worker, from the startup event.
+    """
+    while True:
+        await asyncio.sleep(RATE_LIMIT_FLUSH_SECONDS)
+        try:
+            await run_in_threadpool(rate_limiter.flush)
+        except Exception as e:
+            # The calls of a failed batch are lost, but the next batches are still written
+            print(e)
+
+# Count the worker processes serving the API
+def worker_processes() -> int:
+    """
+    This function returns the number of worker processes serving the API, which
+    gunicorn.conf.py sets in every worker (1 when the app runs without gunicorn).
+    """
+    return int(os.getenv("SEMFUN_WORKER_PROCESSES", "1"))
+
+# Refuse to keep a document that the next requests may not find
+def keep_refused_response() -> Optional[JSONResponse]:
+    """
+    This function returns an error response if documents cannot be kept, because
+    more than one worker process serves the API: a kept document lives in the
+    memory of the worker that stored it, and the next request can reach any of them.
+    Otherwise it returns None.
+    """
+    if worker_processes() > 1:
+        return JSONResponse(status_code=400, content={"error": "keep is not available with more than one worker process, since a kept document is only in the memory of the worker that stored it. Run one worker (SEMFUN_WORKERS=1) per instance to use handles."})
+    return None
+
+# Answer a handle that is not in the document store of this worker
+def missing_handle_response(handle: str, document_id: Optional[str] = None) -> JSONResponse:
+    """
+    This function returns the error response for a handle that is not in the
+    document store: 421 if it was stored by another worker process, otherwise 404.
+    """
+    suffix = f": {document_id}." if document_id is not None else "."
+    if document_store.is_foreign(handle):
+        return JSONResponse(status_code=421, content={"error": f"Document handle belongs to another worker process, which this request did not reach{suffix} Run one worker (SEMFUN_WORKERS=1) per instance to use handles."})
+    return JSONResponse(status_code=404, content={"error": f"Document handle not found or expired{suffix}"})
 
 # Make function for checking rate limit
 def check_rate_limit() -> bool:
@@ -201,12 +448,215 @@ def check_rate_limit() -> bool:
     Returns:
         bool: True if rate limit has not been reached, False otherwise.
     """
-    if USE_HOURLY_RATE_LIMIT and get_api_usage_from_last_hour() >= hourly_rate_limit:
-        return False
-    if USE_DAILY_RATE_LIMIT and get_api_usage_from_last_day() >= daily_rate_limit:
-        return False
-    else:
-        return True
+    with stage("rate_limit"):
+        if USE_HOURLY_RATE_LIMIT and get_api_usage_from_last_hour() >= hourly_rate_limit:
+            return False
+        if USE_DAILY_RATE_LIMIT and get_api_usage_from_last_day() >= daily_rate_limit:
+            return False
+        else:
+            return True
+
+# Embed a list of sentences with the model, through the encode batcher if it is enabled
+async def encode_with_model(sentences: List[str], priority: bool = False) -> np.ndarray:
+    """
+    This function embeds a list of sentences with the model. If encode batching is
+    enabled, the sentences are combined with those of concurrent requests.
+
+    Args:
+        sentences (list): The sentences to embed.
+        priority (bool): Whether to run in the priority lanes of the encode batcher and the CPU executor, for search queries.
+
+    Returns:
+        numpy.ndarray: A 2D array containing one vector per sentence.
+    """
+
+    await wait_for_model()
+
+    # Includes the wait for the executor or for the batch, which is part of the latency of the request
+    count(metrics.sentences_encoded, len(sentences))
+    with stage("encode"):
+        if encode_batcher is None:
+            return await (cpu_executor.run_priority if priority else cpu_executor.run)(model.encode, sentences)
+        return await encode_batcher.encode(sentences, priority)
+
+# Embed a list of sentences, using the embedding cache if it is enabled
+async def encode_sentences(sentences: List[str]) -> np.ndarray:
+    """
+    This function embeds a list of sentences. If the embedding cache is enabled,
+    only the sentences missing from the cache are sent to the model.
+
+    Args:
+        sentences (list): The sentences to embed.
+
+    Returns:
+        numpy.ndarray: A 2D array containing one vector per sentence.
+    """
+
+    if len(sentences) == 0:
+        await wait_for_model()
+        return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+    if embedding_cache is None:
+        return await encode_with_model(sentences)
+
+    # Cache lookups hash every sentence and may read the on-disk tier, so they run off the event loop too
+    keys, vectors, to_encode = await run_in_threadpool(embedding_cache.lookup, sentences)
+    if to_encode:
+        encoded = await encode_with_model(list(to_encode.values()))
+        vectors.update(await run_in_threadpool(embedding_cache.insert, list(to_encode.keys()), encoded))
+    return np.stack([vectors[key] for key in keys])
+
+# Embed a search query, using the query cache if it is enabled
+async def encode_query(query: str) -> np.ndarray:
+    """
+    This function embeds a search query into a float32 vector.
+
+    Args:
+        query (str): The query to embed.
+
+    Returns:
+        numpy.ndarray: A 1D array containing the query vector.
+    """
+
+    if query_cache is None:
+        return np.asarray((await encode_with_model([query], priority=True))[0], dtype=np.float32)
+
+    keys, vectors, to_encode = query_cache.lookup([query])
+    if to_encode:
+        vectors.update(query_cache.insert(keys, await encode_with_model([query], priority=True)))
+    return np.asarray(vectors[keys[0]], dtype=np.float32)
+
+# Score a matrix of vectors against a query vector and select the best matches
+def score_vectors(vectors: np.ndarray, query_emb: np.ndarray, top_k: Optional[int], min_score: Optional[float]) -> tuple:
+    """
+    This function scores every vector against the query with a single float32
+    matrix-vector product, and selects the requested hits without sorting every score.
+
+    Args:
+        vectors (numpy.ndarray): The 2D matrix of vectors to score.
+        query_emb (numpy.ndarray): The query vector.
+        top_k (int): The maximum number of indices to return. Returns all if None.
+        min_score (float): The minimum score to return. Applies no threshold if None.
+
+    Returns:
+        tuple: The selected indices sorted by decreasing score, and the scores of all vectors.
+    """
+
+    scores = vectors.reshape(len(vectors), len(query_emb)) @ query_emb
+    return top_k_indices(scores, top_k, min_score), scores
+
+# Search a kept document, approximately if it has an index
+def search_stored_document(document, query_emb: np.ndarray, top_k: Optional[int], min_score: Optional[float], nprobe: Optional[int]) -> tuple:
+    """
+    This function searches a kept document. A document with an approximate search index
+    is searched in the nprobe clusters closest to the query (ANN_NPROBE if not set), any
+    other document exactly with score_vectors.
+
+    Args:
+        document (StoredDocument): The kept document.
+        query_emb (numpy.ndarray): The query vector.
+        top_k (int): The maximum number of indices to return. Returns all (exactly) if None.
+        min_score (float): The minimum score to return. Applies no threshold if None.
+        nprobe (int): The number of clusters to search, if the document has an index.
+
+    Returns:
+        tuple: The selected indices sorted by decreasing score, and their scores.
+    """
+
+    if document.index is not None:
+        return document.index.search(query_emb, top_k, min_score, ANN_NPROBE if nprobe is None else nprobe)
+    indices, scores = score_vectors(document.vectors, query_emb, top_k, min_score)
+    return indices, scores[indices]
+
+# Search the sentences of one document with one of the SEARCH_MODES
+def search_with_mode(mode: str, query: str, query_emb: Optional[np.ndarray], vectors: Optional[np.ndarray], lexical_index: Optional[BM25Index], document, top_k: Optional[int], min_score: Optional[float], nprobe: Optional[int], lexical_top_n: int) -> tuple:
+    """
+    This function searches the sentences of one document with one of the SEARCH_MODES:
+
+        dense: score the vectors (with the approximate index of a large kept document).
+        lexical: score the sentences with BM25.
+        hybrid: fuse the best HYBRID_CANDIDATES dense and lexical results with reciprocal rank fusion.
+        rerank: score only the vectors of the best lexical_top_n lexical results.
+
+    Args:
+        mode (str): One of SEARCH_MODES.
+        query (str): The query, for the lexical modes.
+        query_emb (numpy.ndarray): The query vector, for every mode except lexical.
+        vectors (numpy.ndarray): The 2D matrix of vectors of the sentences.
+        lexical_index (BM25Index): The BM25 index of the sentences, for every mode except dense.
+        document (StoredDocument): The kept document, if searching by handle.
+        top_k (int): The maximum number of results. Returns all if None (at most the fused candidates in hybrid mode).
+        min_score (float): The minimum score of a result: the dot product in dense and rerank mode, the BM25 score in lexical mode, and the fused score in hybrid mode.
+        nprobe (int): The number of clusters to search, if the document has an approximate index.
+        lexical_top_n (int): The number of lexical results rescored in rerank mode.
+
+    Returns:
+        tuple: The selected sentence indices sorted by decreasing score, and their scores.
+    """
+
+    def dense(k, threshold):
+        if document is not None:
+            return search_stored_document(document, query_emb, k, threshold, nprobe)
+        indices, scores = score_vectors(vectors, query_emb, k, threshold)
+        return indices, scores[indices]
+
+    if mode == "dense":
+        return dense(top_k, min_score)
+    if mode == "lexical":
+        return lexical_index.search(query, top_k, min_score)
+
+    if mode == "rerank":
+        # Only the rows of the lexical candidates are scored, never the whole matrix
+        candidates, _ = lexical_index.search(query, lexical_top_n)
+        scores = vectors.reshape(len(vectors), len(query_emb))[candidates] @ query_emb
+        selected = top_k_indices(scores, top_k, min_score)
+        return candidates[selected], scores[selected]
+
+    # Hybrid: fuse the ranks of the best dense and lexical results, since their scores are not comparable
+    candidate_count = HYBRID_CANDIDATES if top_k is None else max(top_k, HYBRID_CANDIDATES)
+    dense_indices, _ = dense(candidate_count, None)
+    lexical_indices, _ = lexical_index.search(query, candidate_count)
+    indices, scores = reciprocal_rank_fusion([dense_indices, lexical_indices], RRF_K)
+    selected = top_k_indices(scores, top_k, min_score)
+    return indices[selected], scores[selected]
+
+# Search several documents, approximately for the kept documents with an index
+def search_collection(matrices: list, indexes: list, query_emb: np.ndarray, top_k: Optional[int], min_score: Optional[float], nprobe: Optional[int]) -> tuple:
+    """
+    This function selects the best results across several documents. The documents
+    without an index are scored exactly with blocked_top_k. Each document with an
+    index returns its own approximate top_k, and those are merged with the rest.
+
+    Args:
+        matrices (list): The vector matrix of each document (unused for a document with an index).
+        indexes (list): The approximate search index of each document, or None.
+        query_emb (numpy.ndarray): The query vector.
+        top_k (int): The maximum number of results across all documents. Returns all (exactly) if None.
+        min_score (float): The minimum score of a result. Applies no threshold if None.
+        nprobe (int): The number of clusters to search in each index (ANN_NPROBE if None).
+
+    Returns:
+        tuple: The document index, sentence index, and score of each result.
+    """
+
+    if top_k is None:
+        indexes = [None] * len(matrices)
+
+    exact = [matrix if index is None else matrix[:0] for matrix, index in zip(matrices, indexes)]
+    document_indices, sentence_indices, scores = blocked_top_k(exact, query_emb, top_k, min_score, SEARCH_BLOCK_ROWS)
+    if all(index is None for index in indexes):
+        return document_indices, sentence_indices, scores
+
+    document_parts, sentence_parts, score_parts = [document_indices], [sentence_indices], [scores]
+    for d, index in enumerate(indexes):
+        if index is not None:
+            ids, index_scores = index.search(query_emb, top_k, min_score, ANN_NPROBE if nprobe is None else nprobe)
+            document_parts.append(np.full(len(ids), d, dtype=np.int64))
+            sentence_parts.append(ids)
+            score_parts.append(index_scores)
+
+    document_indices, sentence_indices, scores = np.concatenate(document_parts), np.concatenate(sentence_parts), np.concatenate(score_parts)
+    order = top_k_indices(scores, top_k)
+    return document_indices[order], sentence_indices[order], scores[order]
 
 # Filter the non-semantic sentences from a list of sentences
 def filter_non_semantic_sentences(sentences: List[str]) -> List[str]:
@@ -226,52 +676,222 @@ def filter_non_semantic_sentences(sentences: List[str]) -> List[str]:
         list: A list containing the semantic sentences.
     """
 
-    for sentence in sentences:
-        if len(sentence) < 5:
-            sentences.remove(sentence)
-        elif sum(c.isdigit() for c in sentence) > (len(sentence) / 2):
-            # Remove sentences that are primarily numbers
-            sentences.remove(sentence)
-        elif len(sentence.split()) < 3:
-            # Remove sentences that are less than 3 words
-            sentences.remove(sentence)
-    
-    return sentences
+    # One pass, keeping the semantic sentences, instead of removing from the list while iterating over it
+    return [sentence for sentence in sentences if is_semantic_sentence(sentence)]
 
-# Filter newline characters and similar from text, replace with spaces
-def replace_newlines(text: str) -> str:
+# Split text into chunks, optionally filtering the non-semantic sentences and combining the others
+def chunk_text(text: str, filter: bool, page=None) -> List[Chunk]:
     """
-    This function replaces newline characters and similar from text, replacing them with spaces.
+    This function splits the body of text into sentences. If filter is set, the
+    non-semantic sentences are removed and the others are combined into chunks by
+    the chunker selected with CHUNKER.
 
     Args:
-        text (str): The text to replace newline characters from.
-    
+        text (str): The text to split.
+        filter (bool): Whether to filter the non-semantic sentences and combine the others into chunks.
+        page (int): The page number of the text, kept in every chunk.
+
+    Returns:
+        list: The chunks, each with its text, page, and character offsets in the text.
+    """
+
+    with stage("split"):
+        text, shortened = normalize_text(text)
+        spans = sentence_spans(text)
+
+    if not filter:
+        chunks = [Chunk(text[start:end], start, end, page) for start, end in spans]
+    else:
+        with stage("filter"):
+            spans = [(start, end) for start, end in spans if is_semantic_sentence(text[start:end])]
+        # The tokens chunker counts tokens with the tokenizer of the model
+        load_model_once()
+        with stage("chunk"):
+            chunks = text_chunker.chunk(text, spans, page)
+        count(metrics.tokens_chunked, sum(chunk.tokens or 0 for chunk in chunks))
+
+    # The text of a chunk is normalized, and its offsets point into the original text
+    if shortened:
+        for chunk in chunks:
+            chunk.start, chunk.end = original_offset(shortened, chunk.start), original_offset(shortened, chunk.end)
+    return chunks
+
+# Split text into sentences, optionally filtering and combining the non-semantic sentences
+def split_text(text: str, filter: bool) -> List[str]:
+    """
+    This function splits the body of text into a list of sentences. If filter is set,
+    the non-semantic sentences are removed and the others are combined into chunks.
+
+    Args:
+        text (str): The text to split.
+        filter (bool): Whether to filter the non-semantic sentences from the list of sentences.
+
+    Returns:
+        list: A list containing the sentences.
+    """
+
+    return [chunk.text for chunk in chunk_text(text, filter)]
+
+# Split every page of a document into chunks
+def split_pages(pages: Dict[str, str], filter: bool) -> List[Chunk]:
+    """
+    This function splits the text of every page into chunks.
+
+    Args:
+        pages (dict): The text of each page, keyed by page number.
+        filter (bool): Whether to filter the non-semantic sentences from the list of sentences.
+
+    Returns:
+        list: The chunks of all pages, each with its page number and character offsets in the text of its page.
+    """
+
+    chunks = []
+    for page, text in pages.items():
+        chunks.extend(chunk_text(text, filter, int(page) if page.isdigit() else page))
+
+    return chunks
+
+# Open a PDF file
+def open_pdf(path: str):
+    """
+    This function opens a PDF file with PyMuPDF. Like every call into PyMuPDF, it
+    holds FITZ_LOCK, since PyMuPDF is not thread-safe.
+
+    Args:
+        path (str): The path of the PDF file.
+
+    Returns:
+        tuple: The opened PDF document (fitz.Document) and its number of pages.
+    """
+
+    # Imported here, so importing main.py does not wait for it
+    import fitz
+    with FITZ_LOCK:
+        doc = fitz.open(path, filetype="pdf")
+        return doc, len(doc)
+
+# Close a PDF document
+def close_pdf(doc) -> None:
+    """
+    This function closes a PDF document opened by open_pdf.
+    """
+
+    with FITZ_LOCK:
+        doc.close()
+
+# Close a PDF document and remove its file, after the page extraction still running on it
+def release_pdf(doc, path: str, extraction: Optional[Future] = None, remove: bool = True) -> None:
+    """
+    This function closes a PDF document opened by open_pdf and removes its file, on
+    the CPU executor, without waiting. A client that disconnects cancels its request,
+    but not the page extraction already running on the executor, so if extraction
+    (the future of the last page job on the document) is given, the document is
+    only closed once that job has returned.
+
+    Args:
+        doc (fitz.Document): The opened PDF document.
+        path (str): The path of the PDF file.
+        extraction (Future): The last page job submitted on the document, or None.
+        remove (bool): Whether to remove the file, which is False for the spool file of the upload itself.
+    """
+
+    def close():
+        close_pdf(doc)
+        if remove:
+            os.remove(path)
+
+    if extraction is None:
+        cpu_executor.submit(close)
+    else:
+        # Runs right away if the job is done, or was cancelled before it started
+        extraction.add_done_callback(lambda _: cpu_executor.submit(close))
+
+# Extract the text of every page of an opened PDF
+def pdf_pages_to_text(doc) -> Dict[int, str]:
+    """
+    This function extracts the text of every page of a PDF document, and closes the document.
+
+    Args:
+        doc (fitz.Document): The opened PDF document.
+
     Returns:
-        str: The text with newline characters replaced.
+        dict: A dictionary containing the text of each page, keyed by page number.
+    """
+
+    # Dictionary to hold text for each page
+    pages_text = {}
+
+    with FITZ_LOCK:
+        page_count = len(doc)
+
+    for page_num in range(page_count):  # Iterate through each page, releasing the lock between pages
+        pages_text[page_num + 1] = pdf_page_to_text(doc, page_num)  # Key is page number, value is text
+
+    # Close the document
+    close_pdf(doc)
+
+    return pages_text
+
+# Extract the text of one page of an opened PDF
+def pdf_page_to_text(doc, page_num: int) -> str:
     """
+    This function extracts the text of one page of a PDF document.
 
-    return text.replace('\n', ' ').replace('\\n', ' ').replace('\r\n', ' ')
+    Args:
+        doc (fitz.Document): The opened PDF document.
+        page_num (int): The zero-based index of the page.
+
+    Returns:
+        str: The text of the page.
+    """
+
+    count(metrics.pages_extracted, 1)
+    with stage("extract"), FITZ_LOCK:
+        page = doc.load_page(page_num)  # Load the page
+        return page.get_text()  # Extract text from the page
+
+# Format one event of a streamed response
+def stream_event(data: dict, sse: bool) -> bytes:
+    """
+    This function formats a dictionary as one line of NDJSON, or as one
+    server-sent event if sse is set.
+    """
+
+    if sse:
+        return b"data: " + dumps(data) + b"\n\n"
+    return dumps(data) + b"\n"
 
 # Text file to string
-def txt_to_string(file_in_memory):
+def txt_to_string(file):
     """
     Args:
-        file_in_memory (UploadFile): The txt file to extract text from in bytes format.
+        file (file object): The spooled txt file to extract text from (UploadFile.file).
     """
 
-    file_in_memory = io.BytesIO(file_in_memory)
-    return file_in_memory.getvalue().decode('utf-8')
+    # Decode while reading, so the file is never held in memory as bytes as well as text
+    file.seek(0)
+    text = io.TextIOWrapper(file, encoding='utf-8')
+    try:
+        with stage("extract"):
+            return text.read()
+    finally:
+        text.detach()
 
 # Docx file to string
-def docx_to_string(file: io.BytesIO):
+def docx_to_string(file):
     """
     Args:
-        file (UploadFile): The docx file to extract text from in bytes format.
+        file (file object): The spooled docx file to extract text from (UploadFile.file).
     """
 
-    file = io.BytesIO(file)
-    doc = Document(file)
-    return '\n'.join([para.text for para in doc.paragraphs])
+    # python-docx reads the parts it needs from the file, without a copy in memory
+    # Imported here, so importing main.py does not wait for it
+    from docx import Document
+
+    file.seek(0)
+    with stage("extract"):
+        doc = Document(file)
+        return '\n'.join([para.text for para in doc.paragraphs])
 
 
 # ------------- [Classes and Other] -------------
@@ -301,28 +921,91 @@ def valid_api_key_rate_limit(api_key_header: APIKey = Depends(bearer_scheme)):
         )
     return api_key_header.credentials
 
+# Define validation function for the vector format of a response
+def valid_vector_format(vector_format: str = "json"):
+    # Check if the vector format is supported
+    if vector_format not in VECTOR_FORMATS:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid vector format. Use one of: {', '.join(VECTOR_FORMATS)}."
+        )
+    return vector_format
+
+# Define the text of a request, sent in its body
+class TextInput(BaseModel):
+    """
+    The text to split, sent in the request body as {"text": ...}, so it has no URL
+    length limit and can be compressed. Older clients may still send the text as a
+    query parameter, with an empty body.
+    """
+    text: Optional[str] = None
+
+# Get the text of a request
+def request_text(body: Optional[TextInput], text: Optional[str]) -> Optional[str]:
+    """
+    This function returns the text sent in the request body, or else the text sent
+    as a query parameter, or None if neither was sent.
+    """
+
+    if body is not None and body.text is not None:
+        return body.text
+    return text
+
+# Define one document of a collection search
+class CollectionDocument(BaseModel):
+    """
+    A document to search, identified by id: either the handle of a kept document,
+    or its sentences and vectors (and optionally the page of each sentence).
+    """
+    id: str
+    handle: Optional[str] = None
+    sentences: Optional[List[str]] = None
+    vectors: Optional[Union[List[List[float]], EncodedVectors]] = None
+    pages: Optional[List[Union[int, str]]] = None
+
 
 # ------------- [Routes and Endpoints] -------------
 
+# Start loading the model once the server has started, so the port is bound and /healthz answers right away
+@app.on_event("startup")
+async def start_model_loading_on_startup():
+    start_model_loading()
+
+# Write the API calls of this worker to the database periodically, and once more when it stops
+@app.on_event("startup")
+async def start_api_usage_flushing():
+    if USE_HOURLY_RATE_LIMIT or USE_DAILY_RATE_LIMIT:
+        app.state.api_usage_flusher = asyncio.create_task(flush_api_usage_periodically())
+
+@app.on_event("shutdown")
+async def stop_api_usage_flushing():
+    if USE_HOURLY_RATE_LIMIT or USE_DAILY_RATE_LIMIT:
+        app.state.api_usage_flusher.cancel()
+        await run_in_threadpool(rate_limiter.flush)
+
 @app.post('/api/v1/text-split')
-async def text_split(text: str, api_key: str = Depends(valid_api_key_rate_limit)):
+async def text_split(body: Optional[TextInput] = None, text: Optional[str] = None, api_key: str = Depends(valid_api_key_rate_limit)):
     """
     This endpoint splits the body of text into a list of sentences.
 
     Args:
-        text (str): The text to split.
+        body (TextInput): The text to split, as {"text": ...}.
+        text (str): The text to split, as a query parameter, for older clients.
 
     Returns:
         list: A list containing the sentences.
     """
 
     try:
+        text = request_text(body, text)
+        if text is None:
+            return JSONResponse(status_code=400, content={"error": "No text. Send it in the request body, as {\"text\": ...}."})
+
         # Log API usage. Note, you could move this to the end of the endpoint and check the response content if you want to log only successful requests.
-        log_api_usage()
+        await run_in_threadpool(log_api_usage)
 
-        sentences = sent_tokenize(replace_newlines(text))
+        sentences = await cpu_executor.run(split_text, text, False)
 
-        return JSONResponse(status_code=200, content={"sentences": sentences})
+        return NumpyJSONResponse(status_code=200, content={"sentences": sentences})
     except Exception as e:
         if INSECURE_DEBUG:
             return JSONResponse(status_code=500, content={"error": str(e)})
@@ -331,24 +1014,29 @@ async def text_split(text: str, api_key: str = Depends(valid_api_key_rate_limit)
             return JSONResponse(status_code=500, content={"error": "Internal server error. Set INSECURE_DEBUG to True to view error details from client side."})
 
 @app.post('/api/v1/text-embed')
-async def text_embed(sentences: List[str], api_key: str = Depends(valid_api_key_rate_limit)):
+async def text_embed(sentences: List[str], request: Request, vector_format: str = Depends(valid_vector_format), api_key: str = Depends(valid_api_key_rate_limit)):
     """
     This endpoint embeds the body of text into a list of vectors.
 
     Args:
         sentences (list): The sentences to embed.
+        vector_format (str): The format of the vectors: json, float32, float16, or npy.
 
     Returns:
-        list: A list containing the vectors.
+        list: A list containing the vectors. If the Accept header is application/x-npy,
+        the vectors are instead returned as a raw .npy file.
     """
 
     try:
         # Log API usage. Note, you could move this to the end of the endpoint and check the response content if you want to log only successful requests.
-        log_api_usage()
+        await run_in_threadpool(log_api_usage)
+
+        sentence_embeddings = await encode_sentences(sentences)
 
-        sentence_embeddings = model.encode(sentences)
+        if NPY_MEDIA_TYPE in request.headers.get("accept", ""):
+            return Response(status_code=200, content=vectors_to_npy(sentence_embeddings), media_type=NPY_MEDIA_TYPE)
 
-        return JSONResponse(status_code=200, content={"vectors": sentence_embeddings.tolist()})
+        return NumpyJSONResponse(status_code=200, content={"vectors": encode_vectors(sentence_embeddings, vector_format, JSON_FLOAT_DECIMALS)})
     except Exception as e:
         if INSECURE_DEBUG:
             return JSONResponse(status_code=500, content={"error": str(e)})
@@ -357,44 +1045,93 @@ async def text_embed(sentences: List[str], api_key: str = Depends(valid_api_key_
             return JSONResponse(status_code=500, content={"error": "Internal server error. Set INSECURE_DEBUG to True to view error details from client side."})
 
 @app.post('/api/v1/text-split-and-embed')
-async def text_split_and_embed(text: str, filter: bool, api_key: str = Depends(valid_api_key_rate_limit)):
+async def text_split_and_embed(filter: bool, body: Optional[TextInput] = None, text: Optional[str] = None, keep: bool = False, vector_format: str = Depends(valid_vector_format), api_key: str = Depends(valid_api_key_rate_limit)):
     """
     This endpoint splits the body of text into a list of sentences and embeds them into a list of vectors.
 
     Args:
-        text (str): The text to split and embed.
+        body (TextInput): The text to split and embed, as {"text": ...}.
+        text (str): The text to split and embed, as a query parameter, for older clients. It is limited by the length of the URL.
         filter (bool): Whether to filter the non-semantic sentences from the list of sentences.
+        keep (bool): Whether to keep the sentences and vectors in server memory for a limited time, and return a handle to search them.
+        vector_format (str): The format of the vectors: json, float32, float16, or npy.
 
     Returns:
-        list: A list containing the sentences and vectors.
+        list: A list containing the sentences and vectors, the character offsets of each sentence in the text, and the handle if keep is set.
     """
 
     try:
+        text = request_text(body, text)
+        if text is None:
+            return JSONResponse(status_code=400, content={"error": "No text. Send it in the request body, as {\"text\": ...}."})
+        if keep and keep_refused_response() is not None:
+            return keep_refused_response()
+
         # Log API usage. Note, you could move this to the end of the endpoint and check the response content if you want to log only successful requests.
-        log_api_usage()
+        await run_in_threadpool(log_api_usage)
+
+        chunks = await cpu_executor.run(chunk_text, text, filter)
+        sentences = [chunk.text for chunk in chunks]
+
+        sentence_embeddings = await encode_sentences(sentences)
+
+        content = {"sentences": sentences, "vectors": encode_vectors(sentence_embeddings, vector_format, JSON_FLOAT_DECIMALS), "offsets": [[chunk.start, chunk.end] for chunk in chunks]}
+
+        if keep:
+            handle = await cpu_executor.run(document_store.put, sentences, sentence_embeddings)
+            if handle is None:
+                return JSONResponse(status_code=413, content={"error": "Document is too large to keep on the server."})
+            content.update({"handle": handle, "expires_in": DOCUMENT_HANDLE_TTL_SECONDS})
+
+        return NumpyJSONResponse(status_code=200, content=content)
+    except Exception as e:
+        if INSECURE_DEBUG:
+            return JSONResponse(status_code=500, content={"error": str(e)})
+        else:
+            print(e)
+            return JSONResponse(status_code=500, content={"error": "Internal server error. Set INSECURE_DEBUG to True to view error details from client side."})
+
+@app.post('/api/v1/document-split-and-embed')
+async def document_split_and_embed(pages: Dict[str, str], filter: bool, keep: bool = False, vector_format: str = Depends(valid_vector_format), api_key: str = Depends(valid_api_key_rate_limit)):
+    """
+    This endpoint splits every page of a document into a list of sentences and embeds
+    all of them with a single batched call to the model. The request body is the
+    {page: text} dictionary returned by /api/v1/pdf-to-text.
+
+    Args:
+        pages (dict): The text of each page, keyed by page number.
+        filter (bool): Whether to filter the non-semantic sentences from the list of sentences.
+        keep (bool): Whether to keep the sentences and vectors in server memory for a limited time, and return a handle to search them.
+        vector_format (str): The format of the vectors: json, float32, float16, or npy.
+
+    Returns:
+        dict: A dictionary containing the sentences, vectors, the page number and character offsets in the page of each sentence, and the handle if keep is set.
+    """
 
-        sentences = sent_tokenize(replace_newlines(text))
+    try:
+        if keep and keep_refused_response() is not None:
+            return keep_refused_response()
 
-        if filter:
-            sentences = filter_non_semantic_sentences(sentences)
+        # Log API usage. Note, you could move this to the end of the endpoint and check the response content if you want to log only successful requests.
+        await run_in_threadpool(log_api_usage)
 
-            # Var 1:
-            # Now combine every n sentences into 1 sentence
-            # n=2
-            # sentences = [' '.join(sentences[i:i+n]) for i in range(0, len(sentences), n)]
+        # Split every page first, keeping track of which page (and where in it) each sentence came from
+        chunks = await cpu_executor.run(split_pages, pages, filter)
+        sentences = [chunk.text for chunk in chunks]
+        page_numbers = [chunk.page for chunk in chunks]
 
-            # Var 2:
-            # If a sentence is less than n chars, combine with the next one
-            n=75
-            # sentences = [sentences[i] + ' ' + sentences[i+1] if len(sentences[i]) < n else sentences[i] for i in range(0, len(sentences), 2)]
-            sentences = [sentences[i] + ' ' + sentences[i+1] if i+1 < len(sentences) and len(sentences[i]) < n else sentences[i] for i in range(0, len(sentences), 2)]
+        # Embed the sentences of all pages at once, so the model can batch across page boundaries
+        sentence_embeddings = await encode_sentences(sentences)
 
-            # Var 3:
-            # Do nothing.
+        content = {"sentences": sentences, "vectors": encode_vectors(sentence_embeddings, vector_format, JSON_FLOAT_DECIMALS), "pages": page_numbers, "offsets": [[chunk.start, chunk.end] for chunk in chunks]}
 
-        sentence_embeddings = model.encode(sentences)
+        if keep:
+            handle = await cpu_executor.run(document_store.put, sentences, sentence_embeddings, page_numbers)
+            if handle is None:
+                return JSONResponse(status_code=413, content={"error": "Document is too large to keep on the server."})
+            content.update({"handle": handle, "expires_in": DOCUMENT_HANDLE_TTL_SECONDS})
 
-        return JSONResponse(status_code=200, content={"sentences": sentences, "vectors": sentence_embeddings.tolist()})
+        return NumpyJSONResponse(status_code=200, content=content)
     except Exception as e:
         if INSECURE_DEBUG:
             return JSONResponse(status_code=500, content={"error": str(e)})
@@ -419,33 +1156,98 @@ async def pdf_to_text(file: UploadFile = File(...), api_key: str = Depends(valid
         if file.content_type != "application/pdf":
             return JSONResponse(status_code=400, content={"error": "Invalid file type. Please upload a PDF file."})
 
-        # Read the uploaded file into memory
-        contents = await file.read()
+        # Get the upload as a file on disk, so PyMuPDF reads the pages from the file instead of from memory
+        path, owned = await run_in_threadpool(spool_upload, file.file, ".pdf")
+
+        try:
+            # Log API usage. Note, you could move this to the end of the endpoint and check the response content if you want to log only successful requests.
+            await run_in_threadpool(log_api_usage)
+
+            # Attempt to open and process the PDF from the file
+            try:
+                doc, page_count = await cpu_executor.run(open_pdf, path)
+            except Exception as e:
+                # Handle invalid PDF file
+                return JSONResponse(status_code=400, content={"error": "Invalid PDF file."})
+
+            # Extract the text of each page off the event loop, on several processes for large documents
+            if pdf_extractor is not None and page_count >= PDF_PARALLEL_MIN_PAGES:
+                await cpu_executor.run(close_pdf, doc)
+                count(metrics.pages_extracted, page_count)
+                with stage("extract"):
+                    pages_text = await pdf_extractor.extract_file(path, page_count)
+            else:
+                pages_text = await cpu_executor.run(pdf_pages_to_text, doc)
+        finally:
+            if owned:
+                os.remove(path)
+
+        # Return the structured text as a dictionary
+        return NumpyJSONResponse(status_code=200, content={"filename": file.filename, "text": pages_text})
+    except Exception as e:
+        if INSECURE_DEBUG:
+            return JSONResponse(status_code=500, content={"error": str(e)})
+        else:
+            print(e)
+            return JSONResponse(status_code=500, content={"error": "Internal server error. Set INSECURE_DEBUG to True to view error details from client side."})
+
+
+@app.post("/api/v1/pdf-to-text-stream/")
+async def pdf_to_text_stream(request: Request, file: UploadFile = File(...), api_key: str = Depends(valid_api_key_rate_limit)):
+    """
+    This endpoint extracts text from a PDF file, and streams each page as soon as it is extracted.
+    The response is NDJSON, or server-sent events if the Accept header is text/event-stream.
+    The first event contains the filename and page count, and each following event one page.
+
+    Args:
+        file (UploadFile): The PDF file to extract text from.
+    
+    Returns:
+        stream: {"filename": str, "page_count": int}, then {"page": int, "text": str} for each page.
+    """
+
+    try:
+        # Preliminary check for MIME type
+        if file.content_type != "application/pdf":
+            return JSONResponse(status_code=400, content={"error": "Invalid file type. Please upload a PDF file."})
+
+        # Get the upload as a file on disk, so PyMuPDF reads the pages from the file instead of from memory
+        path, owned = await run_in_threadpool(spool_upload, file.file, ".pdf")
 
         # Log API usage. Note, you could move this to the end of the endpoint and check the response content if you want to log only successful requests.
-        log_api_usage()
+        await run_in_threadpool(log_api_usage)
 
-        # Attempt to open and process the PDF from memory
+        # Attempt to open the PDF from the file
         try:
-            pdf_stream = io.BytesIO(contents)
-            doc = fitz.open(stream=pdf_stream, filetype="pdf")
+            doc, page_count = await cpu_executor.run(open_pdf, path)
         except Exception as e:
             # Handle invalid PDF file
+            if owned:
+                os.remove(path)
             return JSONResponse(status_code=400, content={"error": "Invalid PDF file."})
 
-        # Dictionary to hold text for each page
-        pages_text = {}
-
-        for page_num in range(len(doc)):  # Iterate through each page
-            page = doc.load_page(page_num)  # Load the page
-            text = page.get_text()  # Extract text from the page
-            pages_text[page_num + 1] = text  # Key is page number, value is text
-
-        # Close the document
-        doc.close()
-
-        # Return the structured text as a dictionary
-        return JSONResponse(status_code=200, content={"filename": file.filename, "text": pages_text})
+        sse = "text/event-stream" in request.headers.get("accept", "")
+
+        async def generate_pages():
+            # Extract one page at a time, so only the page being sent is held as text
+            extraction = None
+            try:
+                yield stream_event({"filename": file.filename, "page_count": page_count}, sse)
+                for page_num in range(page_count):
+                    extraction = cpu_executor.submit(pdf_page_to_text, doc, page_num)
+                    text = await asyncio.wrap_future(extraction)
+                    yield stream_event({"page": page_num + 1, "text": text}, sse)
+            except Exception as e:
+                # The status code has already been sent, so the error is sent as the last event
+                if INSECURE_DEBUG:
+                    yield stream_event({"error": str(e)}, sse)
+                else:
+                    print(e)
+                    yield stream_event({"error": "Internal server error. Set INSECURE_DEBUG to True to view error details from client side."}, sse)
+            finally:
+                release_pdf(doc, path, extraction, owned)
+
+        return StreamingResponse(generate_pages(), media_type="text/event-stream" if sse else "application/x-ndjson")
     except Exception as e:
         if INSECURE_DEBUG:
             return JSONResponse(status_code=500, content={"error": str(e)})
@@ -471,22 +1273,19 @@ async def txt_to_text(file: UploadFile = File(...), api_key: str = Depends(valid
         if file.content_type != "text/plain":
             return JSONResponse(status_code=400, content={"error": "Invalid file type. Please upload a text file (.txt)."})
 
-        # Read the uploaded file into memory
-        contents = await file.read()
-
         # Log API usage. Note, you could move this to the end of the endpoint and check the response content if you want to log only successful requests.
-        log_api_usage()
+        await run_in_threadpool(log_api_usage)
 
-        # Attempt to open and process the text from memory
+        # Attempt to process the text from the spooled upload
         try:
-            results = txt_to_string(contents)
+            results = await cpu_executor.run(txt_to_string, file.file)
         except Exception as e:
             # Handle invalid PDF file
             return JSONResponse(status_code=400, content={"error": "Invalid text file."})
 
 
         # Return the structured text as a dictionary
-        return JSONResponse(status_code=200, content={"filename": file.filename, "text": results})
+        return NumpyJSONResponse(status_code=200, content={"filename": file.filename, "text": results})
     except Exception as e:
         if INSECURE_DEBUG:
             return JSONResponse(status_code=500, content={"error": str(e)})
@@ -512,21 +1311,18 @@ async def docx_to_text(file: UploadFile = File(...), api_key: str = Depends(vali
         if file.content_type != "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
             return JSONResponse(status_code=400, content={"error": "Invalid file type. Please upload a .docx file."})
 
-        # Read the uploaded file into memory
-        contents = await file.read()
-
         # Log API usage. Note, you could move this to the end of the endpoint and check the response content if you want to log only successful requests.
-        log_api_usage()
+        await run_in_threadpool(log_api_usage)
 
-        # Attempt to open and process the docx from memory
+        # Attempt to open and process the docx from the spooled upload
         try:
-            doc = docx_to_string(contents)
+            doc = await cpu_executor.run(docx_to_string, file.file)
         except Exception as e:
             # Handle invalid PDF file
             return JSONResponse(status_code=400, content={"error": "Invalid docx file."})
 
         # Return the structured text as a dictionary
-        return JSONResponse(status_code=200, content={"filename": file.filename, "text": doc})
+        return NumpyJSONResponse(status_code=200, content={"filename": file.filename, "text": doc})
     except Exception as e:
         if INSECURE_DEBUG:
             return JSONResponse(status_code=500, content={"error": str(e)})
@@ -537,6 +1333,141 @@ async def docx_to_text(file: UploadFile = File(...), api_key: str = Depends(vali
 
 
 
+@app.post("/api/v1/ingest")
+async def ingest(request: Request, file: UploadFile = File(...), filter: bool = True, keep: bool = False, vector_format: str = Depends(valid_vector_format), api_key: str = Depends(valid_api_key_rate_limit)):
+    """
+    This endpoint extracts, splits, and embeds a PDF, docx, or txt file in one request, and
+    streams the sentences and vectors of each page as soon as they are ready. Extraction,
+    splitting, and embedding run as overlapping pipeline stages, so while one page is
+    embedded the next pages are already being extracted and split. Pages waiting to be
+    embedded are embedded together, so the model still runs on batches larger than one
+    page. A docx or txt file is streamed as a single page.
+    The response is NDJSON, or server-sent events if the Accept header is text/event-stream.
+
+    Args:
+        file (UploadFile): The PDF, docx, or txt file to ingest.
+        filter (bool): Whether to filter the non-semantic sentences from the list of sentences.
+        keep (bool): Whether to keep the sentences and vectors in server memory for a limited time, and return a handle to search them.
+        vector_format (str): The format of the vectors: json, float32, float16, or npy.
+
+    Returns:
+        stream: {"filename": str, "page_count": int}, then {"page": int, "sentences": list, "vectors": list, "offsets": list} for each page,
+        then {"done": true, "sentence_count": int}, with the handle if keep is set.
+    """
+
+    try:
+        # Preliminary check for MIME type
+        file_types = {"application/pdf": "pdf", "text/plain": "txt", "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx"}
+        file_type = file_types.get(file.content_type)
+        if file_type is None:
+            return JSONResponse(status_code=400, content={"error": "Invalid file type. Please upload a PDF, .docx, or text file (.txt)."})
+        if keep and keep_refused_response() is not None:
+            return keep_refused_response()
+
+        # Log API usage. Note, you could move this to the end of the endpoint and check the response content if you want to log only successful requests.
+        await run_in_threadpool(log_api_usage)
+
+        path = None
+        doc = None
+        if file_type == "pdf":
+            # Get the upload as a file on disk, so PyMuPDF reads the pages from the file instead of from memory
+            path, owned = await run_in_threadpool(spool_upload, file.file, ".pdf")
+            try:
+                doc, page_count = await cpu_executor.run(open_pdf, path)
+            except Exception as e:
+                # Handle invalid PDF file
+                if owned:
+                    os.remove(path)
+                return JSONResponse(status_code=400, content={"error": "Invalid PDF file."})
+        else:
+            # A docx or txt file has no pages, so its whole text is extracted up front as page 1
+            try:
+                text = await cpu_executor.run(txt_to_string if file_type == "txt" else docx_to_string, file.file)
+            except Exception as e:
+                # Handle invalid docx or txt file
+                return JSONResponse(status_code=400, content={"error": f"Invalid {'text' if file_type == 'txt' else 'docx'} file."})
+            page_count = 1
+
+        sse = "text/event-stream" in request.headers.get("accept", "")
+
+        # The last page job submitted on the document, which is closed only after it returns
+        extraction = None
+
+        async def extract_pages():
+            # Stage 1: extract the text of one page at a time
+            nonlocal extraction
+            if doc is None:
+                yield 1, text
+                return
+            for page_num in range(page_count):
+                extraction = cpu_executor.submit(pdf_page_to_text, doc, page_num)
+                yield page_num + 1, await asyncio.wrap_future(extraction)
+
+        async def split_page(item):
+            # Stage 2: split the page into chunks, and filter them
+            page, page_text = item
+            return page, await cpu_executor.run(chunk_text, page_text, filter, page)
+
+        async def embed_pages(items):
+            # Stage 3: embed the chunks of every page waiting, in one call to the model
+            sentence_embeddings = await encode_sentences([chunk.text for _, chunks in items for chunk in chunks])
+            results, start = [], 0
+            for page, chunks in items:
+                results.append((page, chunks, sentence_embeddings[start:start + len(chunks)]))
+                start += len(chunks)
+            return results
+
+        async def generate_pages():
+            sentence_count = 0
+            kept_sentences, kept_vectors, kept_pages = [], [], []
+
+            # The index of a kept document is built page by page, so a large document is already indexed when the last page is embedded
+            kept_index = None
+            try:
+                if keep:
+                    await wait_for_model()
+                    kept_index = document_store.new_index(model.get_sentence_embedding_dimension())
+                yield stream_event({"filename": file.filename, "page_count": page_count}, sse)
+
+                async for page, chunks, sentence_embeddings in run_pipeline(extract_pages(), [split_page, BatchStage(embed_pages, INGEST_QUEUE_SIZE)], INGEST_QUEUE_SIZE):
+                    sentences = [chunk.text for chunk in chunks]
+                    sentence_count += len(sentences)
+                    if keep:
+                        kept_sentences.extend(sentences)
+                        kept_vectors.append(sentence_embeddings)
+                        kept_pages.extend([page] * len(sentences))
+                        if kept_index is not None and len(sentences):
+                            await cpu_executor.run(kept_index.add, sentence_embeddings)
+                    yield stream_event({"page": page, "sentences": sentences, "vectors": encode_vectors(sentence_embeddings, vector_format, JSON_FLOAT_DECIMALS), "offsets": [[chunk.start, chunk.end] for chunk in chunks]}, sse)
+
+                done = {"done": True, "sentence_count": sentence_count}
+                if keep and kept_vectors:
+                    handle = await cpu_executor.run(document_store.put, kept_sentences, np.concatenate(kept_vectors), kept_pages, kept_index)
+                    if handle is None:
+                        done["error"] = "Document is too large to keep on the server."
+                    else:
+                        done.update({"handle": handle, "expires_in": DOCUMENT_HANDLE_TTL_SECONDS})
+                yield stream_event(done, sse)
+            except Exception as e:
+                # The status code has already been sent, so the error is sent as the last event
+                if INSECURE_DEBUG:
+                    yield stream_event({"error": str(e)}, sse)
+                else:
+                    print(e)
+                    yield stream_event({"error": "Internal server error. Set INSECURE_DEBUG to True to view error details from client side."}, sse)
+            finally:
+                if doc is not None:
+                    release_pdf(doc, path, extraction, owned)
+
+        return StreamingResponse(generate_pages(), media_type="text/event-stream" if sse else "application/x-ndjson")
+    except Exception as e:
+        if INSECURE_DEBUG:
+            return JSONResponse(status_code=500, content={"error": str(e)})
+        else:
+            print(e)
+            return JSONResponse(status_code=500, content={"error": "Internal server error. Set INSECURE_DEBUG to True to view error details from client side."})
+
+
 # Filter the non-semantic sentences from a list of sentences
 @app.post('/api/v1/filter-non-semantic-sentences')
 async def filter_non_semantic_sentences_route(sentences: List[str], api_key: str = Depends(valid_api_key_rate_limit)):
@@ -557,12 +1488,12 @@ async def filter_non_semantic_sentences_route(sentences: List[str], api_key: str
 
     try :
         # Log API usage. Note, you could move this to the end of the endpoint and check the response content if you want to log only successful requests.
-        log_api_usage()
+        await run_in_threadpool(log_api_usage)
 
-        filtered_sentences = filter_non_semantic_sentences(sentences)
+        filtered_sentences = await cpu_executor.run(filter_non_semantic_sentences, sentences)
 
         # Return the filtered sentences
-        return JSONResponse(status_code=200, content={"sentences": filtered_sentences})
+        return NumpyJSONResponse(status_code=200, content={"sentences": filtered_sentences})
     except Exception as e:
         if INSECURE_DEBUG:
             return JSONResponse(status_code=500, content={"error": str(e)})
@@ -573,30 +1504,153 @@ async def filter_non_semantic_sentences_route(sentences: List[str], api_key: str
 
 # Perform semantic search on a list of sentences and vectors compared to a query
 @app.post('/api/v1/semantic-search')
-async def semantic_search(query: str, sentences: List[str], vectors: List[List[float]], api_key: str = Depends(valid_api_key_rate_limit)):
+async def semantic_search(query: str, sentences: Optional[List[str]] = None, vectors: Optional[Union[List[List[float]], EncodedVectors]] = None, handle: Optional[str] = None, top_k: Optional[int] = None, min_score: Optional[float] = None, nprobe: Optional[int] = None, mode: str = "dense", lexical_top_n: Optional[int] = None, api_key: str = Depends(valid_api_key_rate_limit)):
     """
     This endpoint performs semantic search on a list of sentences and vectors compared to a query.
+    With mode set, it also (or only) matches the words of the query with BM25, which finds
+    exact identifiers and rare terms that the model handles poorly.
 
     Args:
         query (str): The query to compare to.
         sentences (list): The sentences to compare.
-        vectors (list): The corresponding vectors to compare.
+        vectors (list or dict): The corresponding vectors to compare, as a list of float lists or in a compact vector format.
+        handle (str): The handle of a kept document to search instead of sentences and vectors.
+        top_k (int): The maximum number of results to return. Returns all results if not set.
+        min_score (float): The minimum score of a result. Returns all scores if not set.
+        nprobe (int): For a kept document large enough to have an approximate search index, the number of clusters to search. Defaults to ANN_NPROBE.
+        mode (str): dense (default) scores the vectors, lexical scores the sentences with BM25 (vectors are not needed),
+            hybrid fuses both rankings with reciprocal rank fusion, and rerank scores only the vectors of the best lexical results.
+        lexical_top_n (int): The number of lexical results rescored in rerank mode. Defaults to LEXICAL_TOP_N.
     
     Returns:
-        list: A list containing the sentences and scores.
+        list: A list containing the sentences, scores, and sentence indices, sorted by decreasing score.
+        For a kept document with page numbers, each result also contains the page.
+        The score is the BM25 score in lexical mode, and the fused score in hybrid mode.
     """
 
     try:
-        query_emb = model.encode([query])
+        if mode not in SEARCH_MODES:
+            return JSONResponse(status_code=400, content={"error": f"Invalid search mode. Use one of: {', '.join(SEARCH_MODES)}."})
+
+        page_numbers = None
+        document = None
+        lexical_index = None
+
+        if handle is not None:
+            # Search a kept document
+            document = document_store.get(handle)
+            if document is None:
+                return missing_handle_response(handle)
+            sentences, vectors, page_numbers = document.sentences, document.vectors, document.pages
+            if mode != "dense":
+                # Built on the first lexical search of the document, then kept with it
+                lexical_index = await cpu_executor.run_priority(document_store.get_lexical_index, handle, document)
+        else:
+            if sentences is None or (vectors is None and mode != "lexical"):
+                return JSONResponse(status_code=400, content={"error": "Provide either a handle, or sentences and vectors."})
+
+            if mode != "lexical":
+                # Decode the vectors into a float32 matrix, with the dimension of the model
+                await wait_for_model()
+                try:
+                    vectors = await cpu_executor.run_priority(decode_vectors, vectors, model.get_sentence_embedding_dimension())
+                except ValueError as e:
+                    return JSONResponse(status_code=400, content={"error": f"Invalid vectors: {e}"})
+
+                if len(sentences) != len(vectors):
+                    return JSONResponse(status_code=400, content={"error": "The number of sentences and vectors must match."})
+
+            if mode != "dense":
+                lexical_index = await cpu_executor.run_priority(BM25Index, sentences)
+
+        query_emb = await encode_query(query) if mode != "lexical" else None
+
+        # Score the vectors and sentences, and select only the requested hits
+        indices, scores = await cpu_executor.run_priority(search_with_mode, mode, query, query_emb, vectors, lexical_index, document, top_k, min_score, nprobe, LEXICAL_TOP_N if lexical_top_n is None else lexical_top_n)
+
+        # The scores stay float32 scalars, which are written with their shortest text
+        scores = round_floats(scores, JSON_FLOAT_DECIMALS)
+        if page_numbers is None:
+            doc_score_pairs = [(sentences[i], score, i) for i, score in zip(indices.tolist(), scores)]
+        else:
+            doc_score_pairs = [(sentences[i], score, i, page_numbers[i]) for i, score in zip(indices.tolist(), scores)]
+
+        return NumpyJSONResponse(status_code=200, content={"results": doc_score_pairs})
+
+    except Exception as e:
+        if INSECURE_DEBUG:
+            return JSONResponse(status_code=500, content={"error": str(e)})
+        else:
+            print(e)
+            return JSONResponse(status_code=500, content={"error": "Internal server error. Set INSECURE_DEBUG to True to view error details from client side."})
 
-        scores = util.dot_score(query_emb, vectors)[0].cpu().tolist()
-        #Combine docs & scores
-        doc_score_pairs = list(zip(sentences, scores))
 
-        #Sort by decreasing score
-        doc_score_pairs = sorted(doc_score_pairs, key=lambda x: x[1], reverse=True)
+# Perform semantic search across several documents at once
+@app.post('/api/v1/collection-search')
+async def collection_search(query: str, documents: List[CollectionDocument], top_k: Optional[int] = 10, min_score: Optional[float] = None, nprobe: Optional[int] = None, api_key: str = Depends(valid_api_key_rate_limit)):
+    """
+    This endpoint performs semantic search across several documents at once, and returns
+    the best results of all documents together. The documents are scored in blocks of at
+    most SEARCH_BLOCK_ROWS vectors, without copying them into one matrix. Kept documents
+    with an approximate search index are searched with their index.
+
+    Args:
+        query (str): The query to compare to.
+        documents (list): The documents to search, each with an id and either a handle, or sentences and vectors (and optionally pages).
+        top_k (int): The maximum number of results to return, across all documents. Returns all results if set to null.
+        min_score (float): The minimum score of a result. Returns all scores if not set.
+        nprobe (int): For kept documents large enough to have an approximate search index, the number of clusters to search. Defaults to ANN_NPROBE.
+
+    Returns:
+        list: The results sorted by decreasing score, each with the document id, sentence index, page, sentence, and score.
+    """
 
-        return JSONResponse(status_code=200, content={"results": doc_score_pairs})
+    try:
+        # Log API usage. Note, you could move this to the end of the endpoint and check the response content if you want to log only successful requests.
+        await run_in_threadpool(log_api_usage)
+
+        await wait_for_model()
+        dimension = model.get_sentence_embedding_dimension()
+        matrices, indexes, sentences, pages = [], [], [], []
+        for document in documents:
+            if document.handle is not None:
+                # Search a kept document
+                stored = document_store.get(document.handle)
+                if stored is None:
+                    return missing_handle_response(document.handle, document.id)
+                matrices.append(stored.vectors)
+                indexes.append(stored.index)
+                sentences.append(stored.sentences)
+                pages.append(stored.pages)
+                continue
+
+            if document.sentences is None or document.vectors is None:
+                return JSONResponse(status_code=400, content={"error": f"Provide either a handle, or sentences and vectors: {document.id}."})
+
+            # Decode the vectors into a float32 matrix
+            try:
+                vectors = await cpu_executor.run_priority(decode_vectors, document.vectors, dimension)
+            except ValueError as e:
+                return JSONResponse(status_code=400, content={"error": f"Invalid vectors: {document.id}. {e}"})
+
+            if len(document.sentences) != len(vectors) or (document.pages is not None and len(document.pages) != len(vectors)):
+                return JSONResponse(status_code=400, content={"error": f"The number of sentences, vectors, and pages must match: {document.id}."})
+
+            matrices.append(vectors)
+            indexes.append(None)
+            sentences.append(document.sentences)
+            pages.append(document.pages)
+
+        query_emb = await encode_query(query)
+
+        # Score every document and select only the requested hits of all documents together
+        document_indices, sentence_indices, scores = await cpu_executor.run_priority(search_collection, matrices, indexes, query_emb, top_k, min_score, nprobe)
+
+        results = []
+        for d, i, score in zip(document_indices.tolist(), sentence_indices.tolist(), round_floats(scores, JSON_FLOAT_DECIMALS)):
+            results.append({"document": documents[d].id, "index": i, "page": pages[d][i] if pages[d] is not None else None, "sentence": sentences[d][i], "score": score})
+
+        return NumpyJSONResponse(status_code=200, content={"results": results})
 
     except Exception as e:
         if INSECURE_DEBUG:
@@ -606,6 +1660,22 @@ async def semantic_search(query: str, sentences: List[str], vectors: List[List[f
             return JSONResponse(status_code=500, content={"error": "Internal server error. Set INSECURE_DEBUG to True to view error details from client side."})
 
 
+# Delete a kept document before its handle expires
+@app.delete('/api/v1/documents/{handle}')
+async def delete_document(handle: str, api_key: str = Depends(valid_api_key)):
+    """
+    This endpoint deletes a kept document from server memory.
+
+    Args:
+        handle (str): The handle of the document to delete.
+    """
+
+    if not document_store.delete(handle):
+        return missing_handle_response(handle)
+
+    return NumpyJSONResponse(status_code=200, content={"deleted": handle})
+
+
 # Define a route for the GET of /ratelimit
 @app.get('/ratelimit')
 async def get_ratelimit(api_key: str = Depends(valid_api_key)):
@@ -617,55 +1687,166 @@ async def get_ratelimit(api_key: str = Depends(valid_api_key)):
     json_to_return = {}
     if USE_DAILY_RATE_LIMIT:
         json_to_return["daily_rate_limit"] = daily_rate_limit
-        json_to_return["daily_api_usage"] = get_api_usage_from_last_day()
+        json_to_return["daily_api_usage"] = await run_in_threadpool(get_api_usage_from_last_day)
     if USE_HOURLY_RATE_LIMIT:
         json_to_return["hourly_rate_limit"] = hourly_rate_limit
-        json_to_return["hourly_api_usage"] = get_api_usage_from_last_hour()
+        json_to_return["hourly_api_usage"] = await run_in_threadpool(get_api_usage_from_last_hour)
     if len(json_to_return) == 0:
         json_to_return = {"error": "Rate limit is not enabled."}
 
-    return JSONResponse(status_code=200, content=json_to_return)
+    return NumpyJSONResponse(status_code=200, content=json_to_return)
 
 
-# Define a route for the GET of /usage-data
-@app.post('/api/v1/usage-data')
-async def get_usagedata(api_key: str = Depends(valid_api_key)):
+# Define a route for the GET of /cache-stats
+@app.get('/cache-stats')
+async def get_cache_stats(api_key: str = Depends(valid_api_key)):
     """
-    This endpoint exports all available usage data.
+    This endpoint allows you to view the hit and miss counters of the embedding cache.
     """
 
-    # Return the usage data from the DB
-    usage_data = {}
+    if embedding_cache is None:
+        return NumpyJSONResponse(status_code=200, content={"error": "Embedding cache is not enabled."})
+
+    return NumpyJSONResponse(status_code=200, content=embedding_cache.stats())
+
+
+# Define a route for the GET of /batch-stats
+@app.get('/batch-stats')
+async def get_batch_stats(api_key: str = Depends(valid_api_key)):
+    """
+    This endpoint allows you to view the batch size and queue wait metrics of the encode batcher.
+    """
+
+    if encode_batcher is None:
+        return NumpyJSONResponse(status_code=200, content={"error": "Encode batching is not enabled."})
+
+    return NumpyJSONResponse(status_code=200, content=encode_batcher.stats())
+
+
+# Define a route for the GET of /executor-stats
+@app.get('/executor-stats')
+async def get_executor_stats(api_key: str = Depends(valid_api_key)):
+    """
+    This endpoint allows you to view the concurrency limit and queue depth of the CPU executor.
+    """
+
+    return NumpyJSONResponse(status_code=200, content=cpu_executor.stats())
+
+# Define a route for the GET of /healthz
+@app.get('/healthz')
+async def get_healthz():
+    """
+    This endpoint is the liveness probe: it answers as soon as the server has started,
+    while the model may still be loading.
+    """
+
+    return NumpyJSONResponse(status_code=200, content={"status": "ok"})
+
+# Define a route for the GET of /readyz
+@app.get('/readyz')
+async def get_readyz():
+    """
+    This endpoint is the readiness probe: it returns status code 503 until the model
+    is loaded and warmed up, so traffic is only routed to this worker once inference
+    is fast. Every worker process warms up its own model, so each one answers for itself.
+    """
+
+    loading = start_model_loading()
+    if not loading.done():
+        return JSONResponse(status_code=503, content={"status": "loading"})
+    if loading.exception() is not None:
+        if INSECURE_DEBUG:
+            return JSONResponse(status_code=503, content={"status": "failed", "error": str(loading.exception())})
+        else:
+            return JSONResponse(status_code=503, content={"status": "failed", "error": "Internal server error. Set INSECURE_DEBUG to True to view error details from client side."})
+    return NumpyJSONResponse(status_code=200, content={"status": "ready"})
+
+# Define a route for the GET of /metrics
+@app.get('/metrics')
+async def get_metrics(api_key: str = Depends(valid_api_key)):
+    """
+    This endpoint allows you to scrape the metrics of this worker process in the Prometheus
+    text format: latency histograms per endpoint and per stage, counters of requests,
+    bytes, sentences, tokens, and pages, and the gauges of the caches, queues, and store.
+    """
+
+    return Response(status_code=200, content=metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+# Define a route for the GET of /profiles
+@app.get('/profiles')
+async def get_profiles(api_key: str = Depends(valid_api_key)):
+    """
+    This endpoint allows you to view the ids of the kept request profiles, newest first.
+    """
+
+    if profile_ring is None:
+        return JSONResponse(status_code=400, content={"error": "Profiling is disabled. Set USE_PROFILING to True to profile requests."})
+    return NumpyJSONResponse(status_code=200, content={"profiles": await run_in_threadpool(profile_ring.list)})
+
+# Define a route for the GET of /profiles/{profile_id}
+@app.get('/profiles/{profile_id}')
+async def get_profile(profile_id: str, format: str = "text", sort: str = "cumulative", limit: int = 50, api_key: str = Depends(valid_api_key)):
+    """
+    This endpoint allows you to download a kept request profile, as a text report of its
+    slowest functions, or as a pstats file (format=pstats) for pstats or snakeviz.
+
+    Args:
+        profile_id (str): The id of the profile, from the X-Semfun-Profile-Id header of the profiled response.
+        format (str): text or pstats.
+        sort (str): The sort key of the text report, like cumulative, tottime, or calls.
+        limit (int): The number of functions in the text report.
+    """
+
+    try:
+        path = profile_ring.path(profile_id) if profile_ring is not None else None
+        if path is None:
+            return JSONResponse(status_code=404, content={"error": "Profile not found."})
+        if format == "pstats":
+            return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+        if format != "text":
+            return JSONResponse(status_code=400, content={"error": "Invalid format. Use text or pstats."})
+
+        try:
+            report = await run_in_threadpool(profile_report, path, sort, limit)
+        except KeyError:
+            return JSONResponse(status_code=400, content={"error": f"Invalid sort key: {sort}."})
+        return Response(status_code=200, content=report, media_type="text/plain; charset=utf-8")
+    except Exception as e:
+        if INSECURE_DEBUG:
+            return JSONResponse(status_code=500, content={"error": str(e)})
+        else:
+            print(e)
+            return JSONResponse(status_code=500, content={"error": "Internal server error. Set INSECURE_DEBUG to True to view error details from client side."})
 
-    # Query DB for all usage data
-    with sqlite3.connect(db_path) as conn:
-        c = conn.cursor()
-        c.execute("SELECT * FROM api_usage")
-        results = c.fetchall()
 
-        # Add usage data to return JSON
-        usage_data["usage_data"] = results
+# Define a route for the GET of /usage-data
+@app.post('/api/v1/usage-data')
+async def get_usagedata(since: Optional[int] = None, until: Optional[int] = None, granularity: str = "hour", api_key: str = Depends(valid_api_key)):
+    """
+    This endpoint exports the usage data as the number of API calls per hour or day,
+    from the hourly totals kept in the database.
+
+    Args:
+        since (int): Unix timestamp of the first hour to include. Includes all history if not set.
+        until (int): Unix timestamp of the last hour to include. Includes up to the latest call if not set.
+        granularity (str): "hour" or "day".
+    """
 
-    timestamp_counts = defaultdict(int)
+    if granularity not in ("hour", "day"):
+        return JSONResponse(status_code=400, content={"error": "Invalid granularity. Use hour or day."})
 
-    # Find the minimum and maximum timestamps
-    min_timestamp = min(timestamp_list[0] for timestamp_list in usage_data["usage_data"])
-    max_timestamp = max(timestamp_list[0] for timestamp_list in usage_data["usage_data"])
+    # Query DB for the hourly totals
+    hourly_counts = await run_in_threadpool(get_hourly_api_usage, since, until)
 
-    # Generate all timestamps between min and max with hourly intervals
-    current_timestamp = min_timestamp
-    while current_timestamp <= max_timestamp:
-        dt = datetime.fromtimestamp(current_timestamp)
-        formatted_date_hour = dt.strftime("%Y-%m-%d %H:00")
-        timestamp_counts[formatted_date_hour] = 0
-        current_timestamp += 3600  # Increment by one hour
+    if len(hourly_counts) == 0:
+        return NumpyJSONResponse(status_code=200, content={"usage_data": []})
 
-    # Count the occurrences of each timestamp
-    for timestamp_list in usage_data["usage_data"]:
-        timestamp = timestamp_list[0]
-        dt = datetime.fromtimestamp(timestamp)
-        formatted_date_hour = dt.strftime("%Y-%m-%d %H:00")
-        timestamp_counts[formatted_date_hour] += 1
+    # Add up the hours of each bucket, including the buckets without any calls
+    time_format = "%Y-%m-%d %H:00" if granularity == "hour" else "%Y-%m-%d 00:00"
+    timestamp_counts = {}
+    for hour in range(min(hourly_counts), max(hourly_counts) + 1):
+        formatted_date_hour = datetime.fromtimestamp(hour * 3600).strftime(time_format)
+        timestamp_counts[formatted_date_hour] = timestamp_counts.get(formatted_date_hour, 0) + hourly_counts.get(hour, 0)
 
     result = []
     for formatted_date_hour, count in timestamp_counts.items():
@@ -676,4 +1857,4 @@ async def get_usagedata(api_key: str = Depends(valid_api_key)):
 
     result = {"usage_data": result}
 
-    return JSONResponse(status_code=200, content=result)
+    return NumpyJSONResponse(status_code=200, content=result)
@@ -0,0 +1,284 @@
+"""
+Metrics.py file for Semantic-functions. This file contains the request and stage metrics, in the Prometheus text format.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for the endpoint of the current request, and for timing
+import contextlib
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# Required for finding the route of a request
+from starlette.routing import Match
+from typing import Callable, Dict, List, Tuple
+
+
+# ------------- [Settings] -------------
+
+# Upper bounds of the histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Route of the request being handled, which labels every stage timed on its behalf
+current_endpoint = ContextVar("current_endpoint", default="other")
+
+
+# ------------- [Functions] -------------
+
+# Format the labels of a sample
+def format_labels(names: Tuple[str, ...], values: tuple) -> str:
+    """
+    This function formats label names and values as {name="value",...}, escaping the values.
+    """
+
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+# ------------- [Classes] -------------
+
+class Counter:
+    """
+    A value that only goes up, per set of label values.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, labels: tuple = ()) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> List[Tuple[str, tuple, tuple, float]]:
+        with self._lock:
+            return [(self.name, self.labelnames, labels, value) for labels, value in self._values.items()]
+
+
+class Histogram:
+    """
+    Counts observations (durations, in seconds) in cumulative buckets, and keeps
+    their sum and count, per set of label values.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        # One count per bucket (the last one is +Inf), then the sum
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            values = self._values.get(labels)
+            if values is None:
+                values = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            values[index] += 1
+            values[-1] += value
+
+    def samples(self) -> List[Tuple[str, tuple, tuple, float]]:
+        with self._lock:
+            snapshot = {labels: list(values) for labels, values in self._values.items()}
+
+        samples = []
+        for labels, values in snapshot.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", self.labelnames + ("le",), labels + ("+Inf" if bound == float("inf") else repr(bound),), cumulative))
+            samples.append((f"{self.name}_sum", self.labelnames, labels, values[-1]))
+            samples.append((f"{self.name}_count", self.labelnames, labels, cumulative))
+        return samples
+
+
+class CallbackMetric:
+    """
+    A gauge or counter read from a function when the metrics are rendered, for values
+    that are already tracked elsewhere (like the stats of the caches and queues).
+    The function returns the value of each set of label values.
+    """
+
+    def __init__(self, name: str, documentation: str, kind: str, labelnames: Tuple[str, ...], read: Callable[[], Dict[tuple, float]]):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = labelnames
+        self.read = read
+
+    def samples(self) -> List[Tuple[str, tuple, tuple, float]]:
+        return [(self.name, self.labelnames, labels, value) for labels, value in self.read().items()]
+
+
+class MetricsRegistry:
+    """
+    The metrics of this process. Every sample is labelled with the pid of the
+    process, so that the metrics of several workers stay separate series when they
+    are scraped through the same port. When not enabled, stage returns a shared
+    no-op context manager, so the instrumented code pays almost nothing.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        This function renders every metric in the Prometheus text exposition format.
+        """
+
+        pid = str(os.getpid())
+        lines = []
+        for metric in self.metrics:
+            try:
+                samples = metric.samples()
+            except Exception:
+                # A broken callback must not break the other metrics
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labelnames, labels, value in samples:
+                lines.append(f"{name}{format_labels(('pid',) + labelnames, (pid,) + labels)} {float(value)!r}")
+        return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """
+    Times a block of code as one stage of the current request.
+    """
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        stage_seconds.observe(time.perf_counter() - self.start, (current_endpoint.get(), self.stage))
+        return False
+
+
+class MetricsMiddleware:
+    """
+    Labels every HTTP request with its route (like /api/v1/semantic-search, or
+    "other" for unknown paths), and records its duration, status code, and the
+    bytes of its request and response bodies. The route is also made available to
+    the stages timed while handling the request, including those running on
+    executor threads.
+    """
+
+    def __init__(self, app, routes: list):
+        self.app = app
+        self.routes = routes
+        self._paths: Dict[str, str] = {}
+
+    def route(self, scope) -> str:
+        # Find the route of a request, caching the paths of routes without path parameters
+        path = scope["path"]
+        route = self._paths.get(path)
+        if route is not None:
+            return route
+        for candidate in self.routes:
+            match, _ = candidate.matches(scope)
+            if match != Match.NONE:
+                if "{" not in candidate.path:
+                    self._paths[path] = candidate.path
+                return candidate.path
+        return "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not registry.enabled:
+            return await self.app(scope, receive, send)
+
+        endpoint = self.route(scope)
+        token = current_endpoint.set(endpoint)
+        start = time.perf_counter()
+        status = 500
+        received = sent = 0
+
+        async def counted_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+            return message
+
+        async def counted_send(message):
+            nonlocal status, sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counted_receive, counted_send)
+        finally:
+            request_seconds.observe(time.perf_counter() - start, (endpoint, str(status)))
+            request_bytes.inc(received, (endpoint,))
+            response_bytes.inc(sent, (endpoint,))
+            current_endpoint.reset(token)
+
+
+# ------------- [Metrics] -------------
+
+# The metrics of this process, exported by the /metrics route
+registry = MetricsRegistry()
+
+request_seconds = registry.register(Histogram("semfun_request_seconds", "Duration of HTTP requests, including streaming the response.", ("endpoint", "status")))
+stage_seconds = registry.register(Histogram("semfun_stage_seconds", "Duration of the stages of a request (extract, split, filter, chunk, encode, serialize, render, compress, decompress, log_usage, rate_limit, ...).", ("endpoint", "stage")))
+request_bytes = registry.register(Counter("semfun_request_bytes_total", "Bytes of request bodies received.", ("endpoint",)))
+response_bytes = registry.register(Counter("semfun_response_bytes_total", "Bytes of response bodies sent.", ("endpoint",)))
+request_decompressed_bytes = registry.register(Counter("semfun_request_decompressed_bytes_total", "Bytes of request bodies after decompression (the bytes received, for uncompressed bodies).", ("endpoint",)))
+response_uncompressed_bytes = registry.register(Counter("semfun_response_uncompressed_bytes_total", "Bytes of response bodies before compression (the bytes sent, for uncompressed responses).", ("endpoint",)))
+sentences_encoded = registry.register(Counter("semfun_sentences_encoded_total", "Sentences embedded by the model (cache hits excluded).", ("endpoint",)))
+tokens_chunked = registry.register(Counter("semfun_tokens_total", "Model tokens of the chunks produced by the tokens chunker.", ("endpoint",)))
+pages_extracted = registry.register(Counter("semfun_pages_extracted_total", "Pages of PDF documents extracted.", ("endpoint",)))
+
+# The no-op stage of a disabled registry
+_NO_STAGE = contextlib.nullcontext()
+
+# Time a stage of the current request
+def stage(name: str):
+    """
+    This function returns a context manager that records the duration of its block
+    as the stage name of the current request, in semfun_stage_seconds.
+    """
+
+    return StageTimer(name) if registry.enabled else _NO_STAGE
+
+# Count something for the current request
+def count(counter: Counter, amount: float) -> None:
+    """
+    This function adds amount to counter, labelled with the route of the current request.
+    """
+
+    if registry.enabled:
+        counter.inc(amount, (current_endpoint.get(),))
@@ -0,0 +1,170 @@
+"""
+Pdf_extraction.py file for Semantic-functions. This file contains the process-parallel PDF text extraction.
+
+Run it directly to benchmark sequential against parallel extraction on synthetic PDFs:
+
+    python pdf_extraction.py --pages 50 500 2000
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for the process pool
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Required for making the calls of the threads of a process into PyMuPDF one at a time
+import threading
+
+# Required for type hints (PyMuPDF is imported where it is used, so importing this module stays fast)
+from typing import Dict, List, Tuple
+
+
+# ------------- [Settings] -------------
+
+# PyMuPDF is not thread-safe, so every call into it from the threads of one process holds this lock. The processes of ParallelPDFExtractor each have their own
+FITZ_LOCK = threading.Lock()
+
+
+# ------------- [Functions] -------------
+
+# Extract the text of a range of pages, run in a worker process
+def extract_page_range(path: str, start: int, stop: int) -> Dict[int, str]:
+    """
+    This function opens the PDF file at path and extracts the text of the pages
+    from start up to stop (zero-based, stop excluded).
+
+    Returns:
+        dict: The text of each page, keyed by page number (starting at 1).
+    """
+
+    import fitz
+
+    doc = fitz.open(path)
+    try:
+        return {page_num + 1: doc.load_page(page_num).get_text() for page_num in range(start, stop)}
+    finally:
+        doc.close()
+
+# Split the pages of a document into contiguous ranges
+def split_page_ranges(page_count: int, shards: int) -> List[Tuple[int, int]]:
+    """
+    This function splits page_count pages into at most shards contiguous
+    (start, stop) ranges of nearly equal size.
+    """
+
+    shards = max(1, min(shards, page_count))
+    size, extra = divmod(page_count, shards)
+    ranges = []
+    start = 0
+    for shard in range(shards):
+        stop = start + size + (1 if shard < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+# ------------- [Classes] -------------
+
+class ParallelPDFExtractor:
+    """
+    Extracts the pages of large PDFs on a pool of worker processes. Every worker
+    opens the same PDF file on disk itself, and extracts one range of pages. The
+    ranges are merged back in page order.
+
+    The workers are started with "spawn", so they only import this module and
+    PyMuPDF, and never the model of the API process.
+    """
+
+    def __init__(self, processes: int, shards_per_process: int = 4):
+        self.processes = processes
+        self.shards_per_process = shards_per_process
+        self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Start the pool on first use, in the process that uses it
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def extract_file(self, path: str, page_count: int) -> Dict[int, str]:
+        """
+        This function extracts the text of every page of the PDF file at path.
+
+        Args:
+            path (str): The path of the PDF file.
+            page_count (int): The number of pages of the document.
+
+        Returns:
+            dict: The text of each page, keyed by page number (starting at 1).
+        """
+
+        # More shards than processes, so a process that finishes early picks up more pages
+        pool = self._get_pool()
+        ranges = split_page_ranges(page_count, self.processes * self.shards_per_process)
+        shards = await asyncio.gather(*[asyncio.wrap_future(pool.submit(extract_page_range, path, start, stop)) for start, stop in ranges])
+
+        pages_text = {}
+        for shard in shards:
+            pages_text.update(shard)
+        return pages_text
+
+
+# ------------- [Benchmark] -------------
+
+# Build a synthetic PDF with a full page of text on every page
+def make_synthetic_pdf(page_count: int) -> bytes:
+    import fitz
+
+    doc = fitz.open()
+    sentence = "This synthetic sentence is used to benchmark the extraction of text from PDF pages. "
+    for page_num in range(page_count):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 550, 800), f"Page {page_num + 1}. " + sentence * 30, fontsize=9)
+    contents = doc.tobytes()
+    doc.close()
+    return contents
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+    import time
+
+    import fitz
+
+    parser = argparse.ArgumentParser(description="Benchmark sequential and process-parallel PDF text extraction.")
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 500, 2000], help="Page counts of the synthetic PDFs.")
+    parser.add_argument("--processes", type=int, nargs="+", default=[2, 4, os.cpu_count() or 1], help="Process counts to compare.")
+    args = parser.parse_args()
+
+    extractors = {processes: ParallelPDFExtractor(processes) for processes in sorted(set(args.processes))}
+
+    print(f"{'pages':>6} {'mode':>12} {'seconds':>8} {'pages/s':>8} {'speedup':>8}")
+    for page_count in args.pages:
+        path = os.path.join(tempfile.mkdtemp(), f"synthetic_{page_count}.pdf")
+        with open(path, "wb") as f:
+            f.write(make_synthetic_pdf(page_count))
+
+        start = time.perf_counter()
+        doc = fitz.open(path)
+        sequential = {page_num + 1: doc.load_page(page_num).get_text() for page_num in range(len(doc))}
+        doc.close()
+        sequential_seconds = time.perf_counter() - start
+        print(f"{page_count:>6} {'sequential':>12} {sequential_seconds:>8.2f} {page_count / sequential_seconds:>8.0f} {1:>7.2f}x")
+
+        for processes, extractor in extractors.items():
+            # Warm the pool up first, so process start-up is not measured
+            asyncio.run(extractor.extract_file(path, min(page_count, processes)))
+            start = time.perf_counter()
+            parallel = asyncio.run(extractor.extract_file(path, page_count))
+            seconds = time.perf_counter() - start
+            assert parallel == sequential
+            print(f"{page_count:>6} {f'{processes} procs':>12} {seconds:>8.2f} {page_count / seconds:>8.0f} {sequential_seconds / seconds:>7.2f}x")
+
+        os.remove(path)
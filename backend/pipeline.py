@@ -0,0 +1,121 @@
+"""
+Pipeline.py file for Semantic-functions. This file contains the staged pipeline used to ingest documents.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for running the stages concurrently
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, List
+
+
+# ------------- [Classes] -------------
+
+class BatchStage:
+    """
+    A pipeline stage that takes every item already waiting in its queue (up to
+    max_items) in one call, and returns one result per item. Used for stages that
+    are faster on larger batches, like the model.
+    """
+
+    def __init__(self, fn: Callable[[List[Any]], Awaitable[List[Any]]], max_items: int):
+        self.fn = fn
+        self.max_items = max_items
+
+class _Failure:
+    # Carries an exception of a stage down the pipeline, so the consumer raises it
+    def __init__(self, error: Exception):
+        self.error = error
+
+# Marks the end of the items
+_END = object()
+
+
+# ------------- [Functions] -------------
+
+# Run items through a sequence of stages connected by bounded queues
+async def run_pipeline(source: AsyncIterator, stages: List[Callable[[Any], Awaitable[Any]]], queue_size: int) -> AsyncIterator:
+    """
+    This function runs every item of source through the stages, one task per stage,
+    so that each stage works on the next item while the following stage works on the
+    previous one. The stages are connected by queues of at most queue_size items, so
+    a slow stage (or a slow client) holds back the stages before it instead of
+    letting them buffer the whole document. Results are yielded in source order.
+
+    If a stage raises, the exception is raised here once the items before it have
+    been yielded. When the consumer stops early, every stage is cancelled.
+
+    Args:
+        source (async iterator): The items to process.
+        stages (list): Async functions, each taking the result of the previous stage, or BatchStages.
+        queue_size (int): The maximum number of items waiting between two stages.
+
+    Returns:
+        async iterator: The result of the last stage for each item.
+    """
+
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+
+    async def feed():
+        try:
+            async for item in source:
+                await queues[0].put(item)
+            await queues[0].put(_END)
+        except Exception as e:
+            await queues[0].put(_Failure(e))
+
+    async def work(stage, inbox, outbox):
+        while True:
+            item = await inbox.get()
+            if item is _END or isinstance(item, _Failure):
+                await outbox.put(item)
+                return
+
+            if not isinstance(stage, BatchStage):
+                try:
+                    result = await stage(item)
+                except Exception as e:
+                    await outbox.put(_Failure(e))
+                    return
+                await outbox.put(result)
+                continue
+
+            # Take the items already waiting as well, without waiting for more
+            items, last = [item], None
+            while len(items) < stage.max_items and not inbox.empty():
+                item = inbox.get_nowait()
+                if item is _END or isinstance(item, _Failure):
+                    last = item
+                    break
+                items.append(item)
+            try:
+                results = await stage.fn(items)
+            except Exception as e:
+                await outbox.put(_Failure(e))
+                return
+            for result in results:
+                await outbox.put(result)
+            if last is not None:
+                await outbox.put(last)
+                return
+
+    tasks = [asyncio.create_task(feed())]
+    tasks += [asyncio.create_task(work(stage, queues[i], queues[i + 1])) for i, stage in enumerate(stages)]
+
+    try:
+        while True:
+            item = await queues[-1].get()
+            if item is _END:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
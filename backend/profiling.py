@@ -0,0 +1,239 @@
+"""
+Profiling.py file for Semantic-functions. This file contains the opt-in profiling of single requests, and the on-disk ring buffer of their profiles.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for profiling
+import cProfile
+import io
+import itertools
+import pstats
+import threading
+import time
+from contextvars import ContextVar
+
+# Required for the ring buffer of profiles
+import os
+import re
+
+# Required for writing profiles off the event loop
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+
+
+# ------------- [Settings] -------------
+
+# Request header asking for a profile of the request, sent with the API key
+PROFILE_HEADER = b"x-semfun-profile"
+
+# Response header carrying the id of the profile, to download it from /profiles/{id}
+PROFILE_ID_HEADER = b"x-semfun-profile-id"
+
+# Ids of profiles: a millisecond timestamp, the pid, a sequence number, and the path of the request
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]+-[0-9]+-[0-9]+-[a-z0-9_.-]*$")
+
+# Profile of the request being handled, if it is profiled
+current_profile = ContextVar("current_profile", default=None)
+
+
+# ------------- [Classes] -------------
+
+class RequestProfile:
+    """
+    The cProfile profiles of one request. cProfile only profiles the thread it is
+    enabled on, so the event loop part of the request and every function the request
+    runs on the CPU executor are profiled separately, and merged into one report.
+    """
+
+    def __init__(self, profile_id: str):
+        self.profile_id = profile_id
+        self.closed = False
+        self._profilers: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def add(self, profiler: cProfile.Profile) -> None:
+        with self._lock:
+            if not self.closed:
+                self._profilers.append(profiler)
+
+    def run(self, fn, *args, **kwargs):
+        """
+        This function runs fn(*args, **kwargs) under a profiler on the current thread,
+        and adds its profile to those of the request.
+        """
+
+        if self.closed:
+            return fn(*args, **kwargs)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread (or, on Python 3.12+, in this process)
+            return fn(*args, **kwargs)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            self.add(profiler)
+
+    def stats(self) -> Optional[pstats.Stats]:
+        # Merge the profiles of every thread
+        with self._lock:
+            profilers = list(self._profilers)
+        if not profilers:
+            return None
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        return stats
+
+
+class ProfileRing:
+    """
+    A folder keeping the last max_files profiles, as pstats files that can be read
+    with pstats or snakeviz. Writing a profile deletes the oldest ones beyond
+    max_files, so the folder never grows beyond a bounded size.
+    """
+
+    def __init__(self, directory: str, max_files: int):
+        self.directory = directory
+        self.max_files = max_files
+        self._sequence = itertools.count()
+        os.makedirs(directory, exist_ok=True)
+
+    def new_id(self, path: str) -> str:
+        # The timestamp first, so the ids sort from oldest to newest
+        slug = re.sub(r"[^a-z0-9_.-]+", "_", path.strip("/").lower())[:64]
+        return f"{int(time.time() * 1000)}-{os.getpid()}-{next(self._sequence)}-{slug}"
+
+    def path(self, profile_id: str) -> Optional[str]:
+        """
+        This function returns the path of the profile with this id, or None if the id
+        is invalid or the profile has been deleted.
+        """
+
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.prof")
+        return path if os.path.exists(path) else None
+
+    def list(self) -> List[dict]:
+        """
+        This function returns the id, size, and time of every kept profile, newest first.
+        """
+
+        profiles = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if name.endswith(".prof"):
+                profile_id = name[:-len(".prof")]
+                profiles.append({"id": profile_id, "bytes": os.path.getsize(os.path.join(self.directory, name)), "timestamp": int(profile_id.split("-")[0]) / 1000})
+        return profiles
+
+    def write(self, profile: RequestProfile) -> None:
+        """
+        This function writes the merged profile of a request, and deletes the oldest
+        profiles beyond max_files.
+        """
+
+        stats = profile.stats()
+        if stats is None:
+            return
+        stats.dump_stats(os.path.join(self.directory, f"{profile.profile_id}.prof"))
+
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith(".prof"))
+        for name in names[:max(0, len(names) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                # Another worker deleted it first
+                pass
+
+
+class ProfilingMiddleware:
+    """
+    Profiles the requests sent with the header X-Semfun-Profile and the API key, and
+    one in sample_rate other requests (none if sample_rate is None). The profile is
+    written to the ring buffer when the response is done, and its id is returned in
+    the X-Semfun-Profile-Id header. Other requests are passed through untouched.
+
+    The event loop part of a profile also contains the other requests handled at the
+    same time, and is skipped when another profiled request is already running.
+    """
+
+    def __init__(self, app, ring: ProfileRing, api_key: Optional[str], sample_rate: Optional[int] = None):
+        self.app = app
+        self.ring = ring
+        self.authorization = f"Bearer {api_key}".encode() if api_key else None
+        self.sample_rate = sample_rate
+        self._requests = itertools.count(1)
+        self._loop_profiled = False
+
+    def requested(self, scope) -> bool:
+        # Check for the profile header, only honoured together with the API key
+        headers = dict(scope["headers"])
+        return PROFILE_HEADER in headers and self.authorization is not None and headers.get(b"authorization") == self.authorization
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        sampled = self.sample_rate is not None and next(self._requests) % self.sample_rate == 0
+        if not sampled and not self.requested(scope):
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile(self.ring.new_id(scope["path"]))
+        token = current_profile.set(profile)
+
+        async def profiled_send(message):
+            if message["type"] == "http.response.start":
+                message = dict(message, headers=list(message.get("headers", [])) + [(PROFILE_ID_HEADER, profile.profile_id.encode())])
+            await send(message)
+
+        # Profile the event loop thread, unless another request already does
+        profiler = None
+        if not self._loop_profiled:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                self._loop_profiled = True
+            except ValueError:
+                profiler = None
+
+        try:
+            await self.app(scope, receive, profiled_send)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._loop_profiled = False
+                profile.add(profiler)
+            profile.closed = True
+            current_profile.reset(token)
+            await run_in_threadpool(self.ring.write, profile)
+
+
+# ------------- [Functions] -------------
+
+# Format a saved profile as text
+def profile_report(path: str, sort: str = "cumulative", limit: int = 50) -> str:
+    """
+    This function formats a saved profile as a text report of its slowest functions.
+
+    Args:
+        path (str): The path of the profile.
+        sort (str): The pstats sort key, like cumulative, tottime, or calls.
+        limit (int): The number of functions listed.
+
+    Returns:
+        str: The report.
+    """
+
+    output = io.StringIO()
+    stats = pstats.Stats(path, stream=output)
+    stats.sort_stats(sort).print_stats(limit)
+    return output.getvalue()
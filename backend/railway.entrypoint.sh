@@ -1,3 +1,3 @@
 #!/bin/sh
 
-gunicorn -w 4 -k uvicorn.workers.UvicornWorker main:app --log-level debug --access-logfile - --error-logfile -
\ No newline at end of file
+gunicorn -c gunicorn.conf.py main:app --log-level debug --access-logfile - --error-logfile -
\ No newline at end of file
@@ -0,0 +1,168 @@
+"""
+Rate_limiter.py file for Semantic-functions. This file contains the bucketed sliding-window rate limiter.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for the shared bucket file and its lock
+import os
+import fcntl
+import mmap
+
+# Required for the write-behind persistence
+import sqlite3
+import threading
+import time
+
+# Required for summing buckets
+import numpy as np
+from typing import Optional
+
+
+# ------------- [Settings] -------------
+
+# One bucket per minute for a full day, which is the longest window
+BUCKET_SECONDS = 60
+BUCKET_COUNT = 1440
+
+
+# ------------- [Classes] -------------
+
+class SlidingWindowRateLimiter:
+    """
+    Counts API calls in per-minute buckets, kept in a small memory-mapped file
+    that every worker process shares. A window (e.g. the last hour) is the sum of
+    its buckets, so checking a limit never touches SQLite. Writes to the bucket
+    file are serialized with a file lock, so the counts are exact across workers.
+
+    Every call is also queued in memory and written to SQLite in batches
+    (write-behind): to the api_usage table, and to the hourly totals in the
+    api_usage_hourly table, which keeps the usage history after old api_usage
+    rows are pruned.
+    """
+
+    def __init__(self, bucket_path: str, db_path: str, flush_seconds: float, flush_size: int, retention_days: Optional[int] = None):
+        self.bucket_path = bucket_path
+        self.db_path = db_path
+        self.flush_seconds = flush_seconds
+        self.flush_size = flush_size
+        self.retention_days = retention_days
+
+        # Calls not yet written to SQLite
+        self._pending = []
+        self._last_flush = time.time()
+        self._last_prune = 0
+        self._lock = threading.Lock()
+
+        # The bucket file is opened per process, since a file lock is shared by a forked file descriptor
+        self._pid = None
+        self._file = None
+        self._buckets = None
+
+    def _open(self) -> None:
+        # Open (and on first use create and seed) the shared bucket file for this process
+        self._file = open(self.bucket_path, 'a+b')
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        try:
+            is_new = os.fstat(self._file.fileno()).st_size == 0
+            if is_new:
+                self._file.truncate(BUCKET_COUNT * 2 * 8)
+            self._buckets = np.ndarray((BUCKET_COUNT, 2), dtype=np.int64, buffer=mmap.mmap(self._file.fileno(), BUCKET_COUNT * 2 * 8))
+            if is_new:
+                self._seed(self._buckets)
+        finally:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._pid = os.getpid()
+
+    def _seed(self, buckets: np.ndarray) -> None:
+        # Fill new buckets from the calls of the last day already in SQLite
+        with sqlite3.connect(self.db_path) as conn:
+            c = conn.cursor()
+            c.execute("SELECT api_timestamp / ?, COUNT(*) FROM api_usage WHERE api_timestamp > ? GROUP BY 1",
+                      (BUCKET_SECONDS, int(time.time()) - BUCKET_SECONDS * BUCKET_COUNT))
+            for minute, count in c.fetchall():
+                buckets[minute % BUCKET_COUNT] = (minute, count)
+
+    def _shared_buckets(self) -> np.ndarray:
+        # Return the bucket array of this process
+        if self._pid != os.getpid():
+            self._open()
+        return self._buckets
+
+    def record(self, timestamp: Optional[int] = None) -> None:
+        """
+        This function records one API call.
+        """
+
+        timestamp = int(time.time()) if timestamp is None else timestamp
+        minute = timestamp // BUCKET_SECONDS
+        slot = minute % BUCKET_COUNT
+
+        with self._lock:
+            buckets = self._shared_buckets()
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+            try:
+                # A slot still holding an older minute is reused for the current minute
+                if buckets[slot, 0] != minute:
+                    buckets[slot] = (minute, 0)
+                buckets[slot, 1] += 1
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+            self._pending.append((timestamp,))
+            should_flush = len(self._pending) >= self.flush_size or time.time() - self._last_flush >= self.flush_seconds
+
+        if should_flush:
+            self.flush()
+
+    def count(self, window_seconds: int) -> int:
+        """
+        This function returns the number of API calls in the last window_seconds,
+        counted in whole minutes (including the current minute).
+        """
+
+        current_minute = int(time.time()) // BUCKET_SECONDS
+        oldest_minute = current_minute - window_seconds // BUCKET_SECONDS
+
+        with self._lock:
+            buckets = self._shared_buckets()
+            fcntl.flock(self._file, fcntl.LOCK_SH)
+            try:
+                minutes = buckets[:, 0]
+                return int(buckets[(minutes > oldest_minute) & (minutes <= current_minute), 1].sum())
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def flush(self) -> None:
+        """
+        This function writes the pending API calls to SQLite in one batch, and prunes
+        rows older than the retention period at most once an hour.
+        """
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._last_flush = time.time()
+            prune = self.retention_days is not None and time.time() - self._last_prune >= 3600
+            if prune:
+                self._last_prune = time.time()
+
+        if not pending and not prune:
+            return
+
+        # Add up the batch per hour, so each hourly total is updated once
+        hourly = {}
+        for (timestamp,) in pending:
+            hourly[timestamp // 3600] = hourly.get(timestamp // 3600, 0) + 1
+
+        with sqlite3.connect(self.db_path) as conn:
+            c = conn.cursor()
+            c.executemany("INSERT INTO api_usage VALUES (?)", pending)
+            c.executemany("INSERT INTO api_usage_hourly VALUES (?, ?) ON CONFLICT (hour) DO UPDATE SET count = count + excluded.count", hourly.items())
+            if prune:
+                c.execute("DELETE FROM api_usage WHERE api_timestamp < ?", (int(time.time()) - self.retention_days * 86400,))
+            conn.commit()
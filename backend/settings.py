@@ -21,3 +21,85 @@ exposing any secret variables stored on the server side to client.
 """
 INSECURE_DEBUG = True
 
+"""
+Set INFERENCE_BACKEND to choose how the model runs on CPU. "torch" is the saved
+model in fp32. "torch-int8" quantizes its Linear layers to int8 when loading.
+"onnx" runs the graph exported by download_semantic_model.py with ONNX Runtime.
+Run compare_backends.py to compare their accuracy and throughput on your hardware.
+"""
+INFERENCE_BACKEND = "torch"
+
+
+# Embedding cache settings
+USE_EMBEDDING_CACHE = True # Set to False to send every sentence to the model
+EMBEDDING_CACHE_MAX_MB = 256 # Memory budget for cached vectors, least recently used entries are evicted first
+EMBEDDING_CACHE_DISK_PATH = None # Set to a path (e.g. 'db/embedding_cache.db') to keep cached vectors across restarts
+
+# Query cache settings
+USE_QUERY_CACHE = True # Set to False to encode every search query
+QUERY_CACHE_MAX_MB = 8 # Memory budget for cached query vectors, least recently used entries are evicted first
+
+# Document handle settings (documents are only kept when a request asks for a handle)
+DOCUMENT_HANDLE_TTL_SECONDS = 900 # Seconds before a kept document is deleted from memory
+DOCUMENT_STORE_MAX_MB = 512 # Memory cap for all kept documents, the oldest documents are deleted first
+
+# Collection search settings
+SEARCH_BLOCK_ROWS = 65536 # Maximum number of vectors selected from in one pass of /api/v1/collection-search, which bounds its temporary memory
+
+# Approximate search settings (only for kept documents, searched by handle)
+ANN_MIN_VECTORS = 50000 # Kept documents with at least this many vectors get an approximate search index, smaller ones are always searched exactly. Set to None to disable
+ANN_NLIST = None # Number of clusters of an index, None uses the square root of the number of vectors it is trained on
+ANN_NPROBE = 16 # Default number of clusters searched per query, higher is slower but closer to exact search
+
+# Hybrid search settings (modes of /api/v1/semantic-search that use a BM25 index of the sentences)
+HYBRID_CANDIDATES = 100 # Number of dense and of lexical results fused in hybrid mode
+RRF_K = 60 # Rank constant of reciprocal rank fusion in hybrid mode, higher gives lower ranks more weight
+LEXICAL_TOP_N = 200 # Default number of lexical results rescored with vectors in rerank mode
+
+# Encode batching settings (combines concurrent encode calls into one model.encode)
+USE_ENCODE_BATCHING = True # Set to False to call model.encode separately for every request
+ENCODE_BATCH_WINDOW_MS = 5 # Milliseconds to wait for more requests before running a batch
+ENCODE_MAX_BATCH_SIZE = 256 # Largest number of sentences in one batch, larger encode calls are split into batches of this size. A full batch runs immediately
+
+# CPU executor settings (model.encode, sentence splitting, and file extraction run on these threads)
+CPU_EXECUTOR_WORKERS = 2 # Maximum number of CPU-heavy tasks running at once per worker process, others wait in a queue
+CPU_EXECUTOR_RESERVED_WORKERS = 1 # Threads of CPU_EXECUTOR_WORKERS that only run search queries and scoring, so ingestion never takes all of them. At most CPU_EXECUTOR_WORKERS - 1
+
+# Upload settings (uploaded files are spooled to disk, in the system temp folder, instead of read into memory)
+MAX_UPLOAD_MB = 200 # Uploads larger than this are rejected with status code 413, before they are read. None allows any size
+
+# Chunking settings (how text is combined into the pieces that are embedded, when filter is set)
+CHUNKER = "merge" # merge: merge a sentence under 75 characters with the next one, as filter always did. tokens: pack sentences up to CHUNK_MAX_TOKENS model tokens (this changes the pieces that filter returns). sentence: one sentence per piece
+CHUNK_MAX_TOKENS = 64 # Token budget of one piece, at most the model's max_seq_length. A longer sentence is split instead of truncated by the model
+CHUNK_OVERLAP_SENTENCES = 0 # Number of sentences at the end of a piece that are repeated at the start of the next one
+
+# Ingest pipeline settings (/api/v1/ingest extracts, splits, and embeds pages in overlapping stages)
+INGEST_QUEUE_SIZE = 8 # Maximum number of pages waiting between two stages of the pipeline, and embedded together
+
+# Parallel PDF extraction settings (large PDFs are split into page ranges extracted by separate processes)
+PDF_PARALLEL_MIN_PAGES = 200 # PDFs with at least this many pages are extracted in parallel. None always extracts on one core
+PDF_EXTRACTION_PROCESSES = 2 # Number of extraction processes per worker process, started on first use
+
+# Rate limit storage settings
+RATE_LIMIT_FLUSH_SECONDS = 5 # API calls are written to SQLite in batches, by a background task of each worker, at least this often. /api/v1/usage-data can miss the calls of the last few seconds of other workers, and a killed worker (SIGKILL) loses its calls not yet written
+RATE_LIMIT_FLUSH_SIZE = 100 # Number of API calls that triggers an immediate batch write
+API_USAGE_RETENTION_DAYS = 2 # Days of individual API call rows to keep in SQLite (hourly totals are always kept). None keeps all rows
+
+# Metrics settings (per-stage latency histograms and counters, exported in the Prometheus text format by /metrics)
+USE_METRICS = True # Set to False to skip timing and counting requests, /metrics then only reports the cache, queue, and store gauges
+
+# Profiling settings (profiles of single requests, kept in an on-disk ring buffer and downloaded from /profiles)
+USE_PROFILING = False # Set to True to profile the requests sent with the header X-Semfun-Profile (and the API key). When False, requests pay nothing
+PROFILE_SAMPLE_RATE = None # Also profile one in this many requests of each worker process. None only profiles the requests that ask for it
+PROFILE_DIR = 'db/profiles' # Folder of the kept profiles
+PROFILE_MAX_FILES = 50 # Number of profiles kept, the oldest are deleted first
+
+# JSON response settings (vectors and scores are written from float32, with the shortest text that reads back as the same float32)
+JSON_FLOAT_DECIMALS = None # Round the vectors and scores of JSON responses to this many decimals, to shorten them (4 is about a third shorter than full precision). None keeps full float32 precision
+
+# Compression settings (request bodies sent with Content-Encoding gzip or zstd are decompressed, and large responses are compressed for clients that accept it)
+USE_RESPONSE_COMPRESSION = True # Set to False to always send responses uncompressed. Compressed request bodies are still accepted
+COMPRESSION_MIN_BYTES = 1024 # Responses smaller than this are sent uncompressed, since compressing them saves less than it costs
+GZIP_LEVEL = 1 # zlib level of gzip responses, from 1 (fastest) to 9. Higher levels save little on vectors, and are several times slower
+ZSTD_LEVEL = 1 # Level of zstd responses, from 1 (fastest) to 22. zstd is preferred when the client accepts both
+MAX_DECOMPRESSED_MB = 500 # Compressed request bodies decompressing to more than this are rejected with status code 413. None allows any size
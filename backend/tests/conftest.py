@@ -0,0 +1,95 @@
+"""
+Conftest.py file for Semantic-functions. This file contains the shared fixtures of the tests.
+
+Run the tests from the backend folder:
+
+    python -m pytest tests
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for importing the backend modules and the app
+import concurrent.futures
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# ------------- [Settings] -------------
+
+# API key of the app under test
+API_KEY = "test-api-key-0123456789"
+
+# Dimension of the vectors of the fake model
+DIMENSION = 8
+
+
+# ------------- [Classes] -------------
+
+class FakeModel:
+    """
+    Stands in for the model in route tests: vectors derived from the length of each
+    sentence, without loading or running a real model.
+    """
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return DIMENSION
+
+    def encode(self, sentences: List[str], **kwargs) -> np.ndarray:
+        return np.array([[len(sentence) + i for i in range(DIMENSION)] for sentence in sentences], dtype=np.float32)
+
+
+# ------------- [Fixtures] -------------
+
+@pytest.fixture(scope="session")
+def app_module():
+    """
+    Imports main in a temporary folder (it creates its SQLite files in db/), with
+    the fake model in place of the model, and no encode batcher.
+    """
+
+    os.environ.setdefault("SEMFUN_API_KEY", API_KEY)
+    os.environ.setdefault("SEMFUN_HOURLY_RATE_LIMIT", "1000000")
+    os.environ.setdefault("SEMFUN_DAILY_RATE_LIMIT", "1000000")
+
+    folder = tempfile.mkdtemp(prefix="semfun-tests-")
+    os.makedirs(os.path.join(folder, "db"))
+    previous = os.getcwd()
+    os.chdir(folder)
+    try:
+        import main
+    finally:
+        os.chdir(previous)
+
+    # Pytest restores the working directory, so the SQLite files are reopened by their absolute paths (also by the flush at exit)
+    main.db_path = os.path.join(folder, main.db_path)
+    if getattr(main, "rate_limiter", None) is not None:
+        main.rate_limiter.db_path = main.db_path
+        main.rate_limiter.bucket_path = os.path.join(folder, main.rate_limiter.bucket_path)
+
+    # The model counts as loaded and warmed up
+    loaded = concurrent.futures.Future()
+    loaded.set_result(None)
+    main.model = FakeModel()
+    main.encode_batcher = None
+    main.model_loading = loaded
+
+    return main
+
+@pytest.fixture
+def client(app_module):
+    from fastapi.testclient import TestClient
+
+    with TestClient(app_module.app, headers={"Authorization": f"Bearer {os.environ['SEMFUN_API_KEY']}"}) as client:
+        yield client
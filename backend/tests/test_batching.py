@@ -0,0 +1,105 @@
+"""
+Test_batching.py file for Semantic-functions. This file tests the micro-batching scheduler for model.encode.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for the tests
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+import conftest  # noqa: F401 (puts the backend folder on the path)
+from batching import EncodeBatcher
+from executor import CPUExecutor
+
+
+# ------------- [Helper Functions] -------------
+
+# A slow model whose vector of a sentence is its number, so the order of the rows can be checked
+class SlowEncoder:
+    def __init__(self, seconds_per_batch: float):
+        self.seconds_per_batch = seconds_per_batch
+        self.batch_sizes = []
+        self._lock = threading.Lock()
+
+    def encode(self, sentences):
+        with self._lock:
+            self.batch_sizes.append(len(sentences))
+        time.sleep(self.seconds_per_batch)
+        return np.array([[float(sentence)] for sentence in sentences], dtype=np.float32)
+
+def numbered(count: int, first: int = 0):
+    return [str(number) for number in range(first, first + count)]
+
+
+# ------------- [Tests] -------------
+
+def test_large_job_is_split_into_batches_and_reassembled_in_order():
+    encoder = SlowEncoder(0.01)
+    batcher = EncodeBatcher(encoder.encode, 1, 32, CPUExecutor(2), max_concurrent_batches=2)
+
+    vectors = asyncio.run(batcher.encode(numbered(100)))
+
+    assert vectors[:, 0].tolist() == list(range(100))
+    assert sorted(encoder.batch_sizes) == [4, 32, 32, 32]
+    assert batcher.stats()["slices"] == 4
+
+
+def test_small_job_finishes_while_large_job_is_in_flight():
+    encoder = SlowEncoder(0.2)
+    batcher = EncodeBatcher(encoder.encode, 1, 32, CPUExecutor(2, reserved_workers=1), max_concurrent_batches=1)
+
+    async def scenario():
+        large = asyncio.ensure_future(batcher.encode(numbered(128)))
+        await asyncio.sleep(0.05)
+        query = await batcher.encode(["1000"], priority=True)
+        # The query ran on the reserved thread, while the four batches of the large job wait for the other one
+        assert not large.done()
+        assert query[:, 0].tolist() == [1000.0]
+        return await large
+
+    start = time.perf_counter()
+    vectors = asyncio.run(scenario())
+    assert vectors[:, 0].tolist() == list(range(128))
+    assert time.perf_counter() - start >= 0.8
+    assert encoder.batch_sizes == [32, 1, 32, 32, 32]
+
+
+def test_short_jobs_are_batched_together_before_bulk_slices():
+    encoder = SlowEncoder(0.05)
+    batcher = EncodeBatcher(encoder.encode, 20, 64, CPUExecutor(1), max_concurrent_batches=1)
+
+    async def scenario():
+        large = asyncio.ensure_future(batcher.encode(numbered(192)))
+        await asyncio.sleep(0.01)
+        # Sent while the first bulk batch runs: the two short jobs share the next batch, ahead of the other bulk slices
+        short = await asyncio.gather(batcher.encode(["500"]), batcher.encode(["501", "502"]))
+        assert not large.done()
+        return short, await large
+
+    (first, second), large = asyncio.run(scenario())
+    assert first[:, 0].tolist() == [500.0]
+    assert second[:, 0].tolist() == [501.0, 502.0]
+    assert large[:, 0].tolist() == list(range(192))
+    assert encoder.batch_sizes == [64, 3, 64, 64]
+
+
+def test_errors_reach_every_job_of_the_batch():
+    def failing_encode(sentences):
+        raise RuntimeError("model failed")
+
+    batcher = EncodeBatcher(failing_encode, 5, 32, CPUExecutor(1))
+
+    async def scenario():
+        return await asyncio.gather(batcher.encode(["a"]), batcher.encode(numbered(40)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,56 @@
+"""
+Test_chunking.py file for Semantic-functions. This file tests the sentence splitting and its offsets.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for the tests
+import pytest
+
+import conftest  # noqa: F401 (puts the backend folder on the path)
+from chunking import normalize_text, original_offset, sentence_spans
+
+nltk_tokenize = pytest.importorskip("nltk.tokenize")
+
+
+# ------------- [Helper Functions] -------------
+
+# The normalization of the text before it was split, which the sentences must still match
+def replace_newlines(text: str) -> str:
+    return text.replace('\n', ' ').replace('\\n', ' ').replace('\r\n', ' ')
+
+TEXTS = [
+    "First line.\\nSecond sentence here.\r\nThird one. Fourth.",
+    'He said "Stop."  Then he left.\n\nDr. Smith arrived at 5 p.m. on Jan. 3rd. It rained.',
+    "Tabs\tand   runs  of spaces. ``Quoted'' text, with 'single' quotes... And more?! Yes.",
+    "\\n\\nStarts with literal breaks. Ends with one.\\n",
+]
+
+
+# ------------- [Tests] -------------
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_normalized_text_and_sentences_match_the_baseline(text):
+    normalized, shortened = normalize_text(text)
+    assert normalized == replace_newlines(text)
+    spans = sentence_spans(normalized)
+    assert [normalized[start:end] for start, end in spans] == nltk_tokenize.sent_tokenize(replace_newlines(text))
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_offsets_point_into_the_original_text(text):
+    normalized, shortened = normalize_text(text)
+    for start, end in sentence_spans(normalized):
+        original = text[original_offset(shortened, start):original_offset(shortened, end)]
+        assert replace_newlines(original) == normalized[start:end]
+
+
+def test_text_split_returns_the_baseline_sentences(client):
+    text = TEXTS[0]
+    response = client.post("/api/v1/text-split", json={"text": text})
+    assert response.json()["sentences"] == nltk_tokenize.sent_tokenize(replace_newlines(text))
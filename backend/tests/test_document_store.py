@@ -0,0 +1,60 @@
+"""
+Test_document_store.py file for Semantic-functions. This file tests the handles of kept documents across worker processes.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for the tests
+import os
+
+import conftest  # noqa: F401 (puts the backend folder on the path)
+
+
+# ------------- [Settings] -------------
+
+TEXT = "The model reads every page. It finds the sentences. Then it searches them."
+
+
+# ------------- [Tests] -------------
+
+def test_kept_document_is_searchable_with_one_worker(client):
+    response = client.post("/api/v1/text-split-and-embed", params={"filter": "false", "keep": "true"}, json={"text": TEXT})
+    assert response.status_code == 200
+    handle = response.json()["handle"]
+    assert handle.startswith(f"{os.getpid()}.")
+
+    response = client.post("/api/v1/semantic-search", params={"query": "sentences", "handle": handle})
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 3
+
+
+def test_keep_is_refused_with_several_workers(client, monkeypatch):
+    monkeypatch.setenv("SEMFUN_WORKER_PROCESSES", "2")
+    response = client.post("/api/v1/text-split-and-embed", params={"filter": "false", "keep": "true"}, json={"text": TEXT})
+    assert response.status_code == 400
+    assert "one worker" in response.json()["error"]
+
+    # Without keep, nothing is stored, so several workers are fine
+    response = client.post("/api/v1/text-split-and-embed", params={"filter": "false"}, json={"text": TEXT})
+    assert response.status_code == 200
+
+
+def test_handle_of_another_worker_is_reported(client):
+    # A handle stored by another worker process, which this one cannot read
+    handle = f"{os.getpid() + 1}.abc"
+    response = client.post("/api/v1/semantic-search", params={"query": "sentences", "handle": handle})
+    assert response.status_code == 421
+    assert "another worker" in response.json()["error"]
+
+    response = client.delete(f"/api/v1/documents/{handle}")
+    assert response.status_code == 421
+
+
+def test_unknown_handle_of_this_worker_is_not_found(client):
+    response = client.post("/api/v1/semantic-search", params={"query": "sentences", "handle": f"{os.getpid()}.abc"})
+    assert response.status_code == 404
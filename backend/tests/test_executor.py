@@ -0,0 +1,72 @@
+"""
+Test_executor.py file for Semantic-functions. This file tests the lanes of the CPU executor.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for the tests
+import threading
+
+import pytest
+
+import conftest  # noqa: F401 (puts the backend folder on the path)
+from executor import CPUExecutor
+
+
+# ------------- [Tests] -------------
+
+def test_priority_work_runs_while_bulk_work_fills_the_executor():
+    executor = CPUExecutor(max_workers=2, reserved_workers=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def bulk_job():
+        started.set()
+        release.wait(5)
+        return "bulk"
+
+    try:
+        bulk = [executor.submit(bulk_job) for _ in range(3)]
+        assert started.wait(5)
+        # The one non-reserved thread is busy, so the other bulk jobs wait, but priority work still runs
+        assert executor.submit(sum, [1, 2, 3], priority=True).result(timeout=5) == 6
+        assert executor.stats()["queued"] == 2
+        assert not any(future.done() for future in bulk)
+    finally:
+        release.set()
+    assert [future.result(timeout=5) for future in bulk] == ["bulk"] * 3
+    assert executor.stats()["completed"] == 4
+
+
+def test_priority_work_is_taken_before_queued_bulk_work():
+    executor = CPUExecutor(max_workers=1)
+    release = threading.Event()
+    order = []
+
+    blocker = executor.submit(release.wait, 5)
+    bulk = executor.submit(order.append, "bulk")
+    priority = executor.submit(order.append, "priority", priority=True)
+    release.set()
+    for future in (blocker, bulk, priority):
+        future.result(timeout=5)
+    assert order == ["priority", "bulk"]
+
+
+def test_errors_and_cancellation():
+    executor = CPUExecutor(max_workers=1)
+    release = threading.Event()
+
+    blocker = executor.submit(release.wait, 5)
+    cancelled = executor.submit(pytest.fail, "a cancelled job must not run")
+    assert cancelled.cancel()
+    failed = executor.submit(int, "not a number")
+    release.set()
+    blocker.result(timeout=5)
+    with pytest.raises(ValueError):
+        failed.result(timeout=5)
+    assert executor.stats()["queued"] == 0
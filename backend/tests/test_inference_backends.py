@@ -0,0 +1,105 @@
+"""
+Test_inference_backends.py file for Semantic-functions. This file tests that the model can encode on several threads at once.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for the tests
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import conftest  # noqa: F401 (puts the backend folder on the path)
+from executor import CPUExecutor
+from inference_backends import serialize_tokenize
+
+
+# ------------- [Helper Functions] -------------
+
+# A model whose tokenizer fails like a fast tokenizer when two threads use it at once
+class BorrowCheckingModel:
+    def __init__(self):
+        self._borrowed = False
+
+    def tokenize(self, texts):
+        if self._borrowed:
+            raise RuntimeError("Already borrowed")
+        self._borrowed = True
+        try:
+            time.sleep(0.005)
+            return [len(text) for text in texts]
+        finally:
+            self._borrowed = False
+
+    def encode(self, sentences):
+        lengths = self.tokenize(sentences)
+        # The forward pass, which may run on several threads at once
+        time.sleep(0.005)
+        return np.array([[length] for length in lengths], dtype=np.float32)
+
+# Run encode on both lanes of a CPU executor at once, many times
+def encode_on_both_lanes(model, sentences, rounds: int = 20):
+    executor = CPUExecutor(4, reserved_workers=1)
+    futures = []
+    for _ in range(rounds):
+        futures.append(executor.submit(model.encode, sentences, priority=True))
+        futures.extend(executor.submit(model.encode, sentences) for _ in range(3))
+    return [future.result(timeout=60) for future in futures]
+
+# Save a tiny BERT model with a word-level fast tokenizer, and load it as a SentenceTransformer
+def tiny_sentence_transformer():
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("sentence_transformers")
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import BertConfig, BertModel, PreTrainedTokenizerFast
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Pooling, Transformer
+
+    words = "the model reads every page of a report and finds sentences".split()
+    vocab = {token: i for i, token in enumerate(["[PAD]", "[UNK]", "[CLS]", "[SEP]"] + words)}
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+
+    path = tempfile.mkdtemp(prefix="semfun-tests-")
+    torch.manual_seed(0)
+    BertModel(BertConfig(vocab_size=len(vocab), hidden_size=16, num_hidden_layers=1, num_attention_heads=2, intermediate_size=32)).save_pretrained(path)
+    PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="[UNK]", pad_token="[PAD]", cls_token="[CLS]", sep_token="[SEP]").save_pretrained(path)
+
+    transformer = Transformer(path, max_seq_length=32)
+    model = SentenceTransformer(modules=[transformer, Pooling(transformer.get_word_embedding_dimension())], device="cpu")
+    model.eval()
+    return model
+
+
+# ------------- [Tests] -------------
+
+def test_concurrent_encodes_fail_without_the_lock():
+    with pytest.raises(RuntimeError, match="Already borrowed"):
+        encode_on_both_lanes(BorrowCheckingModel(), ["a sentence", "another one"])
+
+
+def test_concurrent_encodes_are_safe_with_the_lock():
+    results = encode_on_both_lanes(serialize_tokenize(BorrowCheckingModel()), ["a sentence", "another one"])
+    assert all(result[:, 0].tolist() == [10.0, 11.0] for result in results)
+
+
+def test_concurrent_encodes_of_a_sentence_transformer():
+    model = serialize_tokenize(tiny_sentence_transformer())
+    short = ["the model reads"]
+    long = ["the model reads every page of a report and finds sentences " * (i % 3 + 1) for i in range(16)]
+    expected_short, expected_long = model.encode(short), model.encode(long)
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(model.encode, short if i % 2 else long) for i in range(32)]
+        results = [future.result(timeout=60) for future in futures]
+
+    for i, result in enumerate(results):
+        np.testing.assert_allclose(result, expected_short if i % 2 else expected_long, rtol=1e-5, atol=1e-6)
@@ -0,0 +1,124 @@
+"""
+Test_pdf_streaming.py file for Semantic-functions. This file tests the streamed extraction of PDF pages.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for the tests
+import json
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+import uploads
+from pdf_extraction import make_synthetic_pdf
+
+
+# ------------- [Helper Functions] -------------
+
+# Write a synthetic PDF to a temporary file
+def write_pdf(page_count: int) -> str:
+    path = os.path.join(tempfile.mkdtemp(prefix="semfun-tests-"), "document.pdf")
+    with open(path, "wb") as f:
+        f.write(make_synthetic_pdf(page_count))
+    return path
+
+# Wait until a condition holds, or a few seconds have passed
+def wait_until(condition) -> bool:
+    deadline = time.time() + 5
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+# ------------- [Tests] -------------
+
+def test_release_waits_for_the_running_page_job(app_module):
+    path = write_pdf(2)
+    doc, page_count = app_module.open_pdf(path)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_page_job():
+        started.set()
+        release.wait(5)
+        return app_module.pdf_page_to_text(doc, 1)
+
+    extraction = app_module.cpu_executor.submit(slow_page_job)
+    assert started.wait(5)
+    # The client went away while the page was being extracted
+    app_module.release_pdf(doc, path, extraction)
+    time.sleep(0.05)
+    assert not doc.is_closed and os.path.exists(path)
+
+    release.set()
+    assert "Page 2." in extraction.result(timeout=5)
+    assert wait_until(lambda: not os.path.exists(path))
+    assert doc.is_closed
+
+
+def test_release_after_a_cancelled_page_job(app_module):
+    path = write_pdf(1)
+    doc, page_count = app_module.open_pdf(path)
+    extraction = app_module.cpu_executor.submit(app_module.pdf_page_to_text, doc, 0)
+    extraction.cancel()
+    app_module.release_pdf(doc, path, extraction)
+    assert wait_until(lambda: not os.path.exists(path))
+    assert doc.is_closed
+
+
+def test_stream_sends_every_page(client):
+    path = write_pdf(3)
+    with open(path, "rb") as f:
+        response = client.post("/api/v1/pdf-to-text-stream/", files={"file": ("document.pdf", f, "application/pdf")})
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0] == {"filename": "document.pdf", "page_count": 3}
+    assert [event["page"] for event in events[1:]] == [1, 2, 3]
+    assert all(f"Page {event['page']}." in event["text"] for event in events[1:])
+
+
+def test_ingest_streams_every_page_and_removes_the_file(client, app_module, monkeypatch):
+    path = write_pdf(3)
+    spooled = []
+    spool_upload = app_module.spool_upload
+    monkeypatch.setattr(app_module, "spool_upload", lambda *args: spooled.append(spool_upload(*args)) or spooled[-1])
+
+    with open(path, "rb") as f:
+        response = client.post("/api/v1/ingest", params={"filter": "false"}, files={"file": ("document.pdf", f, "application/pdf")})
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0] == {"filename": "document.pdf", "page_count": 3}
+    assert sorted(event["page"] for event in events[1:-1]) == [1, 2, 3]
+    assert events[-1]["done"] is True
+    path, owned = spooled[0]
+    assert owned
+    assert wait_until(lambda: not os.path.exists(path))
+
+
+def test_large_upload_is_read_from_the_spool_of_starlette(client, app_module, monkeypatch):
+    starlette_formparsers = pytest.importorskip("starlette.formparsers")
+    # Every upload rolls over to disk, as uploads larger than 1 MB do
+    monkeypatch.setattr(starlette_formparsers.MultiPartParser, "max_file_size", 1)
+    copies = []
+    mkstemp = uploads.tempfile.mkstemp
+    monkeypatch.setattr(uploads.tempfile, "mkstemp", lambda *args, **kwargs: copies.append(mkstemp(*args, **kwargs)) or copies[-1])
+
+    path = write_pdf(3)
+    with open(path, "rb") as f:
+        response = client.post("/api/v1/pdf-to-text/", files={"file": ("document.pdf", f, "application/pdf")})
+    assert response.status_code == 200
+    assert sorted(response.json()["text"]) == ["1", "2", "3"]
+    assert copies == []
+
+    with open(path, "rb") as f:
+        response = client.post("/api/v1/pdf-to-text-stream/", files={"file": ("document.pdf", f, "application/pdf")})
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["page"] for event in events[1:]] == [1, 2, 3]
+    assert copies == []
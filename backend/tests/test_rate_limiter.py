@@ -0,0 +1,55 @@
+"""
+Test_rate_limiter.py file for Semantic-functions. This file tests the batched writes of API usage to SQLite.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for the tests
+import sqlite3
+import time
+
+import pytest
+
+
+# ------------- [Helper Functions] -------------
+
+# Count the API calls written to SQLite
+def written_calls(app_module) -> int:
+    with sqlite3.connect(app_module.db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM api_usage").fetchone()[0]
+
+
+# ------------- [Tests] -------------
+
+def test_idle_worker_writes_its_pending_calls(app_module, monkeypatch):
+    if getattr(app_module, "rate_limiter", None) is None:
+        pytest.skip("Rate limits are disabled.")
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(app_module, "RATE_LIMIT_FLUSH_SECONDS", 0.05)
+    with TestClient(app_module.app):
+        app_module.rate_limiter.flush()
+        before = written_calls(app_module)
+        # One call, then no more calls: the background task writes it anyway
+        app_module.log_api_usage()
+        deadline = time.time() + 5
+        while written_calls(app_module) == before and time.time() < deadline:
+            time.sleep(0.02)
+        assert written_calls(app_module) == before + 1
+
+
+def test_pending_calls_are_written_on_shutdown(app_module):
+    if getattr(app_module, "rate_limiter", None) is None:
+        pytest.skip("Rate limits are disabled.")
+    from fastapi.testclient import TestClient
+
+    with TestClient(app_module.app):
+        app_module.rate_limiter.flush()
+        before = written_calls(app_module)
+        app_module.log_api_usage()
+    assert written_calls(app_module) == before + 1
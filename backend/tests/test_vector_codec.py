@@ -0,0 +1,127 @@
+"""
+Test_vector_codec.py file for Semantic-functions. This file tests the compact wire formats for embedding vectors.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for the tests
+import base64
+import json
+
+import numpy as np
+import pytest
+
+from conftest import DIMENSION
+from vector_codec import EncodedVectors, decode_vectors, encode_vectors, round_floats, vectors_to_npy
+
+
+# ------------- [Helper Functions] -------------
+
+# Make a matrix of vectors like those of the model
+def make_vectors(rows: int = 50, dimension: int = 384) -> np.ndarray:
+    return np.random.default_rng(0).standard_normal((rows, dimension), dtype=np.float32)
+
+# Send encoded vectors through JSON and decode them, as a client sending them back would
+def round_trip(vectors: np.ndarray, vector_format: str) -> np.ndarray:
+    encoded = json.loads(json.dumps(encode_vectors(vectors, vector_format)))
+    return decode_vectors(EncodedVectors(**encoded))
+
+
+# ------------- [Tests] -------------
+
+@pytest.mark.parametrize("vector_format", ["float32", "npy"])
+def test_binary_formats_round_trip_bit_exact(vector_format):
+    vectors = make_vectors()
+    decoded = round_trip(vectors, vector_format)
+    assert decoded.dtype == np.float32
+    assert decoded.shape == vectors.shape
+    assert decoded.tobytes() == vectors.tobytes()
+
+@pytest.mark.parametrize("vector_format", ["float32", "npy"])
+def test_binary_formats_match_the_json_form(vector_format):
+    vectors = make_vectors()
+    from_json = decode_vectors(json.loads(json.dumps(encode_vectors(vectors, "json").tolist())))
+    assert round_trip(vectors, vector_format).tobytes() == from_json.tobytes()
+
+def test_float16_stays_within_tolerance():
+    vectors = make_vectors()
+    decoded = round_trip(vectors, "float16")
+    assert decoded.dtype == np.float32
+    assert decoded.shape == vectors.shape
+    # float16 keeps 11 significant bits
+    np.testing.assert_allclose(decoded, vectors, rtol=2 ** -11, atol=2 ** -24)
+
+def test_json_format_keeps_float32_values():
+    vectors = make_vectors()
+    encoded = encode_vectors(vectors, "json")
+    assert encoded.dtype == np.float32 and encoded.flags["C_CONTIGUOUS"]
+    assert encoded.tobytes() == vectors.tobytes()
+
+def test_round_floats_converts_to_contiguous_float32():
+    values = np.arange(12, dtype=np.float64).reshape(3, 4).T / 7
+    rounded = round_floats(values)
+    assert rounded.dtype == np.float32 and rounded.flags["C_CONTIGUOUS"]
+    assert rounded.tobytes() == values.astype(np.float32).tobytes()
+
+def test_round_floats_rounds_to_decimals():
+    values = np.array([0.123456, -1.987654, 2.5], dtype=np.float32)
+    rounded = round_floats(values, 2)
+    assert rounded.dtype == np.float32
+    np.testing.assert_array_equal(rounded, np.array([0.12, -1.99, 2.5], dtype=np.float32))
+
+def test_empty_matrix_round_trips():
+    vectors = np.zeros((0, 16), dtype=np.float32)
+    for vector_format in ("float32", "float16", "npy"):
+        assert round_trip(vectors, vector_format).shape == (0, 16)
+    assert decode_vectors([], 16).shape == (0, 16)
+
+@pytest.mark.parametrize("vectors", [
+    EncodedVectors(format="float32", shape=[2, 4], data="not base64!"),
+    EncodedVectors(format="float32", shape=[3, 4], data=base64.b64encode(np.zeros((2, 4), dtype="<f4").tobytes()).decode()),
+    EncodedVectors(format="float32", shape=[8], data=base64.b64encode(np.zeros(8, dtype="<f4").tobytes()).decode()),
+    EncodedVectors(format="float16", shape=None, data=base64.b64encode(np.zeros(8, dtype="<f2").tobytes()).decode()),
+    EncodedVectors(format="npy", data=base64.b64encode(b"not an npy file").decode()),
+    EncodedVectors(format="npy", data=""),
+    EncodedVectors(format="npy", data=base64.b64encode(vectors_to_npy(np.zeros(8, dtype=np.float32))).decode()),
+    EncodedVectors(format="npy", data=base64.b64encode(vectors_to_npy(np.zeros((2, 4), dtype=np.int32))).decode()),
+    EncodedVectors(format="float64", shape=[2, 4], data=""),
+    [[1.0, 2.0], [3.0]],
+    [1.0, 2.0],
+])
+def test_invalid_vectors_raise_value_error(vectors):
+    with pytest.raises(ValueError):
+        decode_vectors(vectors)
+
+def test_wrong_dimension_raises_value_error():
+    with pytest.raises(ValueError):
+        decode_vectors(make_vectors(4, 16), 384)
+
+@pytest.mark.parametrize("vectors", [
+    {"format": "float32", "shape": [2, DIMENSION], "data": "%%%"},
+    {"format": "float32", "shape": [3, DIMENSION], "data": base64.b64encode(np.zeros((2, DIMENSION), dtype="<f4").tobytes()).decode()},
+    {"format": "npy", "data": base64.b64encode(b"garbage").decode()},
+    [[0.5] * (DIMENSION + 1), [0.5] * (DIMENSION + 1)],
+])
+def test_semantic_search_rejects_invalid_vectors_with_400(client, vectors):
+    response = client.post("/api/v1/semantic-search", params={"query": "a query"}, json={"sentences": ["One.", "Two."], "vectors": vectors})
+    assert response.status_code == 400
+    assert "Invalid vectors" in response.json()["error"]
+
+def test_collection_search_rejects_invalid_vectors_with_400(client):
+    documents = [{"id": "doc", "sentences": ["One.", "Two."], "vectors": {"format": "float16", "shape": [2, DIMENSION + 1], "data": "AAAA"}}]
+    response = client.post("/api/v1/collection-search", params={"query": "a query"}, json=documents)
+    assert response.status_code == 400
+
+def test_semantic_search_accepts_every_format(client):
+    vectors = make_vectors(2, DIMENSION)
+    for vector_format in ("json", "float32", "float16", "npy"):
+        encoded = encode_vectors(vectors, vector_format)
+        encoded = encoded.tolist() if vector_format == "json" else encoded
+        response = client.post("/api/v1/semantic-search", params={"query": "a query"}, json={"sentences": ["One.", "Two."], "vectors": encoded})
+        assert response.status_code == 200, response.text
+        assert len(response.json()["results"]) == 2
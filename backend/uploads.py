@@ -0,0 +1,125 @@
+"""
+Uploads.py file for Semantic-functions. This file contains the upload size limit and the spooling of uploaded files to disk.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for spooling uploads to disk
+import os
+import shutil
+import tempfile
+
+# Required for rejecting uploads that are too large
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from typing import Optional, Tuple
+
+
+# ------------- [Settings] -------------
+
+# Size of the chunks copied from an upload to its spool file
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+
+# ------------- [Classes] -------------
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects file uploads (multipart/form-data requests) larger than max_bytes with
+    status code 413. A request announcing a larger Content-Length is rejected before
+    any of its body is read, and a request without one is rejected as soon as the
+    bytes received pass the limit, so an upload is never spooled beyond max_bytes.
+    """
+
+    def __init__(self, app, max_bytes: Optional[int] = None):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.max_bytes is None:
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            return await self.app(scope, receive, send)
+
+        detail = f"File too large. The maximum upload size is {self.max_bytes // (1024 * 1024)} MB."
+
+        # Reject early when the announced size is already too large
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse(status_code=413, content={"detail": detail})
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            # Count the body while it is parsed, for uploads sent without a Content-Length
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+# ------------- [Functions] -------------
+
+# Find the file on disk of an upload that has rolled over from memory
+def rolled_spool_path(file) -> Optional[str]:
+    """
+    This function returns a path of the file on disk behind an upload, if the
+    SpooledTemporaryFile of the upload has rolled over from memory to disk, and
+    None otherwise. On Linux, the rolled over file has no name (its name is its file
+    descriptor), so the path goes through /proc, with the pid of this process
+    so that the processes extracting pages in parallel can open it too.
+    """
+
+    if not getattr(file, "_rolled", False):
+        return None
+    name = file._file.name
+    if isinstance(name, str):
+        return name if os.path.exists(name) else None
+    path = f"/proc/{os.getpid()}/fd/{name}"
+    return path if os.path.exists(path) else None
+
+# Give libraries that open files by path a file on disk with the upload
+def spool_upload(file, suffix: str = "") -> Tuple[str, bool]:
+    """
+    This function returns a path to an uploaded file on disk, so the upload is never
+    held in memory as a whole. Libraries that open files by path (like PyMuPDF) then
+    read only the parts they need. An upload larger than the spool size of Starlette
+    is already on disk, and its path is returned as is. A smaller upload, still in
+    memory, is copied to a named temporary file in chunks, which the caller removes
+    when done. The file of the upload must stay open while the path is used to open
+    the file, which it does until the request has returned.
+
+    Args:
+        file (file object): The file object of the upload (UploadFile.file).
+        suffix (str): The suffix of the temporary file name.
+
+    Returns:
+        tuple: The path of the file, and whether it is a temporary file that the caller removes.
+    """
+
+    path = rolled_spool_path(file)
+    if path is not None:
+        return path, False
+
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            file.seek(0)
+            shutil.copyfileobj(file, spool, SPOOL_CHUNK_BYTES)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, True
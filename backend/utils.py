@@ -7,6 +7,12 @@ Date: 2023-12-28
 License: MIT
 """
 
+# ------------- [Import Libraries] -------------
+
+# Required for selecting top scores
+import numpy as np
+
+
 # ------------- [Functions] -------------
 
 # Function to format message to green with prefix newline.
@@ -20,3 +26,111 @@ def yellow_warning(message):
 # Function to format message to red with prefix newline.
 def red_critical(message):
     return f'\n\033[91m {message} \033[0m'
+
+# Function to select the indices of the highest scores, best first.
+def top_k_indices(scores, top_k=None, min_score=None):
+    """
+    Selects the indices of the top_k highest scores that are at least min_score,
+    sorted by decreasing score. Uses a partial selection (argpartition) instead of
+    a full sort, so the cost is O(n + k log k). Ties keep their original order.
+
+    Args:
+        scores (numpy.ndarray): 1D array of scores.
+        top_k (int): Maximum number of indices to return. None returns all.
+        min_score (float): Minimum score to return. None applies no threshold.
+
+    Returns:
+        numpy.ndarray: The selected indices.
+    """
+
+    candidates = np.arange(len(scores)) if min_score is None else np.flatnonzero(scores >= min_score)
+    if top_k is not None:
+        if top_k < 1:
+            return candidates[:0]
+        if top_k < len(candidates):
+            candidates = np.sort(candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]])
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+# Function to select the highest scores across several matrices, scoring a bounded block of rows at a time.
+def blocked_top_k(matrices, query, top_k=None, min_score=None, block_rows=65536):
+    """
+    Scores the rows of every matrix against the query (dot product), and selects the
+    top_k highest scores that are at least min_score across all of them, sorted by
+    decreasing score. The matrices are never stacked into one matrix: each one is
+    scored in place, in slices of at most block_rows rows, and the scores are
+    selected once per block of block_rows rows. Only the best top_k candidates are
+    kept between blocks, so the temporary memory stays bounded however many rows
+    there are. Ties keep matrix and row order.
+
+    Args:
+        matrices (list): 2D numpy arrays with the same number of columns as the query.
+        query (numpy.ndarray): 1D query vector.
+        top_k (int): Maximum number of results to return. None returns all.
+        min_score (float): Minimum score to return. None applies no threshold.
+        block_rows (int): Maximum number of rows selected from at once.
+
+    Returns:
+        tuple: The matrix index, row index, and score of each result.
+    """
+
+    best_matrix = np.zeros(0, dtype=np.int64)
+    best_row = np.zeros(0, dtype=np.int64)
+    best_score = np.zeros(0, dtype=np.float32)
+
+    def select(parts):
+        # Merge the best rows of one block of (matrix index, first row, scores) parts into the candidates
+        nonlocal best_matrix, best_row, best_score
+        scores = np.concatenate([part_scores for _, _, part_scores in parts])
+        selected = top_k_indices(scores, top_k, min_score)
+        matrix_ids = np.concatenate([np.full(len(part_scores), index, dtype=np.int64) for index, _, part_scores in parts])
+        row_ids = np.concatenate([np.arange(offset, offset + len(part_scores), dtype=np.int64) for _, offset, part_scores in parts])
+
+        best_matrix = np.concatenate([best_matrix, matrix_ids[selected]])
+        best_row = np.concatenate([best_row, row_ids[selected]])
+        best_score = np.concatenate([best_score, scores[selected]])
+        keep = np.sort(top_k_indices(best_score, top_k))
+        best_matrix, best_row, best_score = best_matrix[keep], best_row[keep], best_score[keep]
+
+    parts, part_rows = [], 0
+    for index, matrix in enumerate(matrices):
+        for offset in range(0, len(matrix), block_rows):
+            part_scores = matrix[offset:offset + block_rows] @ query
+            if part_rows + len(part_scores) > block_rows:
+                select(parts)
+                parts, part_rows = [], 0
+            parts.append((index, offset, part_scores))
+            part_rows += len(part_scores)
+    if parts:
+        select(parts)
+
+    order = top_k_indices(best_score, top_k)
+    return best_matrix[order], best_row[order], best_score[order]
+
+# Function to combine several rankings of the same items into one with reciprocal rank fusion.
+def reciprocal_rank_fusion(rankings, k=60, top_k=None):
+    """
+    Combines rankings of the same items, each best first, into one ranking. Every
+    item scores the sum of 1 / (k + rank) over the rankings it appears in (rank
+    starting at 1), so only ranks are compared, never the scores behind them, and an
+    item found by several rankings rises above an item found by one. Ties keep the
+    order of first appearance.
+
+    Args:
+        rankings (list): 1D integer arrays of item ids, each sorted best first.
+        k (int): The rank constant. A higher k gives lower ranks more weight.
+        top_k (int): Maximum number of items to return. None returns all.
+
+    Returns:
+        tuple: The item ids sorted by decreasing fused score, and their fused scores.
+    """
+
+    ids = np.concatenate([np.asarray(ranking, dtype=np.int64) for ranking in rankings] + [np.zeros(0, dtype=np.int64)])
+    contributions = np.concatenate([1.0 / (k + np.arange(1, len(ranking) + 1)) for ranking in rankings] + [np.zeros(0)])
+    items, first, inverse = np.unique(ids, return_index=True, return_inverse=True)
+    scores = np.bincount(inverse, weights=contributions, minlength=len(items)).astype(np.float64)
+
+    # Put the items in order of first appearance, so top_k_indices keeps that order for ties
+    order = np.argsort(first, kind='stable')
+    items, scores = items[order], scores[order]
+    selected = top_k_indices(scores, top_k)
+    return items[selected], scores[selected]
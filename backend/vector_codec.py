@@ -0,0 +1,151 @@
+"""
+Vector_codec.py file for Semantic-functions. This file contains the compact wire formats for embedding vectors.
+
+Author: Benjamin Klieger
+Version: 0.1.0-beta
+Date: 2026-10-18
+License: MIT
+"""
+
+# ------------- [Import Libraries] -------------
+
+# Required for encoding binary data in JSON
+import base64
+import io
+
+# Required for vector handling
+import numpy as np
+
+# Required for timing the encoding as a stage of the request
+from metrics import stage
+
+# Required libraries from Pydantic for request validation
+from pydantic import BaseModel
+from typing import List, Optional, Union
+
+
+# ------------- [Settings] -------------
+
+# Supported vector formats. "json" is a list of float lists, "float32" and "float16" are
+# base64 encoded little-endian matrices, and "npy" is a base64 encoded .npy file.
+VECTOR_FORMATS = ("json", "float32", "float16", "npy")
+
+# Media type of a raw .npy response
+NPY_MEDIA_TYPE = "application/x-npy"
+
+# Data types accepted when decoding vectors from a request
+BINARY_DTYPES = {"float32": "<f4", "float16": "<f2"}
+
+
+# ------------- [Classes] -------------
+
+class EncodedVectors(BaseModel):
+    """
+    A matrix of vectors in one of the compact formats. For "float32" and "float16",
+    shape is required and data is the base64 encoded little-endian matrix. For "npy",
+    data is a base64 encoded .npy file, which carries its own dtype and shape.
+    """
+    format: str
+    shape: Optional[List[int]] = None
+    data: str
+
+
+# ------------- [Functions] -------------
+
+# Encode a matrix of vectors for a JSON response
+def encode_vectors(vectors: np.ndarray, vector_format: str, decimals: Optional[int] = None) -> Union[np.ndarray, dict]:
+    """
+    This function encodes a matrix of vectors in the requested format.
+
+    Args:
+        vectors (numpy.ndarray): The 2D matrix of vectors to encode.
+        vector_format (str): One of VECTOR_FORMATS.
+        decimals (int): For "json", the number of decimals the vectors are rounded to. Keeps full float32 precision if None.
+
+    Returns:
+        numpy.ndarray or dict: For "json", a float32 matrix, written as a list of float lists by
+        json_codec.dumps without converting it to Python floats. Otherwise an EncodedVectors dictionary.
+    """
+
+    vectors = np.asarray(vectors)
+    with stage("serialize"):
+        if vector_format == "json":
+            return round_floats(vectors, decimals)
+        if vector_format == "npy":
+            return {"format": "npy", "data": base64.b64encode(vectors_to_npy(vectors)).decode('ascii')}
+
+        matrix = np.ascontiguousarray(vectors, dtype=BINARY_DTYPES[vector_format])
+        return {"format": vector_format, "shape": list(matrix.shape), "data": base64.b64encode(matrix.tobytes()).decode('ascii')}
+
+# Round an array of floats for a JSON response
+def round_floats(values: np.ndarray, decimals: Optional[int] = None) -> np.ndarray:
+    """
+    This function converts an array to a C contiguous float32 array, optionally rounded
+    to a number of decimals, which shortens its JSON text.
+
+    Args:
+        values (numpy.ndarray): The array.
+        decimals (int): The number of decimals. Keeps full float32 precision if None.
+
+    Returns:
+        numpy.ndarray: The float32 array.
+    """
+
+    values = np.ascontiguousarray(values, dtype=np.float32)
+    return values if decimals is None else np.round(values, decimals)
+
+# Decode vectors from a request into a float32 matrix
+def decode_vectors(vectors: Union[List[List[float]], EncodedVectors], dimension: Optional[int] = None) -> np.ndarray:
+    """
+    This function decodes vectors sent as a list of float lists or in one of the
+    compact formats into a float32 matrix. Invalid vectors (malformed base64 or
+    .npy data, a shape that does not match the data, or a matrix that is not 2D or
+    does not have dimension columns) raise a ValueError, which the routes return
+    as status code 400.
+
+    Args:
+        vectors (list or EncodedVectors): The vectors to decode.
+        dimension (int): The number of columns the matrix must have. Not checked if None.
+
+    Returns:
+        numpy.ndarray: The 2D float32 matrix of vectors.
+    """
+
+    if not isinstance(vectors, EncodedVectors):
+        matrix = np.asarray(vectors, dtype=np.float32)
+    else:
+        # binascii.Error is a ValueError
+        data = base64.b64decode(vectors.data, validate=True)
+        if vectors.format == "npy":
+            try:
+                matrix = np.load(io.BytesIO(data), allow_pickle=False)
+            except (EOFError, OSError) as e:
+                raise ValueError(f"Invalid npy data: {e}")
+            if matrix.dtype.kind != 'f':
+                raise ValueError("npy vectors must have a floating point dtype.")
+        elif vectors.format in BINARY_DTYPES:
+            if vectors.shape is None or len(vectors.shape) != 2 or min(vectors.shape) < 0:
+                raise ValueError(f"{vectors.format} vectors require a 2D shape.")
+            matrix = np.frombuffer(data, dtype=BINARY_DTYPES[vectors.format]).reshape(vectors.shape)
+        else:
+            raise ValueError(f"Unknown vector format: {vectors.format}.")
+        matrix = np.asarray(matrix, dtype=np.float32)
+
+    # An empty list of vectors has no columns to check
+    if matrix.ndim == 1 and matrix.size == 0:
+        matrix = matrix.reshape(0, dimension or 0)
+    if matrix.ndim != 2:
+        raise ValueError("Vectors must be a 2D matrix, with one row per sentence.")
+    if dimension is not None and matrix.shape[1] != dimension:
+        raise ValueError(f"Vectors must have {dimension} columns, the dimension of the model.")
+    return matrix
+
+# Write a matrix of vectors as .npy bytes
+def vectors_to_npy(vectors: np.ndarray) -> bytes:
+    """
+    This function serializes a matrix of vectors into the bytes of a .npy file.
+    """
+
+    buffer = io.BytesIO()
+    np.save(buffer, np.asarray(vectors), allow_pickle=False)
+    return buffer.getvalue()
@@ -46,7 +46,7 @@ export default function Home() {
       };
 
       reader.readAsDataURL(file);
-      setDocEmbedData(sendPdfToText(file).then(processData) as Promise<EmbedData[]>);
+      setDocEmbedData(ingestFile(file));
       
     }
 
@@ -65,22 +65,61 @@ export default function Home() {
 
   };
 
-  // Function to send pdf to /api/v1/pdf-to-text endpoint
-  const sendPdfToText = async (pdfFile: File) => {
+  // Function to send a file to the /api/v1/ingest endpoint, collecting the sentences and vectors of each page as they stream in
+  const ingestFile = async (file: File): Promise<EmbedData[]> => {
     const formData = new FormData();
-    formData.append('file', pdfFile);
+    formData.append('file', file);
+
+    // One entry per page, so results stay aligned with page numbers
+    let results: EmbedData[] = [];
+
+    setLoadingMessage('Processing text...');
 
     try {
-        const response = await axios.post('/api/pdf-to-text', formData, {
-          headers: {},
-        });
-        console.log(response.data);
-        return response.data;
+        const response = await fetch('/api/ingest', { method: 'POST', body: formData });
+        if (!response.ok || !response.body) {
+          throw new Error(`Ingest failed with status ${response.status}`);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let pageCount = 0;
+        let pagesDone = 0;
+
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+
+          // Every complete line is one event
+          const lines = buffer.split('\n');
+          buffer = lines.pop() ?? '';
+          for (const line of lines) {
+            if (!line.trim()) continue;
+            const event = JSON.parse(line);
+            if (event.error) {
+              throw new Error(event.error);
+            } else if (event.page_count !== undefined) {
+              pageCount = event.page_count;
+              results = Array.from({ length: pageCount }, () => ({ sentences: [], vectors: [] }));
+            } else if (event.page !== undefined) {
+              results[event.page - 1] = { sentences: event.sentences, vectors: event.vectors };
+              pagesDone += 1;
+              setLoadingMessage(`Processed ${pagesDone} of ${pageCount} pages`);
+            }
+          }
+        }
     } catch (error) {
-        console.error('Error sending pdf to API:', error);
-        return null;
+        console.error('Error processing document:', error);
     }
-};
+
+    setPageNumber(1);
+    setLoadingMessage('');
+    setIsLoading(false);
+
+    return results;
+  };
 
 
 // const convertTxtDocxToEmbedding = async (file, filetype) => {
@@ -157,63 +196,6 @@ export default function Home() {
 // };
 
 
-interface ProcessDataInput {
-  text: {
-    [key: string]: string;  // key-value pairs, where the value is the text content
-  };
-}
-
-
-const processData = async (data: ProcessDataInput): Promise<EmbedData[] | null> => {
-  setIsLoading(true); // redundant
-
-  if (data==null || !data.text) {
-    console.error('No text data found in processData');
-    setLoadingMessage('Error processing text, please try again later.');
-    return null;
-  }
-
-  setLoadingMessage('Processing text...');
-  const textItems = Object.values(data.text);
-    
-
-    let results = [];
-    let page_number = 1;
-
-    for (let text of textItems) {
-        setLoadingMessage(`Processing page ${page_number++} of ${textItems.length}`);
-
-        // Var 1
-        // if (page_number%2==0){
-        //   setPageNumber(page_number-1);
-        // }
-        // console.log(page_number);
-
-        try {
-            // Construct the query parameters
-            // const params = new URLSearchParams();
-            // params.append('text', text);
-            // params.append('filter', 'true');
-
-            const response = await axios.post('/api/text-split-and-embed', {
-              text: text,
-              filter: 'true'
-            });
-
-            results.push(response.data);
-        } catch (error) {
-            console.error('Error processing text item:', error);
-        }
-    }
-
-    setPageNumber(1);
-    setLoadingMessage('');
-    setIsLoading(false);
-
-    return results;
-};
-
-
   return (
     <PageNumberContext.Provider value={{ pageNumber, setPageNumber }}>
   
@@ -50,51 +50,35 @@ const handlePageClick = (pageNumber: number) => {
     setIsSearching(true);
 
     let aggregatedResults = [];
-  
-    for (const [pageIndex, pageData] of resolvedDocData.entries()) {
 
-      try {
-        setSearchMessage(`Searching page ${pageIndex + 1} of ${resolvedDocData.length}`);
-        const response = await axios.post('/api/semantic-search', {
+    try {
+        setSearchMessage(`Searching ${resolvedDocData.length} pages`);
+
+        // Search every page at once, each page as one document of the collection
+        const response = await axios.post('/api/collection-search', {
             query: query,
-            sentences: pageData.sentences,
-            vectors: pageData.vectors
+            documents: resolvedDocData.map((pageData, pageIndex) => ({
+              id: String(pageIndex + 1),
+              sentences: pageData.sentences,
+              vectors: pageData.vectors
+            })),
+            top_k: 100 // Only the first 100 results are shown
         });
-        
-        type ResultTuple = [string, number];
 
-        const pageResults = response.data.results.map(([sentence, score]: ResultTuple) => ({
+        type CollectionResult = { document: string, sentence: string, score: number };
+
+        aggregatedResults = response.data.results.map(({ document, sentence, score }: CollectionResult) => ({
           sentence,
           score,
-          page: pageIndex + 1
+          page: Number(document)
         }));
-  
-        aggregatedResults.push(...pageResults);
-
-        aggregatedResults.sort((a, b) => b.score - a.score);
-        // Filter any results with score below 0.1, or any results with content length below 10 characters
-        aggregatedResults = aggregatedResults.filter(result => result.score > 0.1 && result.sentence.length > 10);
-        
-        if (pageIndex < 20){
-            setResults(aggregatedResults.slice(0, pageIndex)); // Truncate results to first pageIndex (limits low quality results from showing due to low page count searched)
-        }
-        else {
-            setResults(aggregatedResults.slice(0, 100)); // Truncate results to first 100
-        }
-
-
-      } catch (error) {
+    } catch (error) {
         console.error('Error in semantic search:', error);
-      }
-  
-      // Force a re-render to update the loading message for each page
-      await new Promise(resolve => setTimeout(resolve, 100));
     }
-  
+
     // Filter any results with score below 0.1, or any results with content length below 10 characters
-    aggregatedResults = aggregatedResults.filter(result => result.score > 0.1 && result.sentence.length > 10);
-    aggregatedResults.sort((a, b) => b.score - a.score);
-    setResults(aggregatedResults.slice(0, 100)); // Truncate results to first 100
+    aggregatedResults = aggregatedResults.filter((result: { sentence: string, score: number }) => result.score > 0.1 && result.sentence.length > 10);
+    setResults(aggregatedResults);
     setIsSearching(false);
 
   };
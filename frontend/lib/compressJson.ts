@@ -0,0 +1,16 @@
+import { gzipSync } from 'zlib';
+
+// JSON bodies smaller than this are sent uncompressed, like the responses of the backend (COMPRESSION_MIN_BYTES)
+const COMPRESSION_MIN_BYTES = 1024;
+
+// Serialize a request body for the backend, gzipped when it is large enough for compression to pay off
+export function compressJson(data: unknown): { body: string | Buffer; headers: Record<string, string> } {
+  const json = JSON.stringify(data);
+  if (Buffer.byteLength(json) < COMPRESSION_MIN_BYTES) {
+    return { body: json, headers: { 'Content-Type': 'application/json' } };
+  }
+  return {
+    body: gzipSync(json, { level: 1 }),
+    headers: { 'Content-Type': 'application/json', 'Content-Encoding': 'gzip' },
+  };
+}
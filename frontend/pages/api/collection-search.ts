@@ -0,0 +1,46 @@
+import type { NextApiRequest, NextApiResponse } from 'next';
+import axios from 'axios';
+import { compressJson } from '@/lib/compressJson';
+
+if (!process.env.API_BASE_URL || !process.env.API_AUTH_TOKEN) {
+  throw new Error("Missing API environment variables");
+}
+
+const API_BASE_URL = process.env.API_BASE_URL;
+const API_AUTH_TOKEN = process.env.API_AUTH_TOKEN;
+
+export const config = {
+  api: {
+    bodyParser: {
+      sizeLimit: '50mb',
+    },
+  },
+};
+
+export default async function handler(req: NextApiRequest, res: NextApiResponse) {
+  if (req.method === 'POST') {
+    const { query, documents, top_k } = req.body;
+
+    try {
+      const params = new URLSearchParams();
+      params.append('query', query);
+      if (top_k) {
+        params.append('top_k', String(top_k));
+      }
+
+      const { body, headers } = compressJson(documents);
+      const response = await axios.post(`${API_BASE_URL}/api/v1/collection-search?${params.toString()}`, body, {
+        headers: {
+          'Authorization': `Bearer ${API_AUTH_TOKEN}`,
+          ...headers,
+        },
+        maxBodyLength: Infinity,
+      });
+      res.status(200).json(response.data);
+    } catch (error) {
+      res.status(500).json({ message: 'Error in collection search.' });
+    }
+  } else {
+    res.status(405).json({ message: 'Method Not Allowed' });
+  }
+}
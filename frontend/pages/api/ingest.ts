@@ -0,0 +1,42 @@
+import type { NextApiRequest, NextApiResponse } from 'next';
+import axios from 'axios';
+
+if (!process.env.API_BASE_URL || !process.env.API_AUTH_TOKEN) {
+  throw new Error("Missing API environment variables");
+}
+
+const API_BASE_URL = process.env.API_BASE_URL;
+const API_AUTH_TOKEN = process.env.API_AUTH_TOKEN;
+
+export const config = {
+  api: {
+    bodyParser: false,
+    responseLimit: false,
+  },
+};
+
+export default async function handler(req: NextApiRequest, res: NextApiResponse) {
+  try {
+    const contentType = req.headers['content-type'] as string;
+    const accept = (req.headers['accept'] as string) || 'application/x-ndjson';
+
+    // Forward the upload as it arrives, and stream the sentences and vectors of each page back as they are ready
+    const response = await axios.post(`${API_BASE_URL}/api/v1/ingest`, req, {
+      headers: {
+        'Authorization': `Bearer ${API_AUTH_TOKEN}`,
+        'Content-Type': contentType, // Preserve the content type
+        'Accept': accept,
+      },
+      responseType: 'stream',
+      maxBodyLength: Infinity,
+    });
+
+    res.status(response.status);
+    res.setHeader('Content-Type', response.headers['content-type']);
+    res.setHeader('Cache-Control', 'no-cache');
+    response.data.pipe(res);
+  } catch (error) {
+    console.error('Error ingesting file with API:', error);
+    res.status(500).json({ message: 'Error ingesting file with API.' });
+  }
+}
@@ -1,5 +1,6 @@
 import type { NextApiRequest, NextApiResponse } from 'next';
 import axios from 'axios';
+import { compressJson } from '@/lib/compressJson';
 
 if (!process.env.API_BASE_URL || !process.env.API_AUTH_TOKEN) {
   throw new Error("Missing API environment variables");
@@ -10,16 +11,22 @@ const API_AUTH_TOKEN = process.env.API_AUTH_TOKEN;
 
 export default async function handler(req: NextApiRequest, res: NextApiResponse) {
   if (req.method === 'POST') {
-    const { query, sentences, vectors } = req.body;
+    const { query, sentences, vectors, top_k } = req.body;
 
     try {
-      const response = await axios.post(`${API_BASE_URL}/api/v1/semantic-search?query=${encodeURIComponent(query)}`, {
-        sentences, vectors
-      }, {
+      const params = new URLSearchParams();
+      params.append('query', query);
+      if (top_k) {
+        params.append('top_k', String(top_k));
+      }
+
+      const { body, headers } = compressJson({ sentences, vectors });
+      const response = await axios.post(`${API_BASE_URL}/api/v1/semantic-search?${params.toString()}`, body, {
         headers: {
           'Authorization': `Bearer ${API_AUTH_TOKEN}`,
-          'Content-Type': 'application/json',
-        }
+          ...headers,
+        },
+        maxBodyLength: Infinity,
       });
       res.status(200).json(response.data);
     } catch (error) {
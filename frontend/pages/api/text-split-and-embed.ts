@@ -1,5 +1,6 @@
 import type { NextApiRequest, NextApiResponse } from 'next';
 import axios from 'axios';
+import { compressJson } from '@/lib/compressJson';
 
 if (!process.env.API_BASE_URL || !process.env.API_AUTH_TOKEN) {
   throw new Error("Missing API environment variables");
@@ -14,14 +15,16 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
 
     try {
       const params = new URLSearchParams();
-      params.append('text', text);
       params.append('filter', filter ? 'true' : 'false');
 
-      const response = await axios.post(`${API_BASE_URL}/api/v1/text-split-and-embed?${params.toString()}`, {}, {
+      // Send the text in the body, compressed, instead of in the URL, which long pages do not fit in
+      const { body, headers } = compressJson({ text });
+      const response = await axios.post(`${API_BASE_URL}/api/v1/text-split-and-embed?${params.toString()}`, body, {
         headers: {
           'Authorization': `Bearer ${API_AUTH_TOKEN}`,
-          'Content-Type': 'application/json',
-        }
+          ...headers,
+        },
+        maxBodyLength: Infinity,
       });
       res.status(200).json(response.data);
     } catch (error) {